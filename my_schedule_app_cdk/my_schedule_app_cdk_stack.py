@@ -55,6 +55,23 @@ class MyScheduleAppCdkStack(Stack):
             auto_delete_objects = True,
         )
         
+        # エクスポートファイル用バケット（署名付きURLでダウンロードさせ、1日で削除する）
+        export_bucket = s3.Bucket(
+            self,
+            "ExportBucket",
+            public_read_access = False,
+            block_public_access = s3.BlockPublicAccess.BLOCK_ALL,
+            encryption = s3.BucketEncryption.S3_MANAGED,
+            lifecycle_rules = [
+                s3.LifecycleRule(
+                    expiration = Duration.days(1),
+                    abort_incomplete_multipart_upload_after = Duration.days(1),
+                ),
+            ],
+            removal_policy = RemovalPolicy.DESTROY,
+            auto_delete_objects = True,
+        )
+
         # CSVファイルアップロード
         csv_upload = s3_deployment.BucketDeployment(
             self,
@@ -310,6 +327,20 @@ class MyScheduleAppCdkStack(Stack):
             layers=[pymysql_layer, mypackage_layer],
         )
 
+        lambda_add_events = aws_lambda.Function(
+            self,
+            "LambdaAddEvents",
+            runtime = aws_lambda.Runtime.PYTHON_3_13,
+            handler = "add_events.lambda_handler",
+            code = aws_lambda.Code.from_asset("./src/backend/functions/add_events"),
+            timeout = Duration.seconds(30),
+            vpc = my_vpc,
+            vpc_subnets = my_subnet_for_lambda,
+            security_groups = [my_sg_for_lambda],
+            # allow_public_subnet = True,
+            layers=[pymysql_layer, mypackage_layer],
+        )
+
         lambda_delete_event = aws_lambda.Function(
             self,
             "LambdaDeleteEvent",
@@ -338,6 +369,54 @@ class MyScheduleAppCdkStack(Stack):
             layers=[pymysql_layer, mypackage_layer],
         )
 
+        lambda_update_events = aws_lambda.Function(
+            self,
+            "LambdaUpdateEvents",
+            runtime = aws_lambda.Runtime.PYTHON_3_13,
+            handler = "update_events.lambda_handler",
+            code = aws_lambda.Code.from_asset("./src/backend/functions/update_events"),
+            timeout = Duration.seconds(30),
+            vpc = my_vpc,
+            vpc_subnets = my_subnet_for_lambda,
+            security_groups = [my_sg_for_lambda],
+            # allow_public_subnet = True,
+            layers=[pymysql_layer, mypackage_layer],
+        )
+
+        # 全予定をS3に書き出す関数（lambda_export_eventsから非同期で呼び出すため、タイムアウトを長めにする）
+        # API Gatewayの統合のタイムアウト（29秒）を受けないよう、APIからは直接呼び出さない
+        # 失敗時は結果（.error）をS3に書くため、非同期呼び出しの再試行はしない
+        lambda_export_events_worker = aws_lambda.Function(
+            self,
+            "LambdaExportEventsWorker",
+            runtime = aws_lambda.Runtime.PYTHON_3_13,
+            handler = "export_events.worker_handler",
+            code = aws_lambda.Code.from_asset("./src/backend/functions/export_events"),
+            timeout = Duration.seconds(300),
+            retry_attempts = 0,
+            vpc = my_vpc,
+            vpc_subnets = my_subnet_for_lambda,
+            security_groups = [my_sg_for_lambda],
+            # allow_public_subnet = True,
+            layers=[pymysql_layer, mypackage_layer],
+        )
+
+        # エクスポートの開始（lambda_export_events_workerの非同期呼び出し）と、完了の確認を行う
+        # DBには接続せず、Lambda・S3・SSMのAPIだけを使うため、VPCには配置しない
+        # （Lambda用サブネットにはLambda APIのエンドポイントがなく、VPC内からは呼び出せない）
+        lambda_export_events = aws_lambda.Function(
+            self,
+            "LambdaExportEvents",
+            runtime = aws_lambda.Runtime.PYTHON_3_13,
+            handler = "export_events.lambda_handler",
+            code = aws_lambda.Code.from_asset("./src/backend/functions/export_events"),
+            timeout = Duration.seconds(30),
+            environment = {
+                "EXPORT_WORKER_FUNCTION": lambda_export_events_worker.function_name,
+            },
+            layers=[pymysql_layer, mypackage_layer],
+        )
+
         lambda_init_db = aws_lambda.Function(
             self,
             "LambdaInitDB",
@@ -358,8 +437,12 @@ class MyScheduleAppCdkStack(Stack):
             lambda_get_detail,
             lambda_get_event,
             lambda_add_event,
+            lambda_add_events,
             lambda_delete_event,
             lambda_update_event,
+            lambda_update_events,
+            lambda_export_events,
+            lambda_export_events_worker,
             lambda_init_db,
         ]
 
@@ -410,11 +493,23 @@ class MyScheduleAppCdkStack(Stack):
             string_value = data_bucket.bucket_name,
         )
 
+        # エクスポートファイルの保存bucket名
+        ssm.StringParameter(
+            self,
+            "MyExportBucket",
+            parameter_name = "/my_schedule_app/export_bucket",
+            string_value = export_bucket.bucket_name,
+        )
+
         # SSM パラメータストアのパラメータへのアクセス権限を付与
         my_custom_iam_policy_statement = iam.PolicyStatement(
             effect = iam.Effect.ALLOW,
-            actions = ["ssm:GetParameter","ssm:GetParameters"],
-            resources = [f"arn:aws:ssm:{self.region}:{self.account}:parameter/my_schedule_app/*"],
+            actions = ["ssm:GetParameter","ssm:GetParameters","ssm:GetParametersByPath"],
+            # GetParametersByPathは、パス自体（/my_schedule_app）がリソースとなる
+            resources = [
+                f"arn:aws:ssm:{self.region}:{self.account}:parameter/my_schedule_app",
+                f"arn:aws:ssm:{self.region}:{self.account}:parameter/my_schedule_app/*",
+            ],
         )
 
         for fn in lambdas:
@@ -423,6 +518,12 @@ class MyScheduleAppCdkStack(Stack):
         # init_db.pyにS3バケットへのアクセス権限を付与
         data_bucket.grant_read(lambda_init_db)
 
+        # export_events.pyのworker_handlerにエクスポート用バケットへの書き込み権限を付与
+        export_bucket.grant_read_write(lambda_export_events_worker)
+        # lambda_handlerには、完了の確認（一覧）と署名付きURLでの読み込みの権限、workerの呼び出し権限を付与
+        export_bucket.grant_read(lambda_export_events)
+        lambda_export_events_worker.grant_invoke(lambda_export_events)
+
         # Cognitoユーザープールの作成
         my_user_pool = cognito.UserPool(
             self,
@@ -482,8 +583,13 @@ class MyScheduleAppCdkStack(Stack):
             default_cors_preflight_options = apigw.CorsOptions(
                 allow_origins = apigw.Cors.ALL_ORIGINS,
                 allow_methods = apigw.Cors.ALL_METHODS,
+                # get-calendar・get-detailの条件付きGET（If-None-Match）を許可する
+                allow_headers = apigw.Cors.DEFAULT_HEADERS + ["If-None-Match"],
             ),
             endpoint_configuration = apigw.EndpointConfiguration(types=[apigw.EndpointType.REGIONAL]),
+            # Lambdaが圧縮してbase64で返した本文を、バイナリに戻してクライアントに返す（Accept: application/jsonのリクエストのみ）
+            # application/jsonのリクエストbodyは、base64でLambdaに渡される（mypackage.api.parse_bodyで戻す）
+            binary_media_types = ["application/json"],
             deploy_options = apigw.StageOptions(
                 stage_name = "prod",
                 throttling_rate_limit = 10,
@@ -513,8 +619,11 @@ class MyScheduleAppCdkStack(Stack):
         get_detail_resource = my_api.root.add_resource("get-detail")
         get_event_resource = my_api.root.add_resource("get-event")
         add_event_resource = my_api.root.add_resource("add-event")
+        add_events_resource = my_api.root.add_resource("add-events")
         delete_event_resource = my_api.root.add_resource("delete-event")
         update_event_resource = my_api.root.add_resource("update-event")
+        update_events_resource = my_api.root.add_resource("update-events")
+        export_events_resource = my_api.root.add_resource("export-events")
 
         get_calendar_resource.add_method(
             "GET",
@@ -545,6 +654,13 @@ class MyScheduleAppCdkStack(Stack):
             authorization_type = apigw.AuthorizationType.COGNITO,
         )
 
+        add_events_resource.add_method(
+            "POST",
+            apigw.LambdaIntegration(lambda_add_events),
+            authorizer = my_authorizer,
+            authorization_type = apigw.AuthorizationType.COGNITO,
+        )
+
         delete_event_resource.add_method(
             "POST",
             apigw.LambdaIntegration(lambda_delete_event),
@@ -559,6 +675,20 @@ class MyScheduleAppCdkStack(Stack):
             authorization_type = apigw.AuthorizationType.COGNITO,
         )
 
+        update_events_resource.add_method(
+            "POST",
+            apigw.LambdaIntegration(lambda_update_events),
+            authorizer = my_authorizer,
+            authorization_type = apigw.AuthorizationType.COGNITO,
+        )
+
+        export_events_resource.add_method(
+            "GET",
+            apigw.LambdaIntegration(lambda_export_events),
+            authorizer = my_authorizer,
+            authorization_type = apigw.AuthorizationType.COGNITO,
+        )
+
         # lambda_init_dbを実行する
         provider = cr.Provider(
             self,
@@ -4,10 +4,10 @@ from datetime import date,timedelta,datetime
 import logging
 import pymysql
 
-from mypackage.user_utils import get_userinfo
+from mypackage.api import api_handler, ApiError
 from mypackage.logging_utils import get_logger
-from mypackage.ssm_utils import get_rdsinfo
-from mypackage.secret_utils import get_secret
+from mypackage.db import db_connection
+from mypackage.calendar_cache import bump_user_revision
 
 
 # ロガー設定
@@ -18,15 +18,7 @@ logger = get_logger()
 def add_event(date,event_name, event_detail, user_id, user_name, secret_id, region_name, rds_host, rds_database):
     try:
         logger.debug("Connecting to databases ...")
-        secret = get_secret(secret_id,region_name)
-        with pymysql.connect(
-            host = rds_host,
-            user = secret["username"],
-            password = secret["password"],
-            database = rds_database,
-            charset = "utf8mb4",
-            connect_timeout = 5
-        ) as conn:
+        with db_connection(rds_host, rds_database, secret_id, region_name) as conn:
             logger.debug("Creating cursor ...")
             with conn.cursor() as cur:
                 # sql = "select now();"
@@ -40,6 +32,7 @@ def add_event(date,event_name, event_detail, user_id, user_name, secret_id, regi
                 """
                 cur.execute(sql,(date, event_name, event_detail, user_id, user_name))
                 if cur.rowcount == 1:
+                    bump_user_revision(cur, user_id)
                     conn.commit()
                     return True
                 else:
@@ -51,86 +44,14 @@ def add_event(date,event_name, event_detail, user_id, user_name, secret_id, regi
        raise
 
 
-def lambda_handler(event,context):
-    try:
-        # SSMパラメータストアからSecretsManager情報、RDS情報を取得
-        logger.debug("Retrieving SSM parameters ...")
-        secret_id = get_rdsinfo("/my_schedule_app/secret_id")
-        region_name = get_rdsinfo("/my_schedule_app/region_name")
-        rds_host  = get_rdsinfo("/my_schedule_app/rds_host")
-        rds_database = get_rdsinfo("/my_schedule_app/rds_database")
-
-        # ユーザー情報を取得 user_idが空の場合はエラーを返す
-        logger.debug("Retrieving user information ...")
-        userinfo = get_userinfo(event)
-        user_id = userinfo["user_id"]
-        user_name = userinfo["user_name"]
-        if not userinfo["user_id"]:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                        "status" : "error",
-                        "message" :"No user_id"
-                    })
-            }
-
-        # 引数を取得
-        # bodyの中身はjson文字列なのでjson.loadsでdictに変換する
-        body = json.loads(event.get("body",{}))
-        date = body.get("date","")
-        event_name = body.get("event_name","")
-        event_detail = body.get("event_detail","")
-
-        if not date:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                        "status" : "error",
-                        "message" :"No date found"
-                    })
-            }
-
-        result = add_event(date, event_name, event_detail, user_id, user_name, secret_id, region_name, rds_host, rds_database)
-        if result:
-            return {
-                "statusCode": 200,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                    "status": "success",
-                    "message": "OK"
-                    }, ensure_ascii = False)
-            }
-    except Exception as e:
-        return {
-            "statusCode": 500,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-            },
-            "body": json.dumps({
-                "status": "error",
-                "message": "Internal server error"
-                }, ensure_ascii = False)
-        }
+@api_handler(params = "body", required = {"date": "No date found"})
+def lambda_handler(request):
+    body = request.params
+    config = request.config
+    result = add_event(body["date"], body.get("event_name", ""), body.get("event_detail", ""), request.user_id, request.user_name, config["secret_id"], config["region_name"], config["rds_host"], config["rds_database"])
+    if not result:
+        raise ApiError("No records added")
+    return "OK"
 
 
 # ローカルテスト用
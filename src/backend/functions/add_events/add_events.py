@@ -0,0 +1,109 @@
+import json
+
+from mypackage.api import api_handler, ApiError, parse_date
+from mypackage.logging_utils import get_logger
+from mypackage.db import db_connection, in_list
+from mypackage.calendar_cache import bump_user_revision
+
+
+# ロガー設定
+logger = get_logger()
+
+# 1リクエストで追加できる予定の最大件数
+ADD_EVENTS_MAX = 100
+# event_t.event_nameの最大長（VARCHAR(200)）
+EVENT_NAME_MAX_LENGTH = 200
+
+# executemanyは、VALUES句が1つだけのINSERTを複数行のINSERTにまとめて実行する
+INSERT_EVENT_SQL = """
+INSERT INTO event_t (`date`, `event_name`, `event_detail`, `user_id`, `user_name`)
+VALUES (%s,%s,%s,%s,%s)
+"""
+
+
+# 1件分の予定を検証し、(date, event_name, event_detail) を返す（不正な場合はApiError）
+def parse_event(item):
+    if not isinstance(item, dict):
+        raise ApiError("Invalid event")
+    event_date = parse_date(item.get("date"))
+    event_name = item.get("event_name", "")
+    event_detail = item.get("event_detail", "")
+    if not isinstance(event_name, str):
+        raise ApiError("Invalid event_name")
+    if not isinstance(event_detail, str):
+        raise ApiError("Invalid event_detail")
+    event_name = event_name.strip()
+    if len(event_name) > EVENT_NAME_MAX_LENGTH:
+        raise ApiError("event_name is too long")
+    return event_date, event_name, event_detail.strip()
+
+
+# calendar_mにある日付だけを返す（event_t.dateはcalendar_mの外部キーのため、それ以外の日付はinsertできない）
+def find_calendar_dates(cur, dates):
+    placeholders, args = in_list(sorted(dates), ADD_EVENTS_MAX)
+    cur.execute(f"SELECT `date` FROM calendar_m WHERE `date` IN ({placeholders})", args)
+    return {row[0] for row in cur.fetchall()}
+
+
+# 複数の予定を1トランザクションでinsertし、リクエストの順に各予定の結果を返す
+# 検証に失敗した予定はinsertせず、その理由を結果に含める
+def add_events(events, user_id, user_name, secret_id, region_name, rds_host, rds_database):
+    results = [None] * len(events)
+    parsed = []
+    for index, item in enumerate(events):
+        try:
+            parsed.append((index, parse_event(item)))
+        except ApiError as e:
+            results[index] = {"index": index, "status": "error", "message": e.message}
+
+    # 全件が検証エラーの場合は、DBに接続しない
+    if not parsed:
+        return results
+
+    try:
+        with db_connection(rds_host, rds_database, secret_id, region_name) as conn:
+            with conn.cursor() as cur:
+                calendar_dates = find_calendar_dates(cur, {event[0] for _, event in parsed})
+                rows = []
+                for index, (event_date, event_name, event_detail) in parsed:
+                    if event_date not in calendar_dates:
+                        results[index] = {"index": index, "status": "error", "message": "Date out of range"}
+                        continue
+                    rows.append((event_date, event_name, event_detail, user_id, user_name))
+                    results[index] = {"index": index, "status": "success"}
+                if rows:
+                    logger.debug(f"Inserting {len(rows)} events")
+                    cur.executemany(INSERT_EVENT_SQL, rows)
+                    bump_user_revision(cur, user_id)
+                    conn.commit()
+
+    except Exception as e:
+       logger.error(f"Error in add_events: {e}")
+       raise
+
+    return results
+
+
+@api_handler(params = "body", required = {"events": "No events found"})
+def lambda_handler(request):
+    events = request.params["events"]
+    config = request.config
+    if not isinstance(events, list):
+        raise ApiError("Invalid events")
+    if len(events) > ADD_EVENTS_MAX:
+        raise ApiError(f"Too many events (max {ADD_EVENTS_MAX})")
+    results = add_events(events, request.user_id, request.user_name, config["secret_id"], config["region_name"], config["rds_host"], config["rds_database"])
+    added = sum(1 for result in results if result["status"] == "success")
+    return {"username": request.user_name, "data": {"added": added, "failed": len(results) - added, "results": results}}
+
+
+# ローカルテスト用
+if __name__ == "__main__":
+    logger.debug("Call lambda_handler")
+    # bodyの中身は、JSON文字列で渡す
+    body = {"events": [
+        {"date": "2025-12-30", "event_name": "テスト予定名1", "event_detail": "テスト予定詳細1"},
+        {"date": "2025-12-31", "event_name": "テスト予定名2", "event_detail": "テスト予定詳細2"},
+    ]}
+    result = lambda_handler({"requestContext": {"authorizer": { "claims": {"sub":"77e4ba28-c0c1-70a1-b582-dba669f01e18","cognito:username":"dummyUserName"}}},"body": json.dumps(body, ensure_ascii = False)},None)
+    print(result)
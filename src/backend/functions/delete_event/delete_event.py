@@ -1,32 +1,32 @@
 import json
+import time
 import logging
 import boto3
 import pymysql
 from datetime import date, datetime
 
-from mypackage.user_utils import get_userinfo
+from mypackage.api import api_handler, ApiError, parse_date
 from mypackage.logging_utils import get_logger
-from mypackage.secret_utils import get_secret
-from mypackage.ssm_utils import get_rdsinfo
+from mypackage.db import db_connection
+from mypackage.calendar_cache import bump_user_revision
 
 
 # ロガー設定
 logger = get_logger()
 
+# 条件指定の一括削除で、1トランザクションで削除する最大件数
+# 1回のDELETEで長時間ロックを保持したり、undoログが大きくなったりしないよう、この件数ずつ削除してコミットする
+DELETE_CHUNK_SIZE = 1000
+# 条件指定の一括削除を続ける最大秒数（Lambdaのタイムアウトより短くする）
+# 超えた場合は、そこまでの削除をコミット済みのまま終了し、completed=Falseを返す（再度呼び出せば続きを削除する）
+DELETE_TIME_LIMIT_SECONDS = 20
+
 
 # 選択された予定を削除する
 def delete_event(event_ids, user_id, secret_id, region_name, rds_host, rds_database):
     # event_idはリスト
     try: 
-        secret = get_secret(secret_id, region_name)
-        with pymysql.connect(
-            host = rds_host,
-            user = secret["username"],
-            password = secret["password"],
-            database = rds_database,
-            charset = "utf8mb4",
-            connect_timeout = 5
-        ) as conn:
+        with db_connection(rds_host, rds_database, secret_id, region_name) as conn:
             with conn.cursor() as cur:
                 logger.debug(f"event_ids: {event_ids}")
                 num_of_events = len(event_ids)
@@ -36,6 +36,7 @@ def delete_event(event_ids, user_id, secret_id, region_name, rds_host, rds_datab
                 # event_ids（リスト）とuser_idを並べるため、event_idsをアンパック（＊）する必要がある
                 cur.execute(sql,(*event_ids, user_id))
                 if cur.rowcount == num_of_events:
+                    bump_user_revision(cur, user_id)
                     conn.commit()
                     return True
                 else:
@@ -47,97 +48,88 @@ def delete_event(event_ids, user_id, secret_id, region_name, rds_host, rds_datab
         raise
 
 
-def lambda_handler(event,context):
+# LIKEの特殊文字（%, _, \）をエスケープし、部分一致のパターンにする
+def make_like_pattern(text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+# 日付の範囲と予定名（部分一致）で指定した予定を、DELETE_CHUNK_SIZE件ずつ削除してコミットする
+# 戻り値は、削除件数、すべて削除し終えたかどうか、各チャンクの削除件数とロック保持時間（DELETEの開始からCOMMITまで）
+def delete_events_by_filter(user_id, start_date, end_date, event_name, secret_id, region_name, rds_host, rds_database):
+    conditions = ["`user_id` = %s"]
+    args = [user_id]
+    if start_date is not None:
+        conditions.append("`date` >= %s")
+        args.append(start_date)
+    if end_date is not None:
+        conditions.append("`date` <= %s")
+        args.append(end_date)
+    if event_name:
+        conditions.append("`event_name` LIKE %s")
+        args.append(make_like_pattern(event_name))
+    # (user_id, date, event_name)のインデックスの順に削除する
+    sql = f"DELETE FROM event_t WHERE {' AND '.join(conditions)} ORDER BY `date`, `event_name` LIMIT {DELETE_CHUNK_SIZE}"
+    logger.debug(f"sql: {sql}")
+
+    deleted = 0
+    chunks = []
+    started = time.monotonic()
     try:
-        # SSMパラメータストアからSecretsManager情報、RDS情報を取得
-        logger.debug("Retrieving SSM parameters ...")
-        secret_id = get_rdsinfo("/my_schedule_app/secret_id")
-        region_name = get_rdsinfo("/my_schedule_app/region_name")
-        rds_host  = get_rdsinfo("/my_schedule_app/rds_host")
-        rds_database = get_rdsinfo("/my_schedule_app/rds_database")
-
-        # ユーザー情報を取得 user_idが空の場合はエラーを返す
-        userinfo = get_userinfo(event)
-        user_id = userinfo["user_id"]
-        user_name = userinfo["user_name"]
-        if not user_id:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                    "status": "error",
-                    "message": "No user_id"
-                }, ensure_ascii = False)  
-            }
-
-        # 引数の取得
-        body = event.get("body", {})
-        event_ids = json.loads(body).get("event_ids", [])
-        logger.debug(f"event_ids: {event_ids}, {type(event_ids)}")
-        if not event_ids:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                    "status": "error",
-                    "message": "No event_ids"
-                }, ensure_ascii = False)  
-            }
-
-        # 削除の実施
-        result = delete_event(event_ids, user_id, secret_id, region_name, rds_host, rds_database)
-        if result:
-            return {
-                "statusCode": 200,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                    "status": "success",
-                    "message": "OK"
-                }, ensure_ascii = False)
-            }
-        else:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                    "status": "error",
-                    "message": "No records deleted"
-                }, ensure_ascii = False)
-            }
+        with db_connection(rds_host, rds_database, secret_id, region_name) as conn:
+            with conn.cursor() as cur:
+                while True:
+                    chunk_started = time.monotonic()
+                    cur.execute(sql, args)
+                    count = cur.rowcount
+                    if count:
+                        bump_user_revision(cur, user_id)
+                    conn.commit()
+                    chunks.append({"deleted": count, "seconds": time.monotonic() - chunk_started})
+                    deleted += count
+                    if count < DELETE_CHUNK_SIZE:
+                        completed = True
+                        break
+                    if time.monotonic() - started >= DELETE_TIME_LIMIT_SECONDS:
+                        completed = False
+                        break
+
     except Exception as e:
-        return {
-            "statusCode": 500,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-            },
-            "body": json.dumps({
-                "status": "error",
-                "message": "Internal server error"
-                }, ensure_ascii = False)
-        }
+        logger.error(f"Error occurred in delete_events_by_filter: {e}")
+        raise
+
+    max_seconds = max(chunk["seconds"] for chunk in chunks)
+    logger.info(f"Deleted {deleted} events in {len(chunks)} chunks (max lock hold {max_seconds * 1e3:.1f} ms, completed: {completed})")
+    return {"deleted": deleted, "completed": completed, "chunks": chunks}
+
+
+@api_handler(params = "body")
+def lambda_handler(request):
+    params = request.params
+    config = request.config
+
+    # event_idsが指定された場合は、そのevent_idの予定だけを削除する
+    event_ids = params.get("event_ids")
+    if event_ids:
+        logger.debug(f"event_ids: {event_ids}, {type(event_ids)}")
+        result = delete_event(event_ids, request.user_id, config["secret_id"], config["region_name"], config["rds_host"], config["rds_database"])
+        if not result:
+            raise ApiError("No records deleted")
+        return "OK"
+
+    # 日付の範囲・予定名の指定による一括削除（どれも指定がない場合は、全件削除を防ぐためエラーにする）
+    start_date = parse_date(params["start_date"], "start_date") if params.get("start_date") else None
+    end_date = parse_date(params["end_date"], "end_date") if params.get("end_date") else None
+    event_name = params.get("event_name")
+    if event_name is not None and not isinstance(event_name, str):
+        raise ApiError("Invalid event_name")
+    if start_date is None and end_date is None and not event_name:
+        raise ApiError("No event_ids")
+    if start_date and end_date and start_date > end_date:
+        raise ApiError("Invalid date range")
+
+    result = delete_events_by_filter(request.user_id, start_date, end_date, event_name, config["secret_id"], config["region_name"], config["rds_host"], config["rds_database"])
+    return {"username": request.user_name, "data": {"deleted": result["deleted"], "completed": result["completed"]}}
 
 
 # ローカル動作確認用
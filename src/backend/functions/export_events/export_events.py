@@ -0,0 +1,223 @@
+import os
+import re
+import csv
+import io
+import json
+import uuid
+import boto3
+import itertools
+from datetime import datetime
+from pymysql.cursors import SSCursor
+# カスタムモジュール読み込み
+from mypackage.api import api_handler, ApiError
+from mypackage.logging_utils import get_logger
+from mypackage.ssm_utils import get_config
+from mypackage.db import db_connection
+
+# ロガー設定
+logger = get_logger()
+
+# S3・Lambdaのクライアントはwarm起動時に使いまわす
+s3 = boto3.client("s3")
+lambda_client = boto3.client("lambda")
+
+# エクスポートを実行する関数（worker_handler）の名前（CDKで設定する）
+# API Gatewayの統合は29秒で打ち切られるため、lambda_handlerからは非同期で呼び出し、完了はS3のファイルで確認する
+EXPORT_WORKER_FUNCTION = os.environ.get("EXPORT_WORKER_FUNCTION", "")
+
+# 出力形式ごとのContent-Typeと拡張子
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson; charset=utf-8", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+# マルチパートアップロードの1パートの大きさ（最後以外のパートは5MB以上である必要がある）
+# メモリ上に保持する出力データは、1パート分のバッファ（使いまわす）と、次の1行分まで
+EXPORT_PART_SIZE = 8 * 1024 * 1024
+# ダウンロード用の署名付きURLの有効期間（秒）
+EXPORT_URL_EXPIRES = 900
+# 出力する列（CSVのヘッダ、NDJSONのキー）
+EXPORT_COLUMNS = ["event_id", "date", "event_name", "event_detail"]
+# ジョブID（出力ファイル名。日時と乱数と拡張子）の形式
+EXPORT_JOB_ID_PATTERN = re.compile(r"[0-9]{14}-[0-9a-f]{32}\.(ndjson|csv)")
+# エクスポートに失敗した場合に、出力ファイルのキーにこの接尾辞を付けてエラー内容を書く
+EXPORT_ERROR_SUFFIX = ".error"
+
+
+# ユーザーの全予定を1行ずつ返す
+# SSCursorはサーバから届いた行をその都度読み込むため、結果セット全体をメモリに載せない
+def iter_events(conn, user_id):
+    with conn.cursor(SSCursor) as cur:
+        sql = """
+        SELECT `event_id`,`date`,`event_name`,`event_detail` FROM event_t
+        WHERE `user_id` = %s
+        ORDER BY `date`, `event_id`
+        """
+        cur.execute(sql, (user_id,))
+        for event_id, date, event_name, event_detail in cur.fetchall_unbuffered():
+            yield event_id, date.strftime("%Y-%m-%d"), event_name, event_detail
+
+
+# 1行を1つのJSONオブジェクトにする
+def format_ndjson(rows):
+    for event_id, date, event_name, event_detail in rows:
+        yield json.dumps({"event_id": event_id, "date": date, "event_name": event_name, "event_detail": event_detail}, ensure_ascii = False) + "\n"
+
+
+# ヘッダ行に続けて、1行ずつCSVにする（書き込み先のバッファは1行分だけ使いまわす）
+def format_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in itertools.chain([EXPORT_COLUMNS], rows):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+FORMATTERS = {"ndjson": format_ndjson, "csv": format_csv}
+
+
+# 文字列の行をUTF-8にして、chunk_size以上の大きさのチャンクにまとめ、(バッファ, バイト数, 最後のチャンクかどうか) を返す
+# バッファ（BytesIO）は1つを使いまわすため、次のチャンクを取り出す前にアップロードを終えておく必要がある
+# 最後のチャンクかどうかを判定するため、次の1行だけを先読みする（最後のチャンクのみ小さくなりうる）
+def iter_chunks(lines, chunk_size):
+    buffer = io.BytesIO()
+    lines = iter(lines)
+    line = next(lines, None)
+    if line is None:
+        yield buffer, 0, True
+        return
+    while line is not None:
+        buffer.write(line.encode("utf-8"))
+        line = next(lines, None)
+        if buffer.tell() >= chunk_size or line is None:
+            size = buffer.tell()
+            buffer.seek(0)
+            yield buffer, size, line is None
+            buffer.seek(0)
+            buffer.truncate()
+
+
+# チャンクを順にS3へアップロードし、アップロードしたバイト数を返す
+# 最初のチャンクが最後のチャンクならput_object、それ以外はマルチパートアップロードにする（失敗時はアップロードを中止する）
+# チャンクは1つずつアップロードし終えてから次を取り出すため、保持するのは常に1パート分だけ
+def upload_chunks(chunks, bucket, key, content_type):
+    chunks = iter(chunks)
+    body, size, last = next(chunks)
+    if last:
+        s3.put_object(Bucket = bucket, Key = key, Body = body, ContentType = content_type)
+        return size
+
+    upload_id = s3.create_multipart_upload(Bucket = bucket, Key = key, ContentType = content_type)["UploadId"]
+    try:
+        parts = []
+        total = 0
+        for number, (body, size, _) in enumerate(itertools.chain([(body, size, last)], chunks), start = 1):
+            res = s3.upload_part(Bucket = bucket, Key = key, UploadId = upload_id, PartNumber = number, Body = body)
+            parts.append({"PartNumber": number, "ETag": res["ETag"]})
+            total += size
+        s3.complete_multipart_upload(Bucket = bucket, Key = key, UploadId = upload_id, MultipartUpload = {"Parts": parts})
+        return total
+    except Exception:
+        logger.error(f"Aborting multipart upload: {key}")
+        s3.abort_multipart_upload(Bucket = bucket, Key = key, UploadId = upload_id)
+        raise
+
+
+# ユーザーの全予定を指定形式でS3に書き出し、行数・バイト数を返す
+# DBからの読み込み、整形、アップロードを1チャンクずつ進めるため、メモリ使用量は行数によらない
+def export_events(conn, user_id, export_format, bucket, key):
+    content_type, _ = EXPORT_FORMATS[export_format]
+    result = {"rows": 0, "bytes": 0}
+
+    def count_rows(rows):
+        for row in rows:
+            result["rows"] += 1
+            yield row
+
+    lines = FORMATTERS[export_format](count_rows(iter_events(conn, user_id)))
+    result["bytes"] = upload_chunks(iter_chunks(lines, EXPORT_PART_SIZE), bucket, key, content_type)
+    return result
+
+
+# ジョブID（日時と乱数で一意にした出力ファイル名）
+def make_export_job_id(export_format):
+    _, extension = EXPORT_FORMATS[export_format]
+    return f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex}.{extension}"
+
+
+# 出力ファイルのキー（ユーザーごとのプレフィックス配下に置く）
+def make_export_key(user_id, job_id):
+    return f"exports/{user_id}/{job_id}"
+
+
+# エクスポートを非同期で開始し、ジョブIDを返す
+def start_export(user_id, export_format):
+    job_id = make_export_job_id(export_format)
+    payload = {"user_id": user_id, "format": export_format, "job_id": job_id}
+    lambda_client.invoke(FunctionName = EXPORT_WORKER_FUNCTION, InvocationType = "Event", Payload = json.dumps(payload).encode())
+    logger.info(f"Started export {job_id}")
+    return job_id
+
+
+# エクスポートの状態を返す（出力ファイルがあれば署名付きURLを付けて"completed"、エラーがあれば"failed"、それ以外は"running"）
+def get_export_status(bucket, user_id, job_id):
+    key = make_export_key(user_id, job_id)
+    # 出力ファイルと、失敗時のエラーを1回の一覧取得で確認する
+    res = s3.list_objects_v2(Bucket = bucket, Prefix = key, MaxKeys = 2)
+    objects = {item["Key"]: item for item in res.get("Contents", [])}
+    if key + EXPORT_ERROR_SUFFIX in objects:
+        return {"job_id": job_id, "status": "failed"}
+    if key not in objects:
+        return {"job_id": job_id, "status": "running"}
+    url = s3.generate_presigned_url(
+        "get_object",
+        Params = {"Bucket": bucket, "Key": key},
+        ExpiresIn = EXPORT_URL_EXPIRES,
+    )
+    return {"job_id": job_id, "status": "completed", "url": url, "bytes": objects[key]["Size"]}
+
+
+# GET export-events?format=...: エクスポートを開始し、202とジョブIDを返す
+# GET export-events?job_id=...: エクスポートの状態を返す（完了前は202、完了後は200と署名付きURL）
+@api_handler(params = "query")
+def lambda_handler(request):
+    config = request.config
+    job_id = request.params.get("job_id")
+    if job_id:
+        if not EXPORT_JOB_ID_PATTERN.fullmatch(job_id):
+            raise ApiError("Invalid job_id")
+        result = get_export_status(config["export_bucket"], request.user_id, job_id)
+        if result["status"] == "running":
+            request.status_code = 202
+        return {"username": request.user_name, "data": result}
+
+    export_format = request.params.get("format") or "ndjson"
+    if export_format not in EXPORT_FORMATS:
+        raise ApiError("Invalid format")
+    job_id = start_export(request.user_id, export_format)
+    request.status_code = 202
+    return {"username": request.user_name, "data": {"job_id": job_id, "status": "running", "format": export_format}}
+
+
+# lambda_handlerから非同期で呼び出され、ユーザーの全予定をS3に書き出す
+# event: {"user_id": ..., "format": ..., "job_id": ...}
+# 失敗した場合は、出力ファイルのキー＋EXPORT_ERROR_SUFFIXにエラーを書く（非同期呼び出しの再試行はしない）
+def worker_handler(event, context):
+    key = make_export_key(event["user_id"], event["job_id"])
+    config = get_config()
+    bucket = config["export_bucket"]
+    try:
+        with db_connection(config["rds_host"], config["rds_database"], config["secret_id"], config["region_name"]) as conn:
+            result = export_events(conn, event["user_id"], event["format"], bucket, key)
+    except Exception as e:
+        logger.error(f"Export failed: {key}: {e}")
+        s3.put_object(Bucket = bucket, Key = key + EXPORT_ERROR_SUFFIX, Body = b"Export failed", ContentType = "text/plain; charset=utf-8")
+        return {"status": "failed"}
+    logger.info(f"Exported {result['rows']} rows ({result['bytes']} bytes) to {key}")
+    return {"status": "completed", **result}
+
+
+if __name__ == "__main__":
+    result = lambda_handler({"requestContext": {"authorizer": { "claims": {"sub":"77e4ba28-c0c1-70a1-b582-dba669f01e18","cognito:username":"dummyUserName"}}},"queryStringParameters":{"format": "csv"}},None)
+    print(result)
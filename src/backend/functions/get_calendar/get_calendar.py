@@ -1,150 +1,185 @@
+import os
 import json
 import boto3
 import pymysql
 from datetime import date,timedelta,datetime
 from collections import defaultdict
 # カスタムモジュール読み込み
-from mypackage.user_utils import get_userinfo
-from mypackage.ssm_utils import get_rdsinfo
+from mypackage.api import api_handler, ApiError, parse_date, make_etag
 from mypackage.logging_utils import get_logger
-from mypackage.secret_utils import get_secret
+from mypackage.db import db_connection, column_cursor
+from mypackage.holiday_index import get_holiday_index, WEEKDAY_NAMES
+from mypackage.calendar_cache import get_calendar_cache, get_user_revision
 
 
 # ロガー設定
 logger = get_logger()
 
 
+# 集計モード
+# "index": 日付・曜日・祝日はコンテナ内の祝日インデックスから作り、event_tだけを検索する
+# "python": 予定1件ごとに1行取得し、Python側で日付ごとにまとめる
+# "sql": SQL側で日付ごとに予定を集計し、1日1行で取得する
+CALENDAR_MODE = os.environ.get("GET_CALENDAR_MODE", "index")
+
+
 # DBからデータ取得（日付、曜日、祝日、イベント）
-def get_calendar(start_date, end_date, user_id, secret_id, region_name, rds_host, rds_database):
+# ユーザーの予定が前回から更新されていなければ、コンテナ内のキャッシュから返す
+# check_etag: 内容のETagを受け取る関数（変更がない場合は、NotModifiedを送出して取得を打ち切る）
+def get_calendar(start_date, end_date, user_id, secret_id, region_name, rds_host, rds_database, mode = None, check_etag = None):
+    mode = mode or CALENDAR_MODE
     try:
         logger.debug("Connecting to databases ...")
-        secret = get_secret(secret_id, region_name)
-        with pymysql.connect(
-            host = rds_host,
-            user = secret["username"],
-            password = secret["password"],
-            database = rds_database,
-            charset = "utf8mb4",
-            connect_timeout = 5
-        ) as conn:
+        with db_connection(rds_host, rds_database, secret_id, region_name) as conn:
             logger.debug("Creating cursor ...")
             with conn.cursor() as cur:
-                sql = """
-                SELECT t1.`date`,t1.`weekday`,t3.`holiday_name`,t2.`event_name`
-                FROM calendar_m t1
-                LEFT OUTER JOIN ( select `date`, `event_name` from event_t where `user_id` = %s ) t2
-                ON t1.`date`=t2.`date`
-                LEFT OUTER JOIN holiday_m t3
-                ON t1.`date`=t3.`date`
-                where t1.`date` between %s and %s
-                ORDER BY t1.`date`,t2.`event_name`
-                """
-                cur.execute(sql,(user_id, start_date, end_date))
-                rows = cur.fetchall()
-                # 同日にeventが複数ある場合の対応
-                # "date","weekday","holiday_name"をKEYにして（これは一意となる前提）、
-                # eventをリストで持つ辞書を要素とする、リストを作る
-                # （補足）各レコードについて、（日付、曜日、祝日名）のセットをキーとし、予定を値とした、作業用辞書を作る
-                # 値は、listなので、同じキーがあった場合は、値のリストにappendしていく
-                # また、defaultdictなので、キーを予め作って置かなくても、エラーにならない
-                # その後、キーを元の３つに分けて、要素名をつけたリストに作り直す（結果をjson形式で返すため）
-                temp_dict = defaultdict(list)
-                for date,weekday,holiday_name,event in rows:
-                    temp_dict[(date.strftime("%Y-%m-%d"),weekday,holiday_name)].append(event)
-                result_list = [
-                    {"date": date, "weekday": weekday, "holiday_name": holiday_name,"events": event} 
-                    for (date,weekday,holiday_name),event in temp_dict.items()
-                ] 
-                return result_list
+                # 内容は、ユーザーの予定の更新回数と、祝日・カレンダーの範囲のバージョンで決まる
+                revision = f"{get_user_revision(cur, user_id)}.{get_holiday_index(cur).tag}"
+                if check_etag:
+                    check_etag(make_etag("calendar", user_id, start_date, end_date, revision))
+                return get_calendar_cache().get_or_load(cur, user_id, start_date, end_date, lambda: query_calendar(conn, cur, start_date, end_date, user_id, mode), revision)
 
     except Exception as e:
         raise
 
 
-def lambda_handler(event,context):
-    try:
-        # SSMパラメータストアからSecretsManager情報、RDS情報を取得
-        logger.debug("Retrieving SSM parameters ...")
-        secret_id = get_rdsinfo("/my_schedule_app/secret_id")
-        region_name = get_rdsinfo("/my_schedule_app/region_name")
-        rds_host  = get_rdsinfo("/my_schedule_app/rds_host")
-        rds_database = get_rdsinfo("/my_schedule_app/rds_database")
-
-        # ユーザー情報を取得 user_idが空の場合はエラーを返す
-        logger.debug("Retrieving user information ...")
-        userinfo = get_userinfo(event)
-        user_id = userinfo["user_id"]
-        user_name = userinfo["user_name"]
-        if not user_id:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                        "status" : "error",
-                        "message" :"No user_id"
-                    })
-            }
-
-        # GETパラメータを取得
-        logger.debug(f'event.queryStringParameters: {event["queryStringParameters"]}')
-        dict_body = {"start_date": event["queryStringParameters"]["start_date"],"end_date": event["queryStringParameters"]["end_date"]}
-        logger.debug(f"dict_body: {dict_body}")
-        if not dict_body:
-            return {
-                "statusCode": 400,
-                "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                    "status": "error",
-                    "message": "No body found"
-                })
-            }
-        
-        start_date = datetime.strptime(dict_body["start_date"],"%Y-%m-%d").date()
-        end_date = datetime.strptime(dict_body["end_date"],"%Y-%m-%d").date()
-
-        # DBからカレンダー情報を取得して、ユーザー名を付加して、json形式で返す
-        result = get_calendar(start_date, end_date, user_id, secret_id, region_name, rds_host, rds_database)
-        result_dict = {"username": user_name, "data": result}
-
-        return {
-            "statusCode": 200,
-            "headers": {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "Content-Type,Authorization",
-            "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-            },
-            "body" : json.dumps({
-                "status": "success",
-                "message": result_dict
-            }, ensure_ascii=False)
-        }
+def query_calendar(conn, cur, start_date, end_date, user_id, mode):
+    if mode == "sql":
+        with column_cursor(conn) as column_cur:
+            return get_calendar_sql(column_cur, start_date, end_date, user_id)
+    if mode == "index":
+        return get_calendar_index(cur, start_date, end_date, user_id)
+    return get_calendar_python(cur, start_date, end_date, user_id)
+
+
+def get_calendar_python(cur, start_date, end_date, user_id):
+    sql = """
+    SELECT t1.`date`,t1.`weekday`,t3.`holiday_name`,t2.`event_name`
+    FROM calendar_m t1
+    LEFT OUTER JOIN ( select `date`, `event_name` from event_t where `user_id` = %s ) t2
+    ON t1.`date`=t2.`date`
+    LEFT OUTER JOIN holiday_m t3
+    ON t1.`date`=t3.`date`
+    where t1.`date` between %s and %s
+    ORDER BY t1.`date`,t2.`event_name`
+    """
+    cur.execute(sql,(user_id, start_date, end_date))
+    rows = cur.fetchall()
+    # 同日にeventが複数ある場合の対応
+    # "date","weekday","holiday_name"をKEYにして（これは一意となる前提）、
+    # eventをリストで持つ辞書を要素とする、リストを作る
+    # （補足）各レコードについて、（日付、曜日、祝日名）のセットをキーとし、予定を値とした、作業用辞書を作る
+    # 値は、listなので、同じキーがあった場合は、値のリストにappendしていく
+    # また、defaultdictなので、キーを予め作って置かなくても、エラーにならない
+    # その後、キーを元の３つに分けて、要素名をつけたリストに作り直す（結果をjson形式で返すため）
+    temp_dict = defaultdict(list)
+    for date,weekday,holiday_name,event in rows:
+        temp_dict[(date.strftime("%Y-%m-%d"),weekday,holiday_name)].append(event)
+    result_list = [
+        {"date": date, "weekday": weekday, "holiday_name": holiday_name,"events": event} 
+        for (date,weekday,holiday_name),event in temp_dict.items()
+    ] 
+    return result_list
+
+
+# 日付ごとの枠（日付、曜日、祝日名）は祝日インデックスから作り、DBからは予定名だけを取得する
+# event_tの検索は(user_id, date, event_name)のインデックスだけで完結し、calendar_m・holiday_mとのJOINは行わない
+def get_calendar_index(cur, start_date, end_date, user_id):
+    index = get_holiday_index(cur)
+    sql = """
+    SELECT `date`, `event_name` FROM event_t
+    WHERE `user_id` = %s and `date` between %s and %s
+    ORDER BY `date`, `event_name`
+    """
+    cur.execute(sql, (user_id, start_date, end_date))
+    events = defaultdict(list)
+    for date, event_name in cur.fetchall():
+        events[date].append(event_name)
+    # 予定がない日は、pythonモードと同じく [None] とする
+    return [
+        {"date": day.strftime("%Y-%m-%d"), "weekday": weekday, "holiday_name": holiday_name, "events": events.get(day) or [None]}
+        for day, weekday, holiday_name in index.days(start_date, end_date)
+    ]
+
+
+# 日付ごとの予定名をSQL側でJSON配列にまとめて取得する（1日1行）
+# MySQL 8.0のJSON_ARRAYAGGはORDER BYを指定できないため、
+# JSON_QUOTEした予定名をGROUP_CONCAT(... ORDER BY ...)で連結してJSON配列の文字列を作る
+# GROUP_CONCATの最大長（デフォルト1024バイト）は、SET_VARヒントでこのクエリに限り拡張する
+def get_calendar_sql(cur, start_date, end_date, user_id):
+    sql = """
+    SELECT /*+ SET_VAR(group_concat_max_len = 1048576) */
+    DATE_FORMAT(t1.`date`, '%%Y-%%m-%%d'), t1.`weekday`, t3.`holiday_name`,
+    CONCAT('[', GROUP_CONCAT(JSON_QUOTE(t2.`event_name`) ORDER BY t2.`event_name` SEPARATOR ','), ']')
+    FROM calendar_m t1
+    LEFT OUTER JOIN event_t t2
+    ON t1.`date` = t2.`date` and t2.`user_id` = %s
+    LEFT OUTER JOIN holiday_m t3
+    ON t1.`date` = t3.`date`
+    where t1.`date` between %s and %s
+    GROUP BY t1.`date`, t1.`weekday`, t3.`holiday_name`
+    ORDER BY t1.`date`
+    """
+    cur.execute(sql,(user_id, start_date, end_date))
+    # 1日1行なので、そのままレスポンスの辞書にする（予定名のJSON配列だけ列ごとにデコードする）
+    return cur.to_records(["date", "weekday", "holiday_name", "events"], converters = {"events": parse_events})
+
+
+# 予定がない日は、pythonモードと同じく [None] とする
+def parse_events(events):
+    return json.loads(events) if events else [None]
+
+
+# 日ごとの辞書のリストを、キーを繰り返さない形式（format=compact）にする
+# 日付は start_date からの日数（offset）、曜日は weekday_names の添字（first_weekday から1日ごとに1つ進む）で表し、
+# 祝日と予定は、ある日だけを [offset, 値] のリストにする（予定がない日は含めない）
+# calendar_mに登録されていない日は日ごとのリストから抜けるため、start_dateから最終日までの日数を days とし、
+# 抜けている日の offset を missing に入れる（抜けがなければ空のリスト）
+def to_compact(days):
+    start_date = date.fromisoformat(days[0]["date"]) if days else None
+    holidays = []
+    events = []
+    missing = []
+    span = 0
+    for day in days:
+        offset = (date.fromisoformat(day["date"]) - start_date).days
+        missing.extend(range(span, offset))
+        span = offset + 1
+        if day["holiday_name"]:
+            holidays.append([offset, day["holiday_name"]])
+        if day["events"] != [None]:
+            events.append([offset, day["events"]])
+    return {
+        "start_date": days[0]["date"] if days else None,
+        "days": span,
+        "missing": missing,
+        "weekday_names": WEEKDAY_NAMES,
+        "first_weekday": WEEKDAY_NAMES.index(days[0]["weekday"]) if days else None,
+        "holidays": holidays,
+        "events": events,
+    }
+
+
+@api_handler(params = "query", required = {"start_date": "No start_date found", "end_date": "No end_date found"})
+def lambda_handler(request):
+    start_date = parse_date(request.params["start_date"], "start_date")
+    end_date = parse_date(request.params["end_date"], "end_date")
+    response_format = request.params.get("format") or "days"
+    if response_format not in ("days", "compact"):
+        raise ApiError("Invalid format")
+
+    # 形式ごとに別のETagにする
+    check_etag = request.check_etag
+    if response_format == "compact":
+        check_etag = lambda etag: request.check_etag(make_etag(etag, response_format))
+
+    # DBからカレンダー情報を取得して、ユーザー名を付加して返す
+    config = request.config
+    result = get_calendar(start_date, end_date, request.user_id, config["secret_id"], config["region_name"], config["rds_host"], config["rds_database"], check_etag = check_etag)
+    if response_format == "compact":
+        result = to_compact(result)
+    return {"username": request.user_name, "data": result}
 
-    except Exception as e:
-        logger.error(f"Error occurred: {e}")
-        return {
-            "statusCode": 500,
-            "headers": {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "Content-Type,Authorization",
-            "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-            },
-            "body" : json.dumps({
-                "status": "error",
-                "message": "Internal server error"
-            }, ensure_ascii=False)
-        }
 
 # ローカルテスト用
 if __name__ == "__main__":
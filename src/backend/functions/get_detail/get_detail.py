@@ -3,123 +3,126 @@ import boto3
 import pymysql
 from datetime import date,datetime,timedelta
 
-from mypackage.user_utils import get_userinfo
+from mypackage.api import api_handler, ApiError, NotModified, parse_date, make_etag
 from mypackage.logging_utils import get_logger
-from mypackage.ssm_utils import get_rdsinfo
-from mypackage.secret_utils import get_secret
+from mypackage.db import db_connection, column_cursor, in_list
+from mypackage.calendar_cache import get_user_revision
 
 # ロガー設定　
 logger = get_logger()
 
-# 指定日の予定と予定詳細を取得
-def get_detail(date, user_id, secret_id, region_name, rds_host, rds_database):
-    secret = get_secret(secret_id, region_name)
+# 複数日の指定（start_date/end_date、dates）で取得できる最大日数
+GET_DETAIL_MAX_DAYS = 31
+# 予定1件分のキー
+DETAIL_KEYS = ["event_id", "date", "event_name", "event_detail"]
+
+# 日付をYYYY-MM-DD形式の文字列にする
+def format_date(value):
+    return value.strftime("%Y-%m-%d")
+
+
+# 内容（ユーザーの予定）のETagを作り、check_etagに渡す
+# 変更がない場合は、check_etagがNotModifiedを送出するので、予定は取得しない
+# kind: レスポンスの形式（1日分のリストか、日付ごとの辞書か）
+def check_revision(cur, check_etag, kind, user_id, dates):
+    if check_etag:
+        check_etag(make_etag(kind, user_id, ",".join(format_date(d) for d in dates), get_user_revision(cur, user_id)))
+
+
+# 指定日（date型）の予定と予定詳細を取得
+def get_detail(date, user_id, secret_id, region_name, rds_host, rds_database, check_etag = None):
     try:
-        with pymysql.connect(
-            host = rds_host,
-            user = secret["username"],
-            password = secret["password"],
-            database = rds_database,
-            charset = "utf8mb4",
-            connect_timeout = 5
-        ) as conn:
-            with conn.cursor() as cur:
-                date = datetime.strptime(date,"%Y-%m-%d").date()
+        with db_connection(rds_host, rds_database, secret_id, region_name) as conn:
+            with column_cursor(conn) as cur:
+                check_revision(cur, check_etag, "detail", user_id, [date])
                 sql = """
                 SELECT `event_id`,`date`,`event_name`,`event_detail` FROM event_t
                 WHERE `date`= %s and `user_id` = %s
                 ORDER BY `event_id`
                 """
                 cur.execute(sql,(date, user_id))
-                rows = cur.fetchall()
                 # result = [[row[0], datetime.strftime(row[1],"%Y-%m-%d"), row[2], row[3]] for row in rows ]
-                rows_dict = [{"event_id": row[0], "date": datetime.strftime(row[1],"%Y-%m-%d"), "event_name": row[2], "event_detail": row[3]} for row in rows ]
+                # 日付は列ごとにまとめて文字列（YYYY-MM-DD）に変換する
+                rows_dict = cur.to_records(DETAIL_KEYS, converters = {"date": format_date})
                 logger.debug(rows_dict)
                 return rows_dict
 
+    except NotModified:
+        raise
+
     except Exception as e:
         logger.error(f"Error in get_detail: {e}")
         raise
 
-def lambda_handler(event,context):
+# 複数日の予定と予定詳細を1回のクエリで取得し、日付（YYYY-MM-DD）ごとのリストにして返す
+# dates: date型のリスト（昇順、重複なし）。予定のない日は空のリストになる
+def get_details(dates, user_id, secret_id, region_name, rds_host, rds_database, check_etag = None):
+    # 連続した日付はBETWEEN、それ以外はINで、(user_id, date, event_name)のインデックスを範囲検索する
+    if (dates[-1] - dates[0]).days + 1 == len(dates):
+        condition = "`date` BETWEEN %s AND %s"
+        args = [user_id, dates[0], dates[-1]]
+    else:
+        placeholders, args = in_list(dates, GET_DETAIL_MAX_DAYS)
+        condition = f"`date` IN ({placeholders})"
+        args = [user_id] + args
     try:
-        # SSMパラメータストアからSecretsManager情報、RDS情報を取得
-        logger.debug("Retrieving SSM parameters ...")
-        secret_id = get_rdsinfo("/my_schedule_app/secret_id")
-        region_name = get_rdsinfo("/my_schedule_app/region_name")
-        rds_host  = get_rdsinfo("/my_schedule_app/rds_host")
-        rds_database = get_rdsinfo("/my_schedule_app/rds_database")
-
-        # ユーザー情報を取得 user_idが空の場合はエラーを返す
-        userinfo = get_userinfo(event)
-        user_id = userinfo["user_id"]
-        user_name = userinfo["user_name"]
-        if not user_id:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                        "status" : "error",
-                        "message" :"No user_id"
-                    })
-            }
-
-        # GETパラメータを取得　空の場合はエラーを返す
-        logger.debug(f"event: {event}")
-        date = event.get("queryStringParameters",{}).get("date")
-        # date = event.get("date",{})
-        logger.debug(f"date: {date}")
-        if not date:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                        "status" : "error",
-                        "message" :"No date found"
-                    })
-            }
-
-        # その日の予定一覧を取得して返す
-        result = get_detail(date, user_id, secret_id, region_name, rds_host, rds_database)
-        result_dict = {"username": user_name , "data": result}
-        return {
-            "statusCode": 200,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-            },
-            "body": json.dumps({
-                    "status": "success",
-                    "message": result_dict
-                }, ensure_ascii = False)
-        }
+        with db_connection(rds_host, rds_database, secret_id, region_name) as conn:
+            with column_cursor(conn) as cur:
+                check_revision(cur, check_etag, "details", user_id, dates)
+                sql = f"""
+                SELECT `event_id`,`date`,`event_name`,`event_detail` FROM event_t
+                WHERE `user_id` = %s AND {condition}
+                ORDER BY `date`, `event_id`
+                """
+                cur.execute(sql, args)
+                records = cur.to_records(DETAIL_KEYS, converters = {"date": format_date})
+
+    except NotModified:
+        raise
+
     except Exception as e:
-        logger.error(f"Error occurred: {e}" )
-        return {
-            "statusCode": 500,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-            },
-            "body": json.dumps({
-                "status": "error",
-                "message": "Internal server error"
-            }, ensure_ascii = False)
-        }
+        logger.error(f"Error in get_details: {e}")
+        raise
+
+    # to_recordsで作った辞書を、作り直さずにそのまま日付ごとのリストに振り分ける
+    result = {format_date(d): [] for d in dates}
+    for record in records:
+        result[record["date"]].append(record)
+    return result
+
+
+# start_date/end_date（両端を含む）、またはカンマ区切りのdatesから、取得する日付のリストを作る
+def parse_dates(params):
+    if params.get("dates"):
+        dates = sorted({parse_date(value.strip(), "dates") for value in params["dates"].split(",")})
+    elif params.get("start_date") and params.get("end_date"):
+        start_date = parse_date(params["start_date"], "start_date")
+        end_date = parse_date(params["end_date"], "end_date")
+        if start_date > end_date:
+            raise ApiError("Invalid date range")
+        if (end_date - start_date).days >= GET_DETAIL_MAX_DAYS:
+            raise ApiError(f"Too many dates (max {GET_DETAIL_MAX_DAYS})")
+        dates = [start_date + timedelta(days = i) for i in range((end_date - start_date).days + 1)]
+    else:
+        raise ApiError("No date found")
+    if len(dates) > GET_DETAIL_MAX_DAYS:
+        raise ApiError(f"Too many dates (max {GET_DETAIL_MAX_DAYS})")
+    return dates
+
+
+@api_handler(params = "query")
+def lambda_handler(request):
+    config = request.config
+    # dateの指定がある場合は、その日の予定一覧を取得して返す
+    if request.params.get("date"):
+        date = parse_date(request.params["date"], "date")
+        result = get_detail(date, request.user_id, config["secret_id"], config["region_name"], config["rds_host"], config["rds_database"], request.check_etag)
+        return {"username": request.user_name, "data": result}
+
+    # 複数日の場合は、日付ごとの予定一覧を返す
+    dates = parse_dates(request.params)
+    result = get_details(dates, request.user_id, config["secret_id"], config["region_name"], config["rds_host"], config["rds_database"], request.check_etag)
+    return {"username": request.user_name, "data": result}
 
 
 if __name__ == "__main__":
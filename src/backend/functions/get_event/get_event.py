@@ -4,29 +4,27 @@ import boto3
 import pymysql
 from datetime import date,datetime,timedelta
 # カスタムモジュール読み込み
-from mypackage.user_utils import get_userinfo
+from mypackage.api import api_handler, ApiError, parse_event_id
 from mypackage.logging_utils import get_logger
-from mypackage.ssm_utils import get_rdsinfo
-from mypackage.secret_utils import get_secret
+from mypackage.db import db_connection, column_cursor, in_list
 
 # ロガー設定
 logger = get_logger()
 
-# 指定されたevent_idの予定と予定詳細を取得
+# event_idsで1回に取得できる最大件数
+GET_EVENT_MAX_IDS = 100
+
+
+# 日付をYYYY-MM-DD形式の文字列にする
+def format_date(value):
+    return value.strftime("%Y-%m-%d")
+
+# 指定されたevent_id（整数）の予定と予定詳細を取得
 def get_event(event_id, user_id, secret_id, region_name, rds_host, rds_database):
     try:
         logger.debug("Calling get_secret")
-        secret = get_secret(secret_id, region_name)
-        with pymysql.connect(
-            host = rds_host,
-            user = secret["username"],
-            password = secret["password"],
-            database = rds_database,
-            charset = "utf8mb4",
-            connect_timeout = 5
-        ) as conn:
+        with db_connection(rds_host, rds_database, secret_id, region_name) as conn:
             with conn.cursor() as cur:
-                event_id = int(event_id)
                 sql = """
                 SELECT `event_id`,`date`,`event_name`,`event_detail` FROM event_t 
                 WHERE `event_id` = %s and `user_id` = %s
@@ -45,90 +43,62 @@ def get_event(event_id, user_id, secret_id, region_name, rds_host, rds_database)
         logger.error("Error occurrd in get_event")
         raise
 
-def lambda_handler(event,context):
+# 指定された複数のevent_idの予定と予定詳細を1回のクエリで取得する
+# 戻り値は、event_id（文字列）をキーとする予定の辞書と、見つからなかったevent_idのリスト
+def get_events(event_ids, user_id, secret_id, region_name, rds_host, rds_database):
     try:
-        # SSMパラメータストアからSecretsManager情報、RDS情報を取得
-        logger.debug("Retrieving SSM parameters ...")
-        secret_id = get_rdsinfo("/my_schedule_app/secret_id")
-        region_name = get_rdsinfo("/my_schedule_app/region_name")
-        rds_host  = get_rdsinfo("/my_schedule_app/rds_host")
-        rds_database = get_rdsinfo("/my_schedule_app/rds_database")
-
-        # ユーザー情報を取得 user_idが空の場合はエラーを返す
-        userinfo = get_userinfo(event)
-        user_id = userinfo["user_id"]
-        user_name = userinfo["user_name"]
-        if not user_id:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                    "status": "error",
-                    "message": "No user_id"
-                }, ensure_ascii = False)  
-            }
-
-        # GETパラメータから、event_idを取得する
-        logger.debug("Getting paramater event_id")
-        event_id = event.get("event_id")
-        event_id = event.get("queryStringParameters",{}).get("event_id")
-        # event_idがなければ、400エラーを返す
-        if not event_id:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                    "status": "error",
-                    "message": "No event_id"
-                }, ensure_ascii = False)  
-            }
-        
-        logger.debug("Calling get_event")
-        result = get_event(event_id, user_id, secret_id, region_name, rds_host, rds_database)
-        result_dict = {
-            "username": user_name,
-            "data": result
-        }
-        return {
-            "statusCode": 200,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-            },
-            "body": json.dumps({
-                "status": "success",
-                "message": result_dict
-
-            }, ensure_ascii = False)
-        }
+        with db_connection(rds_host, rds_database, secret_id, region_name) as conn:
+            with column_cursor(conn) as cur:
+                placeholders, args = in_list(event_ids, GET_EVENT_MAX_IDS)
+                sql = f"""
+                SELECT `event_id`,`date`,`event_name`,`event_detail` FROM event_t
+                WHERE `event_id` IN ({placeholders}) and `user_id` = %s
+                """
+                cur.execute(sql, (*args, user_id))
+                records = cur.to_records(["event_id", "date", "event_name", "event_detail"], converters = {"date": format_date})
 
     except Exception as e:
-        logging.error(f"Error occurred: {e}")
-        return {
-            "statusCode": 500,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-            },
-            "body": json.dumps({
-                "status": "error",
-                "message": "Internal server error"
-            },ensure_ascii = False)
-        }
+        logger.error("Error occurrd in get_events")
+        raise
+
+    found = {record["event_id"]: record for record in records}
+    # 指定された順に並べる（JSONのキーは文字列になる）
+    events = {str(event_id): found[event_id] for event_id in event_ids if event_id in found}
+    missing = [event_id for event_id in event_ids if event_id not in found]
+    if missing:
+        logger.debug(f"Couldn't find event_ids {missing}")
+    return {"events": events, "missing": missing}
+
+
+# カンマ区切りのevent_idsを、重複を除いた整数のリストにする（指定された順を保つ）
+def parse_event_ids(value):
+    event_ids = []
+    seen = set()
+    for item in value.split(","):
+        event_id = parse_event_id(item, "event_ids")
+        if event_id not in seen:
+            seen.add(event_id)
+            event_ids.append(event_id)
+    if len(event_ids) > GET_EVENT_MAX_IDS:
+        raise ApiError(f"Too many event_ids (max {GET_EVENT_MAX_IDS})")
+    return event_ids
+
+
+@api_handler(params = "query")
+def lambda_handler(request):
+    logger.debug("Calling get_event")
+    config = request.config
+    # event_ids（カンマ区切り）が指定された場合は、まとめて取得する
+    if request.params.get("event_ids"):
+        event_ids = parse_event_ids(request.params["event_ids"])
+        result = get_events(event_ids, request.user_id, config["secret_id"], config["region_name"], config["rds_host"], config["rds_database"])
+        return {"username": request.user_name, "data": result}
+
+    if not request.params.get("event_id"):
+        raise ApiError("No event_id")
+    event_id = parse_event_id(request.params["event_id"])
+    result = get_event(event_id, request.user_id, config["secret_id"], config["region_name"], config["rds_host"], config["rds_database"])
+    return {"username": request.user_name, "data": result}
 
 
 if __name__ == "__main__":
@@ -5,18 +5,110 @@ import boto3
 import json
 import calendar
 import csv
+import time
+import hashlib
+import codecs
+import itertools
 
 # カスタムモジュール読み込み
 from mypackage.user_utils import get_userinfo
-from mypackage.ssm_utils import get_rdsinfo
+from mypackage.ssm_utils import get_config
 from mypackage.logging_utils import get_logger
 from mypackage.secret_utils import get_secret
+from mypackage.holiday_index import WEEKDAY_NAMES
 
 # ロガー設定
 logger = get_logger()
 
+# スキーマのマイグレーション定義（versionの昇順に適用する）
+# check: 適用済みかどうかを確認するSQL（1件以上あれば適用済みとみなし、statementsは実行しない）
+# statements: 適用するSQL
+MIGRATIONS = [
+    {
+        "version": 1,
+        "description": "event_tに(user_id, date, event_name)のカバリングインデックスを追加",
+        "check": """
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'event_t' AND index_name = 'idx_event_t_user_date_name'
+            LIMIT 1
+        """,
+        "statements": [
+            "CREATE INDEX `idx_event_t_user_date_name` ON `event_t` (`user_id`, `date`, `event_name`)",
+        ],
+    },
+    {
+        "version": 2,
+        "description": "祝日情報CSVの取込履歴テーブルを追加し、update_holiday_mプロシージャを削除",
+        "check": """
+            SELECT 1 FROM information_schema.tables
+            WHERE table_schema = DATABASE() AND table_name = 'holiday_import_t'
+            LIMIT 1
+        """,
+        "statements": [
+            """
+            CREATE TABLE `holiday_import_t` (
+                `object_key` VARCHAR(200) NOT NULL COLLATE 'utf8mb4_0900_ai_ci',
+                `etag` VARCHAR(200) NOT NULL DEFAULT '' COLLATE 'utf8mb4_0900_ai_ci',
+                `sha256` CHAR(64) NOT NULL DEFAULT '' COLLATE 'utf8mb4_0900_ai_ci',
+                `row_count` INT NOT NULL DEFAULT 0,
+                `imported_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (`object_key`) USING BTREE
+            )
+            COLLATE='utf8mb4_0900_ai_ci'
+            ENGINE=InnoDB
+            """,
+            "DROP PROCEDURE IF EXISTS `update_holiday_m`",
+        ],
+    },
+    {
+        "version": 3,
+        "description": "カレンダーのキャッシュ用に、ユーザーごとの予定の更新回数テーブルを追加",
+        "check": """
+            SELECT 1 FROM information_schema.tables
+            WHERE table_schema = DATABASE() AND table_name = 'user_revision_t'
+            LIMIT 1
+        """,
+        "statements": [
+            """
+            CREATE TABLE `user_revision_t` (
+                `user_id` VARCHAR(200) NOT NULL COLLATE 'utf8mb4_0900_ai_ci',
+                `revision` BIGINT UNSIGNED NOT NULL DEFAULT 0,
+                PRIMARY KEY (`user_id`) USING BTREE
+            )
+            COLLATE='utf8mb4_0900_ai_ci'
+            ENGINE=InnoDB
+            """,
+        ],
+    },
+]
+
+# 祝日データ取込の設定
+HOLIDAY_IMPORT_BATCH_SIZE = 1000
+# S3から1回に読み込むバイト数
+HOLIDAY_STREAM_CHUNK_SIZE = 64 * 1024
+HOLIDAY_NAME_MAX_LENGTH = 50
+# LOAD DATA LOCAL INFILEで指定するファイル名（実ファイルではなく、Connectionに登録したデータを送る）
+LOAD_DATA_FILENAME = "holiday-data.tsv"
+# LOCAL INFILEがサーバ側で無効な場合のエラー（ER_NOT_ALLOWED_COMMAND, ER_CLIENT_LOCAL_FILES_DISABLED）
+LOCAL_INFILE_DISABLED_ERRORS = (1148, 3948)
+
+class HashingReader:
+    """read()したデータのSHA-256を計算しながら、元のストリームを読む"""
+
+    def __init__(self, body):
+        self.body = body
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size = -1):
+        chunk = self.body.read(size)
+        self.sha256.update(chunk)
+        return chunk
+
+    def hexdigest(self):
+        return self.sha256.hexdigest()
+
 class InitDbBatch:
-    def __init__(self, host, user, password, database, start_date, end_date, bucket_name, object_key, download_dir):
+    def __init__(self, host, user, password, database, start_date, end_date, bucket_name, object_key, dry_run = False, dateinfo_mode = "executemany", holiday_import_mode = "load_data"):
         self.host = host
         self.user = user
         self.password = password
@@ -25,7 +117,12 @@ class InitDbBatch:
         self.end_date = end_date
         self.bucket_name = bucket_name
         self.object_key = object_key
-        self.local_path = f"{download_dir}/{object_key}"
+        # Trueの場合、マイグレーションは実行せず、適用予定のSQLを出力するだけにする
+        self.dry_run = dry_run
+        # 日付データの生成方法（"executemany" または "cte"）
+        self.dateinfo_mode = dateinfo_mode
+        # 祝日データの取込方法（"load_data" または "executemany"）
+        self.holiday_import_mode = holiday_import_mode
         # Connectionオブジェクトの初期化
         self.conn = None
 
@@ -36,7 +133,9 @@ class InitDbBatch:
             password = self.password,
             database = self.database,
             charset = "utf8mb4",
-            connect_timeout = 5
+            connect_timeout = 5,
+            # LOAD DATA LOCAL INFILEでは、set_local_infile_sourceで登録したデータだけを送る（ローカルのファイルは読まない）
+            local_infile = "sources" if self.holiday_import_mode == "load_data" else False
         )
     
     def create_tables(self):
@@ -83,7 +182,70 @@ class InitDbBatch:
             """
             cur.execute(sql)
 
-    # generate_dateinfoで日付と曜日の情報を生成しながら、calendar_mにinsertする
+    # マイグレーションの適用状況を記録するテーブル
+    def create_schema_version_table(self):
+        with self.conn.cursor() as cur:
+            sql = """
+            CREATE TABLE IF NOT EXISTS `schema_version` (
+                `version` INT NOT NULL,
+                `description` VARCHAR(200) NOT NULL DEFAULT '' COLLATE 'utf8mb4_0900_ai_ci',
+                `applied_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (`version`) USING BTREE
+            )
+            COLLATE='utf8mb4_0900_ai_ci'
+            ENGINE=InnoDB
+            """
+            cur.execute(sql)
+
+    # 適用済みの最新バージョン（schema_versionテーブルがなければ0）
+    def get_schema_version(self):
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = 'schema_version'")
+            if cur.fetchone()[0] == 0:
+                return 0
+            cur.execute("SELECT COALESCE(MAX(`version`), 0) FROM `schema_version`")
+            return cur.fetchone()[0]
+
+    # 未適用のマイグレーションを順に適用し、適用した（dry_runの場合は適用予定の）バージョンのリストを返す
+    # DDLは暗黙的にcommitされるため、1ステップずつschema_versionに記録してcommitする
+    def migrate(self, dry_run = False):
+        current_version = self.get_schema_version()
+        logger.info(f"現在のスキーマバージョン: {current_version}")
+        pending = [m for m in MIGRATIONS if m["version"] > current_version]
+        if not dry_run and pending:
+            self.create_schema_version_table()
+
+        applied = []
+        with self.conn.cursor() as cur:
+            for migration in sorted(pending, key = lambda m: m["version"]):
+                logger.info(f"マイグレーション {migration['version']}: {migration['description']}")
+                cur.execute(migration["check"])
+                if cur.fetchone():
+                    logger.info("適用済みのため、SQLの実行をスキップします")
+                    statements = []
+                else:
+                    statements = migration["statements"]
+
+                if dry_run:
+                    for sql in statements:
+                        logger.info(f"[dry-run] {sql}")
+                    applied.append(migration["version"])
+                    continue
+
+                for sql in statements:
+                    cur.execute(sql)
+                cur.execute(
+                    "INSERT INTO `schema_version` (`version`, `description`) VALUES (%s, %s)",
+                    (migration["version"], migration["description"])
+                )
+                self.conn.commit()
+                applied.append(migration["version"])
+        return applied
+
+    # 日付と曜日の情報をwk_calendarに投入し、calendar_mに反映する
+    # dateinfo_mode="executemany": generate_dateinfoで生成した行をexecutemanyで流し込む
+    #   （複数行INSERTに変換され、max_stmt_lengthごとにまとめて送信される）
+    # dateinfo_mode="cte": 再帰CTEでSQL側で日付と曜日を生成する（行データを送信しない）
     def insert_dateinfo(self, start_date, end_date):
         with self.conn.cursor() as cur:
             sql = """
@@ -98,11 +260,14 @@ class InitDbBatch:
             cur.execute(sql)
             cur.execute('truncate table wk_calendar')
             # workテーブルに生成した日付と曜日をinsertする
-            for row in self.generate_dateinfo(start_date, end_date):
-                sql="insert into wk_calendar (`date`, `weekday`) values (%s, %s)"
-                # logger.info("Inserting values {},{} ".format(row[0],row[1]))
-                # rowは、(日付,曜日)のタプル
-                cur.execute(sql, row)
+            # （executemanyは、行が0件のジェネレータを渡すとエラーになるため、期間が空の場合は何もしない）
+            if start_date <= end_date:
+                if self.dateinfo_mode == "cte":
+                    self.insert_dateinfo_cte(cur, start_date, end_date)
+                else:
+                    sql = "insert into wk_calendar (`date`, `weekday`) values (%s, %s)"
+                    # rowは、(日付,曜日)のタプル
+                    cur.executemany(sql, self.generate_dateinfo(start_date, end_date))
             # calendar_mに存在する日付情報をupdate
             sql = """
             update calendar_m as t1
@@ -122,10 +287,26 @@ class InitDbBatch:
             """
             cur.execute(sql)
 
+    # 再帰CTEで日付を生成し、曜日名はWEEKDAY()（月曜=0）で WEEKDAY_NAMES から引く
+    # 再帰の深さ上限（cte_max_recursion_depth、デフォルト1000）は、SET_VARヒントでこの文に限り引き上げる
+    def insert_dateinfo_cte(self, cur, start_date, end_date):
+        depth = (end_date - start_date).days + 1
+        weekday_names = ", ".join(f"'{name}'" for name in WEEKDAY_NAMES)
+        sql = f"""
+        INSERT /*+ SET_VAR(cte_max_recursion_depth = {depth}) */ INTO wk_calendar (`date`, `weekday`)
+        WITH RECURSIVE dates (`date`) AS (
+            SELECT CAST(%s AS DATE)
+            UNION ALL
+            SELECT `date` + INTERVAL 1 DAY FROM dates WHERE `date` < %s
+        )
+        SELECT `date`, ELT(WEEKDAY(`date`) + 1, {weekday_names}) FROM dates
+        """
+        cur.execute(sql, (start_date, end_date))
+
     # 日付と曜日の情報を生成する
     # ジェネレート関数として、ループ中に値を返す
     def generate_dateinfo(self, start_date, end_date):
-        weekday_name = ["月","火","水","木","金","土","日"]
+        weekday_name = WEEKDAY_NAMES
         wk_date = start_date
 
         while wk_date <= end_date:
@@ -135,16 +316,35 @@ class InitDbBatch:
             yield(wk_date_str,wk_weekday_name)
             wk_date += timedelta(days=1)
 
-    # 祝日情報CSVファイルをS3バケットからダウンロードする
-    def download_csv(self, bucket_name, object_key, local_path):
-        logger.info(f"バケット {bucket_name} から {object_key} を {local_path} にダウンロードします")
+    # 祝日情報CSVファイルをS3バケットから取得する
+    # /tmpにはダウンロードせず、get_objectのレスポンス（ETagと、StreamingBodyのBody）をそのまま返す
+    def open_holiday_csv(self, bucket_name, object_key):
+        logger.info(f"バケット {bucket_name} から {object_key} を読み込みます")
         client = boto3.client("s3")
-        client.download_file(bucket_name, object_key, local_path)
-        logger.info("CSVファイルのダウンロードに成功しました")
+        return client.get_object(Bucket = bucket_name, Key = object_key)
+
+    # Bodyをchunk_sizeバイトずつ読み、UTF-8を逐次デコードして1行ずつ返す
+    # （マルチバイト文字や改行がチャンクの境界をまたいでもよいように、インクリメンタルデコーダを使う）
+    def iter_csv_lines(self, body, chunk_size = HOLIDAY_STREAM_CHUNK_SIZE):
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        pending = ""
+        while True:
+            chunk = body.read(chunk_size)
+            if not chunk:
+                break
+            *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+            for line in lines:
+                yield line + "\n"
+        pending += decoder.decode(b"", final = True)
+        if pending:
+            yield pending
 
     # 祝日情報CSVファイルのデータを取込テーブルに入れる
-    # bulkインサートが良いのだろうけど、CSVファイルの行ごとにループを回す練習
-    def import_holiday_data(self, local_path):
+    # holiday_import_mode="load_data": LOAD DATA LOCAL INFILEで流し込む
+    #   （サーバ側でLOCAL INFILEが無効な場合は、executemanyにフォールバックする）
+    # holiday_import_mode="executemany": HOLIDAY_IMPORT_BATCH_SIZE行ずつ複数行INSERTで流し込む
+    # どちらの場合も、validate_holiday_rowsで検証した行だけを投入する
+    def import_holiday_data(self, body):
         with self.conn.cursor() as cur:
             sql = """
             CREATE TABLE IF NOT EXISTS `wk_holiday_calendar` (
@@ -160,51 +360,191 @@ class InitDbBatch:
             cur.execute(sql)
             sql = "truncate table `wk_holiday_calendar`"
             cur.execute(sql)
-            with open(local_path, newline="", encoding="utf-8") as f:
-                data = csv.reader(f)
-                next(data)
-                for row in data:
-                    sql = "INSERT INTO `wk_holiday_calendar` (`date`, `holiday_name`) VALUES (%s, %s);"
-                    cur.execute(sql, (row[0], row[1]))
-    
+
+        # 行はストリームから読んだ分だけ処理する（ファイル全体をメモリに載せない）
+        lines = self.iter_csv_lines(body)
+        if self.holiday_import_mode == "load_data":
+            try:
+                # LOCAL INFILEが無効な場合はデータ送信前にエラーとなるため、linesは未消費のままフォールバックできる
+                return self.load_holiday_data(lines)
+            except pymysql.err.OperationalError as e:
+                if e.args[0] not in LOCAL_INFILE_DISABLED_ERRORS:
+                    raise
+                logger.warning(f"LOAD DATA LOCAL INFILEが使えないため、executemanyで取り込みます: {e}")
+                self.conn.set_local_infile_source(LOAD_DATA_FILENAME, None)
+        return self.insert_holiday_data(lines)
+
+    # 検証済みの行をタブ区切りに変換して、LOAD DATA LOCAL INFILEで送信する
+    def load_holiday_data(self, lines):
+        rows = self.validate_holiday_rows(csv.reader(lines))
+        self.conn.set_local_infile_source(LOAD_DATA_FILENAME, self.encode_holiday_rows(rows))
+        with self.conn.cursor() as cur:
+            sql = f"""
+            LOAD DATA LOCAL INFILE '{LOAD_DATA_FILENAME}'
+            INTO TABLE `wk_holiday_calendar`
+            CHARACTER SET utf8mb4
+            FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+            LINES TERMINATED BY '\\n'
+            (`date`, `holiday_name`)
+            """
+            return cur.execute(sql)
+
+    # 検証済みの行を、一定行数ずつexecutemany（複数行INSERT）で投入する
+    def insert_holiday_data(self, lines):
+        sql = "INSERT INTO `wk_holiday_calendar` (`date`, `holiday_name`) VALUES (%s, %s)"
+        count = 0
+        rows = self.validate_holiday_rows(csv.reader(lines))
+        with self.conn.cursor() as cur:
+            for batch in self.iter_batches(rows, HOLIDAY_IMPORT_BATCH_SIZE):
+                count += cur.executemany(sql, batch)
+        return count
+
+    # CSVの各行を検証し、(日付, 祝日名)のタプルを返す（1行目はヘッダ）
+    def validate_holiday_rows(self, reader):
+        next(reader, None)
+        for line_no, row in enumerate(reader, start = 2):
+            # 空行は読み飛ばす
+            if not row:
+                continue
+            if len(row) < 2:
+                raise ValueError(f"祝日情報CSVの{line_no}行目: 列が不足しています {row}")
+            try:
+                holiday_date = datetime.strptime(row[0].strip(), "%Y-%m-%d").date()
+            except ValueError:
+                raise ValueError(f"祝日情報CSVの{line_no}行目: 日付が不正です {row[0]!r}")
+            holiday_name = row[1].strip()
+            if not holiday_name or len(holiday_name) > HOLIDAY_NAME_MAX_LENGTH:
+                raise ValueError(f"祝日情報CSVの{line_no}行目: 祝日名が不正です {row[1]!r}")
+            yield (holiday_date, holiday_name)
+
+    # LOAD DATAのデフォルト書式（タブ区切り、改行区切り、\でエスケープ）に変換する
+    def encode_holiday_rows(self, rows):
+        for holiday_date, holiday_name in rows:
+            holiday_name = holiday_name.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+            yield f"{holiday_date.isoformat()}\t{holiday_name}\n".encode("utf-8")
+
+    # イテラブルをsize件ずつのリストに分割する
+    def iter_batches(self, rows, size):
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, size))
+            if not batch:
+                return
+            yield batch
+
+    # 取込テーブルとholiday_mの差分だけを反映する（変更のない日付には触れない）
+    # 取込テーブルにない日付は、holiday_mから削除する
+    # 戻り値は、追加・更新・削除した件数
     def update_holiday_m(self):
         with self.conn.cursor() as cur:
-            # ストアドプロシージャ作成
-            sql = "DROP PROCEDURE IF EXISTS `update_holiday_m`;"
-            cur.execute(sql)
-            # （要検討）祝日の日付が変更になった場合への対応
+            # 取込テーブルから重複を削除（同じ日付が複数ある場合は、CSVで先に出現したものを採用）
+            cur.execute("DROP TEMPORARY TABLE IF EXISTS tmp_holiday")
             sql = """
-            CREATE PROCEDURE update_holiday_m()
-            BEGIN
-                -- テンポラリテーブルを作成
-                DROP TEMPORARY TABLE IF EXISTS tmp_holiday;
-                CREATE TEMPORARY TABLE tmp_holiday (
-                    `date` DATE,
-                    `name` VARCHAR(50)
-                );
-                -- 取込テーブルから重複を削除
-                INSERT INTO tmp_holiday (`date`,`name`)
-                SELECT DISTINCT `date`, holiday_name
-                FROM wk_holiday_calendar;
-                -- 取込テーブルをもとにholiday_mをupdate
-                UPDATE holiday_m t1
-                JOIN tmp_holiday t2
-                ON t1.`date` = t2.`date`
-                SET t1.holiday_name = t2.`name`
-                WHERE t1.holiday_name <> t2.`name`;
-                -- 取込テーブルにあって、holiday_mにないものをinsert
-                INSERT INTO holiday_m (`date`,`holiday_name`)
-                SELECT t2.`date`, t2.`name`
-                FROM tmp_holiday t2
-                LEFT JOIN holiday_m t1
-                ON t1.`date` = t2.`date`
-                WHERE t1.`date` IS NULL;
-            END
+            CREATE TEMPORARY TABLE tmp_holiday (
+                `date` DATE NOT NULL,
+                `name` VARCHAR(50) NOT NULL,
+                PRIMARY KEY (`date`)
+            )
             """
             cur.execute(sql)
-            # ストアドプロシージャの実行
-            sql = "CALL `update_holiday_m`();"
+            sql = """
+            INSERT IGNORE INTO tmp_holiday (`date`,`name`)
+            SELECT `date`, holiday_name
+            FROM wk_holiday_calendar
+            ORDER BY `id`
+            """
             cur.execute(sql)
+            # 取込テーブルにない日付をholiday_mから削除
+            sql = """
+            DELETE t1 FROM holiday_m t1
+            LEFT JOIN tmp_holiday t2
+            ON t1.`date` = t2.`date`
+            WHERE t2.`date` IS NULL
+            """
+            deleted = cur.execute(sql)
+            # 祝日名が変わったものをupdate
+            sql = """
+            UPDATE holiday_m t1
+            JOIN tmp_holiday t2
+            ON t1.`date` = t2.`date`
+            SET t1.holiday_name = t2.`name`
+            WHERE t1.holiday_name <> t2.`name`
+            """
+            updated = cur.execute(sql)
+            # 取込テーブルにあって、holiday_mにないものをinsert
+            sql = """
+            INSERT INTO holiday_m (`date`,`holiday_name`)
+            SELECT t2.`date`, t2.`name`
+            FROM tmp_holiday t2
+            LEFT JOIN holiday_m t1
+            ON t1.`date` = t2.`date`
+            WHERE t1.`date` IS NULL
+            """
+            inserted = cur.execute(sql)
+            cur.execute("DROP TEMPORARY TABLE IF EXISTS tmp_holiday")
+        return {"inserted": inserted, "updated": updated, "deleted": deleted}
+
+    # 前回取り込んだCSVの情報（ETag、SHA-256、行数）を取得する
+    def get_holiday_import_info(self, object_key):
+        with self.conn.cursor() as cur:
+            sql = "SELECT `etag`, `sha256`, `row_count` FROM `holiday_import_t` WHERE `object_key` = %s"
+            cur.execute(sql, (object_key,))
+            row = cur.fetchone()
+        if not row:
+            return None
+        return {"etag": row[0], "sha256": row[1], "row_count": row[2]}
+
+    def save_holiday_import_info(self, object_key, etag, sha256, row_count):
+        with self.conn.cursor() as cur:
+            sql = """
+            INSERT INTO `holiday_import_t` (`object_key`, `etag`, `sha256`, `row_count`)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+            `etag` = VALUES(`etag`), `sha256` = VALUES(`sha256`), `row_count` = VALUES(`row_count`), `imported_at` = CURRENT_TIMESTAMP
+            """
+            cur.execute(sql, (object_key, etag, sha256, row_count))
+
+    # 祝日情報CSVをholiday_mに同期する
+    # ETagが前回と同じ場合は、CSVを読まずに終了する
+    # ETagが変わっていても内容（SHA-256）が同じ場合は、holiday_mの更新を行わない
+    def sync_holiday_data(self, bucket_name, object_key):
+        result = {"skipped": False, "rows": 0, "inserted": 0, "updated": 0, "deleted": 0, "timings": {}}
+        previous = self.get_holiday_import_info(object_key)
+
+        res = self.open_holiday_csv(bucket_name, object_key)
+        etag = res["ETag"]
+        if previous and previous["etag"] == etag:
+            res["Body"].close()
+            logger.info("祝日情報CSVに変更がないため、取込をスキップします")
+            result.update(skipped = True, rows = previous["row_count"])
+            return result
+
+        logger.info("祝日情報データのインポート")
+        start = time.perf_counter()
+        body = HashingReader(res["Body"])
+        try:
+            rows = self.import_holiday_data(body)
+        finally:
+            res["Body"].close()
+        sha256 = body.hexdigest()
+        result["rows"] = rows
+        result["timings"]["import"] = round(time.perf_counter() - start, 3)
+
+        if previous and previous["sha256"] == sha256:
+            logger.info("祝日情報CSVの内容に変更がないため、祝日Mの更新をスキップします")
+            result["skipped"] = True
+        else:
+            # 空のCSVで祝日Mを全件削除してしまわないようにする
+            if rows == 0:
+                raise ValueError("祝日情報CSVにデータがありません")
+            logger.info("祝日Mの更新")
+            start = time.perf_counter()
+            result.update(self.update_holiday_m())
+            result["timings"]["update_holiday_m"] = round(time.perf_counter() - start, 3)
+
+        self.save_holiday_import_info(object_key, etag, sha256, rows)
+        logger.info(f"祝日情報の同期結果: {result}")
+        return result
 
     # 全体実行用
     def run(self):
@@ -213,20 +553,26 @@ class InitDbBatch:
             logger.info("DBに接続")
             self.connect_db()
 
+            if self.dry_run:
+                logger.info("マイグレーションの確認（dry-run）")
+                pending = self.migrate(dry_run = True)
+                return {
+                    "status": "success",
+                    "message": "dry-runのため、DBは変更していません",
+                    "pending_migrations": pending
+                }
+
             logger.info("初期テーブルの作成")
             self.create_tables()
 
+            logger.info("マイグレーションの実行")
+            applied_migrations = self.migrate()
+
             logger.info("カレンダーMへの日付データ投入")
             self.insert_dateinfo(self.start_date, self.end_date)
 
-            logger.info("祝日情報CSVのダウンロード")
-            self.download_csv(self.bucket_name, self.object_key, self.local_path)
-
-            logger.info("祝日情報データのインポート")
-            self.import_holiday_data(self.local_path)
-
-            logger.info("祝日Mの更新")
-            self.update_holiday_m()
+            logger.info("祝日情報の同期")
+            holiday_result = self.sync_holiday_data(self.bucket_name, self.object_key)
 
             # 最後にまとめてcommitして終了
             logger.info("コミット実行")
@@ -236,7 +582,9 @@ class InitDbBatch:
 
             return {
                 "status": "success",
-                "message": "DB初期化処理が正常に完了しました"
+                "message": "DB初期化処理が正常に完了しました",
+                "applied_migrations": applied_migrations,
+                "holiday": holiday_result
             }
         
         except Exception as e:
@@ -259,11 +607,12 @@ class InitDbBatch:
 
 def lambda_handler(event,context):
     # SSMパラメータストアから情報取得
-    secret_id = get_rdsinfo("/my_schedule_app/secret_id") 
-    region_name = get_rdsinfo("/my_schedule_app/region_name")
-    rds_host  = get_rdsinfo("/my_schedule_app/rds_host")
-    rds_database = get_rdsinfo("/my_schedule_app/rds_database")
-    bucket_name = get_rdsinfo("/my_schedule_app/data_bucket")
+    config = get_config()
+    secret_id = config["secret_id"]
+    region_name = config["region_name"]
+    rds_host = config["rds_host"]
+    rds_database = config["rds_database"]
+    bucket_name = config["data_bucket"]
 
     # SecretsManagerから情報取得
     secret = get_secret(secret_id, region_name)
@@ -278,8 +627,10 @@ def lambda_handler(event,context):
         "end_date": date.today() + timedelta(days=365),
         "bucket_name": bucket_name,
         "object_key": "holiday-data.csv",
-        # "download_dir": "tests/sandbox", # ローカル動作確認用
-        "download_dir": "/tmp", # 本番用
+        # {"dry_run": true} で呼び出した場合は、マイグレーション内容の確認のみ行う
+        "dry_run": bool((event or {}).get("dry_run", False)),
+        "dateinfo_mode": (event or {}).get("dateinfo_mode", "executemany"),
+        "holiday_import_mode": (event or {}).get("holiday_import_mode", "load_data"),
     }
 
     # 処理実行
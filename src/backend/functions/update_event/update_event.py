@@ -4,10 +4,10 @@ import logging
 import pymysql
 from datetime import date,datetime,timedelta
 
-from mypackage.user_utils import get_userinfo
+from mypackage.api import api_handler, ApiError
 from mypackage.logging_utils import get_logger
-from mypackage.secret_utils import get_secret
-from mypackage.ssm_utils import get_rdsinfo
+from mypackage.db import db_connection
+from mypackage.calendar_cache import bump_user_revision
 
 
 # ロガー設定
@@ -18,15 +18,7 @@ logger = get_logger()
 def update_event(event_id, date, event_name, event_detail, user_id, user_name, secret_id, region_name, rds_host, rds_database):
     try:
         logger.debug("Calling get_secret ...")
-        secret = get_secret(secret_id,region_name)
-        with pymysql.connect(
-            host = rds_host,
-            user = secret["username"],
-            password = secret["password"],
-            database = rds_database,
-            charset = "utf8mb4",
-            connect_timeout = 5
-        ) as conn:
+        with db_connection(rds_host, rds_database, secret_id, region_name) as conn:
             with conn.cursor() as cur:
                 # 日付の文字列を日付型に変換
                 date = datetime.strptime(date, "%Y-%m-%d").date()
@@ -41,6 +33,7 @@ def update_event(event_id, date, event_name, event_detail, user_id, user_name, s
                 cur.execute(sql,(date, event_name, event_detail, user_name, event_id, user_id))
                 if cur.rowcount == 1:
                     logger.debug("Successfully updated")
+                    bump_user_revision(cur, user_id)
                     conn.commit()
                     return True
                 else:
@@ -53,108 +46,15 @@ def update_event(event_id, date, event_name, event_detail, user_id, user_name, s
         raise
 
 
-def lambda_handler(event,context):
-    try:
-        # SSMパラメータストアからSecretsManager情報、RDS情報を取得
-        logger.debug("Retrieving SSM parameters ...")
-        secret_id = get_rdsinfo("/my_schedule_app/secret_id")
-        region_name = get_rdsinfo("/my_schedule_app/region_name")
-        rds_host  = get_rdsinfo("/my_schedule_app/rds_host")
-        rds_database = get_rdsinfo("/my_schedule_app/rds_database")
-
-        # ユーザー情報を取得 user_idが空の場合はエラーを返す
-        userinfo = get_userinfo(event)
-        user_id = userinfo["user_id"]
-        user_name = userinfo["user_name"]
-        if not user_id:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                    "status": "error",
-                    "message": "No user_id"
-                }, ensure_ascii = False)  
-            }
-
-        # 引数の取り出し
-        # lambda上では、bodyの中身はjson文字列　json.loadsしてdictに変換する
-        body = event.get("body", {})
-        body = json.loads(body)
-        event_id = body.get("event_id", "")
-        date = body.get("date", "")
-        event_name = body.get("event_name", "")
-        event_detail = body.get("event_detail", "")
-        # event_idがなければ、400エラーを返す
-        if not event_id:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                    "status": "error",
-                    "message": "No event_id"
-                }, ensure_ascii = False)  
-            }
-
-        logger.debug("Calling update_event ...")
-        result = update_event(event_id, date, event_name, event_detail, user_id, user_name, secret_id, region_name, rds_host, rds_database)
-        result_dict = {
-            "username": user_name,
-            "data": result
-        }
-        if result:
-            return {
-                "statusCode": 200,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                    "status": "success",
-                    "message": result_dict
-                },ensure_ascii = False)
-            }
-        else:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-                },
-                "body": json.dumps({
-                    "status": "error",
-                    "message": "No records updated"
-                },ensure_ascii = False)
-            }            
-
-    except Exception as e:
-        logger.debug(f"Error Occurred {e}")
-        return {
-            "statusCode": 500,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type,Authorization",
-                "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-            },
-            "body": json.dumps({
-                "status": "error",
-                "message": "Internal server error"
-            }, ensure_ascii = False)
-        }
+@api_handler(params = "body", required = {"event_id": "No event_id"})
+def lambda_handler(request):
+    body = request.params
+    logger.debug("Calling update_event ...")
+    config = request.config
+    result = update_event(body["event_id"], body.get("date", ""), body.get("event_name", ""), body.get("event_detail", ""), request.user_id, request.user_name, config["secret_id"], config["region_name"], config["rds_host"], config["rds_database"])
+    if not result:
+        raise ApiError("No records updated")
+    return {"username": request.user_name, "data": result}
 
 
 # ローカル確認用
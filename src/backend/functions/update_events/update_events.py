@@ -0,0 +1,152 @@
+import json
+
+from mypackage.api import api_handler, ApiError, parse_date, parse_event_id
+from mypackage.logging_utils import get_logger
+from mypackage.db import db_connection, in_list
+from mypackage.calendar_cache import bump_user_revision
+
+
+# ロガー設定
+logger = get_logger()
+
+# 1リクエストで更新できる予定の最大件数
+UPDATE_EVENTS_MAX = 100
+# event_t.event_nameの最大長（VARCHAR(200)）
+EVENT_NAME_MAX_LENGTH = 200
+# 更新できる列（指定されなかった列は変更しない）
+UPDATE_COLUMNS = ["date", "event_name", "event_detail"]
+
+
+# 1件分の変更内容を検証し、(event_id, {列名: 値}) を返す（不正な場合はApiError）
+def parse_update(item):
+    if not isinstance(item, dict):
+        raise ApiError("Invalid event")
+    event_id = parse_event_id(item.get("event_id"))
+
+    values = {}
+    if "date" in item:
+        values["date"] = parse_date(item["date"])
+    for name in ["event_name", "event_detail"]:
+        if name in item:
+            if not isinstance(item[name], str):
+                raise ApiError(f"Invalid {name}")
+            values[name] = item[name].strip()
+    if len(values.get("event_name", "")) > EVENT_NAME_MAX_LENGTH:
+        raise ApiError("event_name is too long")
+    if not values:
+        raise ApiError("Nothing to update")
+    return event_id, values
+
+
+# 変更内容をまとめて1つのUPDATE文にする
+# 列ごとに CASE `event_id` WHEN ... THEN ... ELSE 元の値 END で、予定ごとの値を設定する
+def build_update_sql(updates, user_id, user_name):
+    assignments = []
+    args = []
+    for column in UPDATE_COLUMNS:
+        whens = [(event_id, values[column]) for event_id, values in updates if column in values]
+        if not whens:
+            continue
+        assignments.append(f"`{column}` = CASE `event_id`" + " WHEN %s THEN %s" * len(whens) + f" ELSE `{column}` END")
+        for event_id, value in whens:
+            args += [event_id, value]
+    assignments.append("`user_name` = %s")
+    args.append(user_name)
+
+    event_ids = [event_id for event_id, _ in updates]
+    sql = f"UPDATE event_t SET {', '.join(assignments)} WHERE `user_id` = %s AND `event_id` IN ({','.join(['%s'] * len(event_ids))})"
+    args += [user_id] + event_ids
+    return sql, args
+
+
+# 指定した予定のうち、ユーザーの予定として存在するevent_idを返す（更新が終わるまで行をロックする）
+def lock_events(cur, event_ids, user_id):
+    placeholders, args = in_list(event_ids, UPDATE_EVENTS_MAX)
+    cur.execute(f"SELECT `event_id` FROM event_t WHERE `user_id` = %s AND `event_id` IN ({placeholders}) FOR UPDATE", [user_id] + args)
+    return {row[0] for row in cur.fetchall()}
+
+
+# calendar_mにある日付だけを返す（event_t.dateはcalendar_mの外部キーのため、それ以外の日付には移動できない）
+def find_calendar_dates(cur, dates):
+    placeholders, args = in_list(sorted(dates), UPDATE_EVENTS_MAX)
+    cur.execute(f"SELECT `date` FROM calendar_m WHERE `date` IN ({placeholders})", args)
+    return {row[0] for row in cur.fetchall()}
+
+
+# 複数の予定の変更を、1つのUPDATE文で1トランザクションとして適用する
+# 1件でも適用できない予定があれば、どの予定も更新しない
+# 戻り値は、適用したかどうかと、リクエストの順の各予定の結果
+def update_events(items, user_id, user_name, secret_id, region_name, rds_host, rds_database):
+    errors = {}
+    updates = []
+    seen = set()
+    for index, item in enumerate(items):
+        try:
+            event_id, values = parse_update(item)
+            if event_id in seen:
+                raise ApiError("Duplicate event_id")
+            seen.add(event_id)
+            updates.append((index, event_id, values))
+        except ApiError as e:
+            errors[index] = e.message
+
+    if not errors:
+        try:
+            with db_connection(rds_host, rds_database, secret_id, region_name) as conn:
+                with conn.cursor() as cur:
+                    found = lock_events(cur, [event_id for _, event_id, _ in updates], user_id)
+                    dates = {values["date"] for _, _, values in updates if "date" in values}
+                    calendar_dates = find_calendar_dates(cur, dates) if dates else set()
+                    for index, event_id, values in updates:
+                        if event_id not in found:
+                            errors[index] = "Not found"
+                        elif "date" in values and values["date"] not in calendar_dates:
+                            errors[index] = "Date out of range"
+
+                    if not errors:
+                        sql, args = build_update_sql([(event_id, values) for _, event_id, values in updates], user_id, user_name)
+                        cur.execute(sql, args)
+                        logger.debug(f"Updated {cur.rowcount} of {len(updates)} events")
+                        bump_user_revision(cur, user_id)
+                        conn.commit()
+                    else:
+                        conn.rollback()
+
+        except Exception as e:
+            logger.error(f"Error occured in update_events: {e}")
+            raise
+
+    applied = not errors
+    results = []
+    for index in range(len(items)):
+        if index in errors:
+            results.append({"index": index, "status": "error", "message": errors[index]})
+        elif applied:
+            results.append({"index": index, "status": "success"})
+        else:
+            results.append({"index": index, "status": "skipped", "message": "Not applied due to other errors"})
+    return applied, results
+
+
+@api_handler(params = "body", required = {"events": "No events found"})
+def lambda_handler(request):
+    items = request.params["events"]
+    config = request.config
+    if not isinstance(items, list):
+        raise ApiError("Invalid events")
+    if len(items) > UPDATE_EVENTS_MAX:
+        raise ApiError(f"Too many events (max {UPDATE_EVENTS_MAX})")
+    logger.debug("Calling update_events ...")
+    applied, results = update_events(items, request.user_id, request.user_name, config["secret_id"], config["region_name"], config["rds_host"], config["rds_database"])
+    return {"username": request.user_name, "data": {"applied": applied, "results": results}}
+
+
+# ローカル確認用
+if __name__ == "__main__":
+    # lambdaでは、bodyの中身はJSON文字列となる
+    body = {"events": [
+        {"event_id": 113, "date": "2025-12-21"},
+        {"event_id": 114, "date": "2025-12-22", "event_name": "サンプル予定"},
+    ]}
+    result = lambda_handler({"requestContext": {"authorizer": { "claims": {"sub":"77e4ba28-c0c1-70a1-b582-dba669f01e18","cognito:username":"dummyUserName"}}},"body": json.dumps(body, ensure_ascii = False)}, None)
+    print(result)
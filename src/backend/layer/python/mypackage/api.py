@@ -0,0 +1,279 @@
+import os
+import re
+import json
+import zlib
+import base64
+import hashlib
+import functools
+from datetime import datetime
+
+from mypackage.logging_utils import get_logger
+from mypackage.ssm_utils import get_config
+from mypackage.user_utils import get_userinfo
+
+logger = get_logger()
+
+# 全レスポンス共通のヘッダ（モジュール読み込み時に1回だけ作成し、使いまわす）
+RESPONSE_HEADERS = {
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "Content-Type,Authorization,If-None-Match",
+    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS",
+    # ブラウザのJavaScriptからETagを読めるようにする
+    "Access-Control-Expose-Headers": "ETag",
+    # Accept・Accept-Encodingによって、圧縮するかどうかが変わる
+    "Vary": "Accept, Accept-Encoding"
+}
+
+# レスポンスの本文（JSON）を圧縮する最小サイズ（バイト）。これより小さい本文はそのまま返す
+COMPRESSION_MIN_BYTES = int(os.environ.get("API_COMPRESSION_MIN_BYTES", "1024"))
+# zlibの圧縮レベル（1〜9）
+COMPRESSION_LEVEL = 6
+# API Gatewayのバイナリメディアタイプ（CDKのbinary_media_typesと合わせる）
+# API Gatewayは、リクエストのAcceptがこれに一致する場合だけ、base64の本文をバイナリに戻してクライアントに返す
+BINARY_MEDIA_TYPE = "application/json"
+# event_id（1以上の整数。先頭の0や全角・その他のUnicodeの数字は認めない）
+EVENT_ID_PATTERN = re.compile(r"[1-9][0-9]*")
+
+
+class ApiError(Exception):
+    """ハンドラ内で送出すると、そのままエラーレスポンス（デフォルト400）として返される"""
+
+    def __init__(self, message, status_code = 400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class NotModified(Exception):
+    """ApiRequest.check_etagで、クライアントが持っている内容から変わっていない場合に送出される（304を返す）"""
+
+    def __init__(self, etag):
+        super().__init__(etag)
+        self.etag = etag
+
+
+class ApiRequest:
+    """デコレータが組み立てて、各ハンドラに渡すリクエスト情報"""
+
+    def __init__(self, event, config, user_id, user_name, params):
+        self.event = event
+        self.config = config
+        self.user_id = user_id
+        self.user_name = user_name
+        self.params = params
+        # check_etagで設定すると、レスポンスにETagヘッダを付ける
+        self.etag = None
+        # 成功時のステータスコード（非同期の処理を受け付けた場合の202など、200以外を返す場合に設定する）
+        self.status_code = 200
+
+    def header(self, name):
+        return get_header(self.event, name)
+
+    # レスポンスのETagを設定し、If-None-Matchと一致する場合はNotModifiedを送出する
+    # 内容の取得・JSONへの変換の前に呼ぶことで、変更がない場合はそれらを行わずに304を返す
+    def check_etag(self, etag):
+        self.etag = etag
+        if_none_match = self.header("If-None-Match")
+        if not if_none_match:
+            return
+        # 弱いETag（W/）も含めて比較する
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or etag.removeprefix("W/") in tags:
+            raise NotModified(etag)
+
+
+# リクエストヘッダを取得する（ヘッダ名の大文字・小文字は区別しない）
+def get_header(event, name):
+    name = name.lower()
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+# レスポンスの本文の圧縮形式（"gzip"、"deflate"、または圧縮しない場合はNone）を選ぶ
+# API Gatewayがバイナリとして返せるリクエスト（AcceptがBINARY_MEDIA_TYPE）で、Accept-Encodingが許す場合だけ圧縮する
+def response_encoding(event):
+    accept = get_header(event, "Accept") or ""
+    if accept.split(",")[0].split(";")[0].strip().lower() != BINARY_MEDIA_TYPE:
+        return None
+    accepted = {}
+    for item in (get_header(event, "Accept-Encoding") or "").split(","):
+        name, _, params = item.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ["gzip", "deflate"]:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+# gzipはgzip形式、deflateはzlib形式（HTTPのContent-Encoding: deflate）で圧縮する
+def compress_body(data, encoding):
+    wbits = 31 if encoding == "gzip" else 15
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, wbits)
+    return compressor.compress(data) + compressor.flush()
+
+
+# 内容のバージョンを表す値（ユーザーID、期間、更新回数等）から、ETagを作る
+# JSONへの変換結果（gzip等のエンコード）は変わりうるため、弱いETagとする
+def make_etag(*parts):
+    digest = hashlib.sha256(":".join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+# encodingを指定すると、本文がCOMPRESSION_MIN_BYTES以上の場合は圧縮し、base64にして返す
+def build_response(status_code, status, message, headers = RESPONSE_HEADERS, encoding = None):
+    body = json.dumps({
+        "status": status,
+        "message": message
+    }, ensure_ascii = False)
+    if encoding:
+        data = body.encode()
+        if len(data) >= COMPRESSION_MIN_BYTES:
+            return {
+                "statusCode": status_code,
+                "headers": {**headers, "Content-Encoding": encoding},
+                "body": base64.b64encode(compress_body(data, encoding)).decode("ascii"),
+                "isBase64Encoded": True
+            }
+    return {
+        "statusCode": status_code,
+        "headers": headers,
+        "body": body
+    }
+
+
+def success_response(message, etag = None, encoding = None, status_code = 200):
+    if etag:
+        return build_response(status_code, "success", message, {**RESPONSE_HEADERS, "ETag": etag}, encoding)
+    return build_response(status_code, "success", message, encoding = encoding)
+
+
+# 変更がない場合は本文を返さない
+def not_modified_response(etag):
+    return {
+        "statusCode": 304,
+        "headers": {**RESPONSE_HEADERS, "ETag": etag},
+        "body": ""
+    }
+
+
+def error_response(message, status_code = 400):
+    return build_response(status_code, "error", message)
+
+
+# GETパラメータを取得（パラメータなしの場合、API Gatewayからは None が渡される）
+def parse_query(event):
+    return event.get("queryStringParameters") or {}
+
+
+# bodyの中身はjson文字列なのでjson.loadsでdictに変換する
+# Content-Typeがバイナリメディアタイプ（application/json）の場合、API Gatewayからはbase64で渡される
+def parse_body(event):
+    body = event.get("body")
+    if not body:
+        return {}
+    try:
+        if event.get("isBase64Encoded"):
+            body = base64.b64decode(body).decode("utf-8")
+        params = json.loads(body)
+    except ValueError:
+        raise ApiError("Invalid body")
+    if not isinstance(params, dict):
+        raise ApiError("Invalid body")
+    return params
+
+
+# 日付文字列（YYYY-MM-DD）をdate型に変換する
+def parse_date(value, name = "date"):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise ApiError(f"Invalid {name}")
+
+
+# event_id（文字列、またはJSONの整数）を整数に変換する
+# str.isdigit()は全角やその他のUnicodeの数字も受け付けてしまうため、ASCIIの数字だけを認める
+def parse_event_id(value, name = "event_id"):
+    if isinstance(value, int) and not isinstance(value, bool):
+        if value < 1:
+            raise ApiError(f"Invalid {name}")
+        return value
+    if not isinstance(value, str) or not EVENT_ID_PATTERN.fullmatch(value.strip()):
+        raise ApiError(f"Invalid {name}")
+    return int(value)
+
+
+# 各lambda_handlerに共通の処理（設定取得、ユーザー情報取得、パラメータ取得と検証、レスポンス作成）をまとめたデコレータ
+# params: パラメータの取得元（"query" または "body"）
+# required: 必須パラメータ名と、欠落時に返すエラーメッセージの辞書
+# デコレートされた関数は ApiRequest を受け取り、レスポンスの "message" にする値を返す
+# （request.check_etagを呼んだ場合は、ETagを付けるか、変更がなければ304を返す）
+def api_handler(params = "query", required = None):
+    parse_params = parse_body if params == "body" else parse_query
+    required = required or {}
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(event, context):
+            try:
+                # SSMパラメータストアからSecretsManager情報、RDS情報を取得
+                config = get_config()
+
+                # ユーザー情報を取得 user_idが空の場合はエラーを返す
+                userinfo = get_userinfo(event)
+                if not userinfo["user_id"]:
+                    return error_response("No user_id")
+
+                request_params = parse_params(event)
+                logger.debug(f"params: {request_params}")
+                for name, message in required.items():
+                    if not request_params.get(name):
+                        return error_response(message)
+
+                request = ApiRequest(event, config, userinfo["user_id"], userinfo["user_name"], request_params)
+                message = func(request)
+                return success_response(message, request.etag, response_encoding(event), request.status_code)
+
+            except NotModified as e:
+                return not_modified_response(e.etag)
+
+            except ApiError as e:
+                return error_response(e.message, e.status_code)
+
+            except Exception as e:
+                logger.error(f"Error occurred: {e}")
+                return error_response("Internal server error", 500)
+
+        return wrapper
+    return decorator
+
+
+# ハンドラ1回あたりのPython側の処理時間を計測する（SSM/DBは含まない）
+if __name__ == "__main__":
+    import time
+    import timeit
+    import logging
+    from mypackage import ssm_utils
+
+    logger.setLevel(logging.INFO)
+    ssm_utils._config_cache["values"] = {"secret_id": "", "region_name": "", "rds_host": "", "rds_database": ""}
+    ssm_utils._config_cache["fetched_at"] = time.monotonic()
+
+    @api_handler(params = "query", required = {"date": "No date found"})
+    def handler(request):
+        data = [{"event_id": i, "date": request.params["date"], "event_name": "テスト予定", "event_detail": ""} for i in range(5)]
+        return {"username": request.user_name, "data": data}
+
+    event = {"requestContext": {"authorizer": { "claims": {"sub":"77e4ba28-c0c1-70a1-b582-dba669f01e18","cognito:username":"dummyUserName"}}},"queryStringParameters": {"date":"2025-12-28"}}
+    number = 100000
+    seconds = timeit.timeit(lambda: handler(event, None), number = number)
+    print(f"handler overhead: {seconds / number * 1e6:.2f} us/request")
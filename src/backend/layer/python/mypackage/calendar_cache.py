@@ -0,0 +1,113 @@
+import os
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from mypackage.logging_utils import get_logger
+
+logger = get_logger()
+
+# コンテナ（プロセス）内に保持するカレンダーの合計日数（0の場合はキャッシュしない）
+# 1日分は500バイト程度のため、デフォルト（8192日。1か月分なら約260件）で数MBになる
+# 期間の長いカレンダーほど多くの枠を使うため、件数ではなく日数で上限を決める（メモリ128MBのLambdaでも使えるように）
+CALENDAR_CACHE_MAX_DAYS = int(os.environ.get("CALENDAR_CACHE_MAX_DAYS", "8192"))
+
+
+# ユーザーの予定の更新回数を1増やす（予定を追加・更新・削除するトランザクション内で、commitの前に呼ぶ）
+# 更新回数はキャッシュのキーに含まれるため、コミットされた時点で、そのユーザーの古いキャッシュは使われなくなる
+def bump_user_revision(cur, user_id):
+    sql = """
+    INSERT INTO user_revision_t (`user_id`, `revision`) VALUES (%s, 1)
+    ON DUPLICATE KEY UPDATE `revision` = `revision` + 1
+    """
+    cur.execute(sql, (user_id,))
+
+
+# ユーザーの予定の更新回数（1度も更新していない場合は0）
+def get_user_revision(cur, user_id):
+    cur.execute("SELECT `revision` FROM user_revision_t WHERE `user_id` = %s", (user_id,))
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+class CacheBackend(ABC):
+    """キャッシュの保存先のインターフェース
+
+    キーは文字列、値はJSONにできるオブジェクトとする（Redis等の外部のキャッシュでも実装できるように）
+    """
+
+    @abstractmethod
+    def get(self, key):
+        """キーに対応する値を返す（ない場合はNone）"""
+
+    @abstractmethod
+    def set(self, key, value):
+        """キーに値を保存する（保存するかどうか、いつまで保持するかは実装による）"""
+
+
+class LruCacheBackend(CacheBackend):
+    """コンテナ内のメモリに、最近使った順に合計max_days日分まで保持する（値は日ごとのリスト）"""
+
+    def __init__(self, max_days = CALENDAR_CACHE_MAX_DAYS):
+        self.max_days = max_days
+        self.days = 0
+        self._items = OrderedDict()
+
+    def get(self, key):
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        # 1件でmax_daysを超えるものは保持しない（他をすべて追い出さないように）
+        if len(value) > self.max_days:
+            return
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.days -= len(old)
+        self._items[key] = value
+        self.days += len(value)
+        while self.days > self.max_days:
+            _, evicted = self._items.popitem(last = False)
+            self.days -= len(evicted)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class CalendarCache:
+    """(user_id, start_date, end_date, ユーザーの更新回数) をキーに、カレンダーの取得結果をキャッシュする"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(user_id, start_date, end_date, revision):
+        return f"calendar:{user_id}:{start_date:%Y-%m-%d}:{end_date:%Y-%m-%d}:{revision}"
+
+    # キャッシュにあればそれを返し、なければload()で取得してキャッシュする
+    # 更新回数の取得とload()を同じトランザクション（同じスナップショット）で行うため、
+    # その更新回数の時点の内容だけがキャッシュされる
+    # revision: 呼び出し側で取得済みの更新回数（祝日等、ユーザーの予定以外のバージョンを含めてもよい）
+    def get_or_load(self, cur, user_id, start_date, end_date, load, revision = None):
+        if revision is None:
+            revision = get_user_revision(cur, user_id)
+        key = self.make_key(user_id, start_date, end_date, revision)
+        value = self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = load()
+        self.backend.set(key, value)
+        return value
+
+
+# コンテナ内で共有するキャッシュ
+_calendar_cache = CalendarCache(LruCacheBackend())
+
+
+def get_calendar_cache():
+    return _calendar_cache
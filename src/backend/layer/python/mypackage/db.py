@@ -0,0 +1,132 @@
+import os
+import time
+from contextlib import contextmanager
+
+import pymysql
+from pymysql.cursors import ColumnCursor, Cursor, PreparedColumnCursor, PreparedCursor
+
+from mypackage.logging_utils import get_logger
+from mypackage.secret_utils import get_secret_provider
+
+logger = get_logger()
+
+# 最後の利用からこの秒数以上経過していたら、利用前にpingで死活確認する
+IDLE_CHECK_SECONDS = 60
+
+# "1" の場合、conn.cursor()で作るカーソルをサーバサイドのプリペアドステートメントにする
+# （同じSQLの構文解析は接続ごとに1回だけになり、結果はバイナリプロトコルで受け取る）
+PREPARED_STATEMENTS = os.environ.get("DB_PREPARED_STATEMENTS", "0") == "1"
+
+
+class ConnectionManager:
+    """DB接続をコンテナ（プロセス）単位で1本保持し、warm起動をまたいで使いまわす"""
+
+    def __init__(self, rds_host, rds_database, secret_provider, idle_check_seconds = IDLE_CHECK_SECONDS, prepared_statements = None):
+        self.rds_host = rds_host
+        self.rds_database = rds_database
+        self.secret_provider = secret_provider
+        self.idle_check_seconds = idle_check_seconds
+        self.prepared_statements = PREPARED_STATEMENTS if prepared_statements is None else prepared_statements
+        self._conn = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        logger.debug("Connecting to databases ...")
+        return self.secret_provider.retry_on_access_denied(lambda secret: pymysql.connect(
+            host = self.rds_host,
+            user = secret["username"],
+            password = secret["password"],
+            database = self.rds_database,
+            charset = "utf8mb4",
+            connect_timeout = 5,
+            cursorclass = PreparedCursor if self.prepared_statements else Cursor
+        ))
+
+    def _get_connection(self):
+        if self._conn is None or not self._conn.open:
+            self._conn = self._connect()
+        elif time.monotonic() - self._last_used >= self.idle_check_seconds:
+            # しばらく使っていない接続は、サーバ側でタイムアウトしている可能性がある
+            try:
+                self._conn.ping(reconnect = True)
+            except Exception as e:
+                # パスワードのローテーション等で再接続に失敗した場合は、シークレットを取り直して接続する
+                logger.warning(f"Ping failed, reconnecting: {e}")
+                self.close()
+                self._conn = self._connect()
+        return self._conn
+
+    # 次の呼び出しに状態を持ち越さないよう、未コミットのトランザクションを破棄する
+    # （REPEATABLE READのスナップショットもここで解放される）
+    def _reset_session(self, conn):
+        conn.rollback()
+        if conn.get_autocommit():
+            conn.autocommit(False)
+
+    @contextmanager
+    def connection(self):
+        conn = self._get_connection()
+        try:
+            yield conn
+        finally:
+            self._last_used = time.monotonic()
+            try:
+                self._reset_session(conn)
+            except Exception as e:
+                # リセットできない接続は破棄し、次回は新しく接続する
+                logger.warning(f"Failed to reset session, closing connection: {e}")
+                self.close()
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+# 接続先ごとのマネージャをコンテナ内で共有する
+_managers = {}
+
+
+def get_connection_manager(rds_host, rds_database, secret_id, region_name):
+    key = (rds_host, rds_database, secret_id, region_name)
+    manager = _managers.get(key)
+    if manager is None:
+        manager = ConnectionManager(rds_host, rds_database, get_secret_provider(secret_id, region_name))
+        _managers[key] = manager
+    return manager
+
+
+# ハンドラから使う接続用のコンテキストマネージャ
+# with db_connection(...) as conn: の形で使う（ブロックを抜けても接続はcloseしない）
+def db_connection(rds_host, rds_database, secret_id, region_name):
+    return get_connection_manager(rds_host, rds_database, secret_id, region_name).connection()
+
+
+# IN句のプレースホルダの数の段階
+# プリペアドステートメントはSQLの文字列ごとに作られるため、値の数ごとに別の文が増えないよう、
+# 値の数を次の段階まで最後の値で埋める（INの値が重複しても結果は変わらない）
+IN_LIST_SIZES = (1, 4, 16, 64)
+
+
+# IN句のプレースホルダ（%s,%s,...）と、段階の数まで埋めた値のリストを返す
+# max_size: 値の最大数（これ以上の段階は使わず、max_sizeまで埋める）
+def in_list(values, max_size):
+    values = list(values)
+    if not values:
+        # 一致する行はない
+        return "NULL", []
+    sizes = [size for size in IN_LIST_SIZES if size < max_size] + [max_size]
+    size = next((size for size in sizes if size >= len(values)), len(values))
+    values += values[-1:] * (size - len(values))
+    return ",".join(["%s"] * size), values
+
+
+# 列指向で結果を取得するカーソル（to_records, fetchcolumns が使える）を作る
+# プリペアドステートメントを使う設定の接続では、PreparedColumnCursorにする
+def column_cursor(conn):
+    if issubclass(conn.cursorclass, PreparedCursor):
+        return conn.cursor(PreparedColumnCursor)
+    return conn.cursor(ColumnCursor)
@@ -0,0 +1,118 @@
+import time
+import hashlib
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+from mypackage.logging_utils import get_logger
+
+logger = get_logger()
+
+# 曜日名（date.weekday()、calendar.weekdayの戻り値 0=月曜 の順）
+# calendar_m.weekdayもこの名前で作成する（init_dbと共通）
+WEEKDAY_NAMES = ["月","火","水","木","金","土","日"]
+
+# 祝日・カレンダーの範囲が変わっていないかを確認する間隔（秒）
+HOLIDAY_INDEX_TTL_SECONDS = 300
+
+# 祝日・カレンダーの範囲のバージョン（どれかが変われば、インデックスを作り直す）
+# 祝日情報CSVを取り込むとholiday_import_t.imported_atが更新され、
+# init_dbで日付データの期間を変えるとcalendar_mの最小・最大日付・件数が変わる
+VERSION_SQL = """
+SELECT
+(SELECT MAX(`imported_at`) FROM holiday_import_t),
+(SELECT COUNT(*) FROM holiday_m),
+(SELECT MIN(`date`) FROM calendar_m),
+(SELECT MAX(`date`) FROM calendar_m),
+(SELECT COUNT(*) FROM calendar_m)
+"""
+
+# calendar_mの日付の連続した範囲（開始日, 終了日）を日付順に取得する
+# calendar_mは途中の日付が欠けていることがあるため、最小・最大日付の間のすべての日付があるとは限らない
+# （連続した日付は、日数から行番号を引いた値が同じになる。ROW_NUMBERはUNSIGNEDのため、SIGNEDにしてから引く）
+RANGES_SQL = """
+SELECT MIN(`date`), MAX(`date`)
+FROM (
+    SELECT `date`, TO_DAYS(`date`) - CAST(ROW_NUMBER() OVER (ORDER BY `date`) AS SIGNED) AS `grp`
+    FROM calendar_m
+) t
+GROUP BY `grp`
+ORDER BY 1
+"""
+
+
+class HolidayIndex:
+    """祝日（日付の昇順）と、calendar_mにある日付の範囲を保持し、カレンダーの日付・曜日・祝日名を作る"""
+
+    # ranges: calendar_mの日付の連続した範囲 (開始日, 終了日) の日付順のリスト
+    def __init__(self, holidays, ranges, version = None):
+        self.dates = [row[0] for row in holidays]
+        self.names = [row[1] for row in holidays]
+        self.ranges = [(first, last) for first, last in ranges]
+        self.range_ends = [last for _, last in self.ranges]
+        self.version = version
+
+    # バージョンを表す短い文字列（カレンダーのキャッシュのキーやETagに含める）
+    @property
+    def tag(self):
+        return hashlib.sha1(repr(self.version).encode()).hexdigest()[:8]
+
+    def holiday_name(self, day):
+        i = bisect_left(self.dates, day)
+        if i < len(self.dates) and self.dates[i] == day:
+            return self.names[i]
+        return None
+
+    # start_dateからend_dateまでの (日付, 曜日名, 祝日名またはNone) を日付順に返す
+    # calendar_mにない日付（範囲の外と、途中の欠け）は、calendar_mとのJOINと同じく含めない
+    def days(self, start_date, end_date):
+        lo = bisect_left(self.dates, start_date)
+        hi = bisect_right(self.dates, end_date)
+        holidays = dict(zip(self.dates[lo:hi], self.names[lo:hi]))
+        # start_date以降で終わる最初の範囲から、end_dateまでに始まる範囲を順に返す
+        for first, last in self.ranges[bisect_left(self.range_ends, start_date):]:
+            if first > end_date:
+                break
+            first = max(first, start_date)
+            for i in range((min(last, end_date) - first).days + 1):
+                day = first + timedelta(days = i)
+                yield day, WEEKDAY_NAMES[day.weekday()], holidays.get(day)
+
+
+def fetch_version(cur):
+    cur.execute(VERSION_SQL)
+    return tuple(cur.fetchone())
+
+
+def load_holiday_index(cur, version):
+    cur.execute("SELECT `date`, `holiday_name` FROM holiday_m ORDER BY `date`")
+    holidays = cur.fetchall()
+    cur.execute(RANGES_SQL)
+    ranges = cur.fetchall()
+    logger.debug(f"Loaded {len(holidays)} holidays and {len(ranges)} calendar ranges (version {version})")
+    return HolidayIndex(holidays, ranges, version)
+
+
+# コンテナ（プロセス）単位のキャッシュ
+_index_cache = {"index": None, "checked_at": 0.0}
+
+
+# キャッシュ済みのインデックスを返す
+# TTL切れの場合はバージョンだけを確認し、変わっていた場合のみholiday_mから読み直す
+def get_holiday_index(cur, ttl = HOLIDAY_INDEX_TTL_SECONDS):
+    now = time.monotonic()
+    index = _index_cache["index"]
+    if index is not None and now - _index_cache["checked_at"] < ttl:
+        return index
+
+    version = fetch_version(cur)
+    if index is None or index.version != version:
+        index = load_holiday_index(cur, version)
+        _index_cache["index"] = index
+    _index_cache["checked_at"] = now
+    return index
+
+
+# キャッシュを破棄する（次回のget_holiday_indexで必ず読み直される）
+def invalidate_holiday_index():
+    _index_cache["index"] = None
+    _index_cache["checked_at"] = 0.0
@@ -1,15 +1,84 @@
 import json
+import time
 import boto3
 
+from mypackage.logging_utils import get_logger
+
+logger = get_logger()
+
+# シークレットのキャッシュ有効期間（秒）
+SECRET_TTL_SECONDS = 900
+# MySQLのアクセス拒否エラー（ER_ACCESS_DENIED_ERROR）
+ACCESS_DENIED_ERROR = 1045
+
 
 # SecretsManagerからDB認証情報を取得
 def get_secret(secret_id,region_name):
-    client = boto3.client(
-        service_name = "secretsmanager",
-        region_name = region_name
-    )
+    return get_secret_provider(secret_id, region_name).get_secret()
+
+
+class SecretProvider:
+    """SecretsManagerのクライアントと復号済みシークレットを、warm起動をまたいで保持する"""
+
+    def __init__(self, secret_id, region_name, ttl = SECRET_TTL_SECONDS):
+        self.secret_id = secret_id
+        self.region_name = region_name
+        self.ttl = ttl
+        self._client = None
+        self._secret = None
+        self._fetched_at = 0.0
+
+    @property
+    def client(self):
+        # クライアント生成は初回のみ
+        if self._client is None:
+            self._client = boto3.client(
+                service_name = "secretsmanager",
+                region_name = self.region_name
+            )
+        return self._client
+
+    def get_secret(self, force_refresh = False):
+        now = time.monotonic()
+        if force_refresh or self._secret is None or now - self._fetched_at >= self.ttl:
+            logger.debug(f"Fetching secret {self.secret_id} ...")
+            res = self.client.get_secret_value(SecretId = self.secret_id)
+            self._secret = json.loads(res["SecretString"])
+            self._fetched_at = now
+        return self._secret
+
+    def invalidate(self):
+        self._secret = None
+        self._fetched_at = 0.0
+
+    # func(secret)を実行し、アクセス拒否エラーの場合はシークレットを取り直して1回だけ再実行する
+    # （シークレットのローテーション後も、コールドスタートを待たずに接続できるようにする）
+    def retry_on_access_denied(self, func):
+        try:
+            return func(self.get_secret())
+        except Exception as e:
+            if not is_access_denied_error(e):
+                raise
+            logger.warning("Access denied, refreshing secret and retrying ...")
+            return func(self.get_secret(force_refresh = True))
+
+
+# pymysqlのOperationalError(1045, ...)かどうかを判定する
+def is_access_denied_error(e):
+    args = getattr(e, "args", ())
+    return bool(args) and args[0] == ACCESS_DENIED_ERROR
+
+
+# (secret_id, region_name)ごとのプロバイダをコンテナ内で共有する
+_providers = {}
+
 
-    res = client.get_secret_value(SecretId = secret_id)
-    return json.loads(res["SecretString"])
+def get_secret_provider(secret_id, region_name):
+    key = (secret_id, region_name)
+    provider = _providers.get(key)
+    if provider is None:
+        provider = SecretProvider(secret_id, region_name)
+        _providers[key] = provider
+    return provider
 
-# try exceptで括ったほうが良い？
\ No newline at end of file
+# try exceptで括ったほうが良い？
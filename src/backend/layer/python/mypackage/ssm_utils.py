@@ -1,7 +1,22 @@
+import time
 import boto3
 
+from mypackage.logging_utils import get_logger
+
+logger = get_logger()
+
 ssm = boto3.client(service_name="ssm", region_name="ap-northeast-1")
 
+# アプリのパラメータはすべてこのパス配下に置かれている
+CONFIG_PATH = "/my_schedule_app"
+# キャッシュの有効期間（秒）
+CONFIG_TTL_SECONDS = 300
+
+# コンテナ（プロセス）単位のキャッシュ
+# warm起動時は前回の値を使いまわし、SSMへの問い合わせを省略する
+_config_cache = {"values": None, "fetched_at": 0.0}
+
+
 def get_rdsinfo(name: str) -> str:
     res = ssm.get_parameter(
         Name=name,
@@ -9,9 +24,51 @@ def get_rdsinfo(name: str) -> str:
     )
     return res['Parameter']['Value']
 
+
+# CONFIG_PATH配下のパラメータを1回の問い合わせ（ページングあり）でまとめて取得する
+# 戻り値は、パス部分を除いたパラメータ名をキーとする辞書（例: "rds_host"）
+def fetch_config(path: str = CONFIG_PATH) -> dict:
+    values = {}
+    paginator = ssm.get_paginator("get_parameters_by_path")
+    for page in paginator.paginate(Path=path, Recursive=True, WithDecryption=False):
+        for param in page["Parameters"]:
+            key = param["Name"][len(path):].lstrip("/")
+            values[key] = param["Value"]
+    return values
+
+
+# キャッシュ済みの設定を返す
+# TTL切れの場合は再取得し、再取得に失敗した場合は古い値を返す（stale-while-revalidate）
+# キャッシュが空の状態で失敗した場合のみ例外を送出する
+def get_config(ttl: float = CONFIG_TTL_SECONDS) -> dict:
+    now = time.monotonic()
+    values = _config_cache["values"]
+    if values is not None and now - _config_cache["fetched_at"] < ttl:
+        return values
+
+    try:
+        values = fetch_config()
+    except Exception as e:
+        if _config_cache["values"] is None:
+            raise
+        logger.warning(f"Failed to refresh SSM parameters, using cached values: {e}")
+        return _config_cache["values"]
+
+    _config_cache["values"] = values
+    _config_cache["fetched_at"] = now
+    return values
+
+
+# キャッシュを破棄する（次回のget_configで必ず再取得される）
+def invalidate_config():
+    _config_cache["values"] = None
+    _config_cache["fetched_at"] = 0.0
+
+
 # デバッグ用
 if __name__ == "__main__":
     result = get_rdsinfo("/easydays/rds_host")
     print(result)
+    print(get_config())
 
-# try exceptで括ったほうが良い？
\ No newline at end of file
+# try exceptで括ったほうが良い？
@@ -24,6 +24,11 @@ from .protocol import (
     OKPacketWrapper,
     EOFPacketWrapper,
     LoadLocalPacketWrapper,
+    binary_column_decoder,
+    encode_binary_param,
+    read_length_encoded_integer_at,
+    NULL_COLUMN,
+    UNSIGNED_CHAR_COLUMN,
 )
 from . import err, VERSION_STRING
 
@@ -66,6 +71,84 @@ DEFAULT_CHARSET = "utf8mb4"
 
 MAX_PACKET_LEN = 2**24 - 1
 
+#: Initial size of the receive buffer :meth:`Connection._read_packet` reads into.
+RECV_BUFFER_SIZE = 64 * 1024
+
+_PACKET_HEADER = struct.Struct("<HBB")
+
+
+class _ReceiveBuffer:
+    """Receive buffer for :meth:`Connection._read_packet`.
+
+    Data is received with ``socket.recv_into()`` into ``buffer`` and
+    ``view[pos:end]`` is the unread part.  Packets are handed out as
+    memoryview slices, so a packet which is already in the buffer is not
+    copied.  While a handed out view may still be in use (``exported``), the
+    next refill moves the unread bytes to a new buffer, so the view stays
+    valid; otherwise the unread bytes are moved to the front of the same
+    buffer.  The result readers clear ``exported`` with
+    :meth:`Connection._release_views` once a row packet has been decoded,
+    so reading a result set keeps reusing one buffer.
+    """
+
+    __slots__ = (
+        "size",
+        "buffer",
+        "view",
+        "pos",
+        "end",
+        "exported",
+        "bytes_received",
+        "bytes_copied",
+    )
+
+    def __init__(self, size=RECV_BUFFER_SIZE):
+        self.size = size
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.pos = 0
+        self.end = 0
+        self.exported = False
+        #: Statistics: bytes received from the socket / copied inside the client.
+        self.bytes_received = 0
+        self.bytes_copied = 0
+
+    def reserve(self, num_bytes):
+        """Make room for num_bytes contiguous bytes from the read position."""
+        if len(self.buffer) - self.pos >= num_bytes:
+            return
+        remaining = self.end - self.pos
+        if self.exported or num_bytes > len(self.buffer):
+            buffer = bytearray(max(self.size, num_bytes))
+            buffer[:remaining] = self.view[self.pos : self.end]
+            self.buffer = buffer
+            self.view = memoryview(buffer)
+            self.exported = False
+        else:
+            # memoryview assignment handles the overlapping move
+            self.view[:remaining] = self.view[self.pos : self.end]
+        self.bytes_copied += remaining
+        self.pos = 0
+        self.end = remaining
+
+
+class PreparedStatement:
+    """A server-side prepared statement returned by :meth:`Connection.prepare`.
+
+    :ivar statement_id: Statement id assigned by the server.
+    :ivar sql: SQL text (bytes) the statement was prepared from.
+    :ivar param_count: Number of ``?`` placeholders.
+    :ivar field_count: Number of columns in the result set.
+    """
+
+    __slots__ = ("statement_id", "sql", "param_count", "field_count")
+
+    def __init__(self, statement_id, sql, param_count, field_count):
+        self.statement_id = statement_id
+        self.sql = sql
+        self.param_count = param_count
+        self.field_count = field_count
+
 
 def _pack_int24(n):
     return struct.pack("<I", n)[:3]
@@ -143,6 +226,8 @@ class Connection:
     :param read_default_group: Group to read from in the configuration file.
     :param autocommit: Autocommit mode. None means use server default. (default: False)
     :param local_infile: Boolean to enable the use of LOAD DATA LOCAL command. (default: False)
+        ``"sources"`` enables it only for data registered with
+        :meth:`set_local_infile_source`; local files are never read.
     :param max_allowed_packet: Max size of packet sent to server in bytes. (default: 16MB)
         Only used to limit size of "LOAD LOCAL INFILE" data packet smaller than default (16KB).
     :param defer_connect: Don't explicitly connect on construction - wait for connect call.
@@ -154,6 +239,9 @@ class Connection:
         (if no authenticate method) for returning a string from the user. (experimental)
     :param server_public_key: SHA256 authentication plugin public key value. (default: None)
     :param binary_prefix: Add _binary prefix on bytes and bytearray. (default: False)
+    :param max_prepared_statements: Max number of server-side prepared statements
+        cached per connection. The least recently prepared one is closed when
+        the limit is exceeded. (default: 64)
     :param compress: Not supported.
     :param named_pipe: Not supported.
     :param db: **DEPRECATED** Alias for database.
@@ -164,7 +252,7 @@ class Connection:
     """
 
     _sock = None
-    _rfile = None
+    _rbuf = None
     _auth_plugin_name = ""
     _closed = False
     _secure = False
@@ -198,6 +286,7 @@ class Connection:
         write_timeout=None,
         bind_address=None,
         binary_prefix=False,
+        max_prepared_statements=64,
         program_name=None,
         server_public_key=None,
         ssl=None,
@@ -232,8 +321,10 @@ class Connection:
             )
 
         self._local_infile = bool(local_infile)
+        self._local_infile_files = self._local_infile and local_infile != "sources"
         if self._local_infile:
             client_flag |= CLIENT.LOCAL_FILES
+        self._local_infile_sources = {}
 
         if read_default_group and not read_default_file:
             if sys.platform.startswith("win"):
@@ -348,6 +439,8 @@ class Connection:
         self.max_allowed_packet = max_allowed_packet
         self._auth_plugin_map = auth_plugin_map or {}
         self._binary_prefix = binary_prefix
+        self.max_prepared_statements = max_prepared_statements
+        self._prepared_statements = {}
         self.server_public_key = server_public_key
 
         self._connect_attrs = {
@@ -440,15 +533,15 @@ class Connection:
 
     def _force_close(self):
         """Close connection without QUIT message."""
-        if self._rfile:
-            self._rfile.close()
         if self._sock:
             try:
                 self._sock.close()
             except:  # noqa
                 pass
         self._sock = None
-        self._rfile = None
+        self._rbuf = None
+        # Prepared statements are released by the server with the session.
+        self._prepared_statements = {}
 
     __del__ = _force_close
 
@@ -520,6 +613,24 @@ class Connection:
         self._execute_command(COMMAND.COM_INIT_DB, db)
         self._read_ok_packet()
 
+    def set_local_infile_source(self, filename, source):
+        """
+        Register data to send for ``LOAD DATA LOCAL INFILE 'filename'``.
+
+        :param filename: The file name used in the LOAD DATA statement.
+        :param source: Iterable of bytes chunks sent instead of reading a
+            local file, or None to remove a registered source.
+
+        The source is used once and then discarded.
+        """
+        if isinstance(filename, str):
+            # the server echoes the file name back as bytes
+            filename = filename.encode(self.encoding)
+        if source is None:
+            self._local_infile_sources.pop(filename, None)
+        else:
+            self._local_infile_sources[filename] = source
+
     def escape(self, obj, mapping=None):
         """Escape whatever value is passed.
 
@@ -579,6 +690,93 @@ class Connection:
         self._affected_rows = self._read_query_result(unbuffered=unbuffered)
         return self._affected_rows
 
+    def prepare(self, sql):
+        """Prepare ``sql`` as a server-side prepared statement.
+
+        Statements are cached per connection keyed by the SQL text, so the
+        server parses each distinct statement only once per session.
+        Placeholders are ``?`` (see :class:`~pymysql.cursors.PreparedCursor`
+        for ``%s`` style).
+
+        :rtype: PreparedStatement
+        """
+        if isinstance(sql, str):
+            sql = sql.encode(self.encoding, "surrogateescape")
+        stmt = self._prepared_statements.get(sql)
+        if stmt is not None:
+            return stmt
+
+        self._execute_command(COMMAND.COM_STMT_PREPARE, sql)
+        packet = self._read_packet()
+        if packet.read_uint8() != 0:  # pragma: no cover - upstream protocol error
+            raise err.OperationalError(
+                CR.CR_COMMANDS_OUT_OF_SYNC,
+                "Command Out of Sync",
+            )
+        statement_id, field_count, param_count = packet.read_struct("<IHH")
+        # Parameter and column definitions are not needed to execute the
+        # statement; result columns are described again by every execute.
+        for count in (param_count, field_count):
+            if count:
+                for _ in range(count):
+                    self._read_packet()
+                eof_packet = self._read_packet()
+                assert eof_packet.is_eof_packet(), "Protocol error, expecting EOF"
+
+        stmt = PreparedStatement(statement_id, sql, param_count, field_count)
+        self._prepared_statements[sql] = stmt
+        while len(self._prepared_statements) > self.max_prepared_statements:
+            oldest = next(iter(self._prepared_statements.values()))
+            self.close_prepared(oldest)
+        return stmt
+
+    def execute_prepared(self, stmt, args=(), unbuffered=False):
+        """Execute a statement returned by :meth:`prepare` with ``args``.
+
+        Rows are sent by the server in the binary protocol and decoded
+        without a text round trip for integer and temporal columns.
+        """
+        if len(args) != stmt.param_count:
+            raise err.ProgrammingError(
+                f"Statement takes {stmt.param_count} parameters, {len(args)} given"
+            )
+        # flags: CURSOR_TYPE_NO_CURSOR, iteration_count: always 1
+        payload = struct.pack("<IBI", stmt.statement_id, 0, 1)
+        if args:
+            null_bitmap = bytearray((len(args) + 7) // 8)
+            types = bytearray()
+            values = []
+            for i, arg in enumerate(args):
+                if arg is None:
+                    null_bitmap[i // 8] |= 1 << (i % 8)
+                    types += bytes((FIELD_TYPE.NULL, 0))
+                    continue
+                type_code, unsigned, data = encode_binary_param(arg, self.encoding)
+                types += bytes((type_code, 0x80 if unsigned else 0))
+                values.append(data)
+            # new_params_bound_flag is always 1; types are sent every time
+            payload += bytes(null_bitmap) + b"\x01" + bytes(types) + b"".join(values)
+        self._execute_command(COMMAND.COM_STMT_EXECUTE, payload)
+        self._affected_rows = self._read_query_result(
+            unbuffered=unbuffered, binary=True
+        )
+        return self._affected_rows
+
+    def close_prepared(self, stmt):
+        """Deallocate a prepared statement on the server and drop it from the cache."""
+        if self._prepared_statements.get(stmt.sql) is stmt:
+            del self._prepared_statements[stmt.sql]
+        if self._sock is not None:
+            # COM_STMT_CLOSE has no response
+            self._execute_command(
+                COMMAND.COM_STMT_CLOSE, struct.pack("<I", stmt.statement_id)
+            )
+
+    def clear_prepared_statements(self):
+        """Deallocate all cached prepared statements."""
+        for stmt in list(self._prepared_statements.values()):
+            self.close_prepared(stmt)
+
     def affected_rows(self):
         return self._affected_rows
 
@@ -642,6 +840,7 @@ class Connection:
 
     def connect(self, sock=None):
         self._closed = False
+        self._prepared_statements = {}
         try:
             if sock is None:
                 if self.unix_socket:
@@ -674,7 +873,7 @@ class Connection:
                 sock.settimeout(None)
 
             self._sock = sock
-            self._rfile = sock.makefile("rb")
+            self._rbuf = _ReceiveBuffer()
             self._next_seq_id = 0
 
             self._get_server_information()
@@ -739,19 +938,23 @@ class Connection:
         self._write_bytes(data)
         self._next_seq_id = (self._next_seq_id + 1) % 256
 
-    def _read_packet(self, packet_type=MysqlPacket):
+    def _read_packet(self, packet_type=MysqlPacket, view=False):
         """Read an entire "mysql packet" in its entirety from the network
         and return a MysqlPacket type that represents the results.
 
+        :param view: If true, a packet received in a single fragment is
+            backed by a memoryview of the receive buffer instead of a copy.
+            Only for packets whose data is not kept (result rows).
         :raise OperationalError: If the connection to the MySQL server is lost.
         :raise InternalError: If the packet sequence number is wrong.
         """
-        buff = bytearray()
+        rbuf = self._rbuf
+        fragments = None
         while True:
-            packet_header = self._read_bytes(4)
-            # if DEBUG: dump_packet(packet_header)
-
-            btrl, btrh, packet_number = struct.unpack("<HBB", packet_header)
+            if rbuf.end - rbuf.pos < 4:
+                self._fill_buffer(4)
+            btrl, btrh, packet_number = _PACKET_HEADER.unpack_from(rbuf.view, rbuf.pos)
+            rbuf.pos += 4
             bytes_to_read = btrl + (btrh << 16)
             if packet_number != self._next_seq_id:
                 self._force_close()
@@ -767,27 +970,56 @@ class Connection:
                 )
             self._next_seq_id = (self._next_seq_id + 1) % 256
 
-            recv_data = self._read_bytes(bytes_to_read)
-            if DEBUG:
-                dump_packet(recv_data)
-            buff += recv_data
+            if rbuf.end - rbuf.pos < bytes_to_read:
+                self._fill_buffer(bytes_to_read)
+            start = rbuf.pos
+            rbuf.pos = end = start + bytes_to_read
             # https://dev.mysql.com/doc/internals/en/sending-more-than-16mbyte.html
+            if bytes_to_read < MAX_PACKET_LEN and fragments is None:
+                # Single fragment (the common case): a view, or one copy
+                if view:
+                    rbuf.exported = True
+                    data = rbuf.view[start:end]
+                else:
+                    rbuf.bytes_copied += bytes_to_read
+                    data = bytes(rbuf.view[start:end])
+                break
+            if fragments is None:
+                fragments = []
+            rbuf.exported = True
+            fragments.append(rbuf.view[start:end])
             if bytes_to_read < MAX_PACKET_LEN:
+                data = b"".join(fragments)
+                rbuf.bytes_copied += len(data)
                 break
 
-        packet = packet_type(bytes(buff), self.encoding)
+        if DEBUG:
+            dump_packet(data)
+        packet = packet_type(data, self.encoding)
         if packet.is_error_packet():
             if self._result is not None and self._result.unbuffered_active is True:
                 self._result.unbuffered_active = False
+            if type(data) is not bytes:
+                packet = packet_type(bytes(data), self.encoding)
             packet.raise_for_error()
         return packet
 
-    def _read_bytes(self, num_bytes):
+    def _release_views(self):
+        """Allow the receive buffer to be reused in place.
+
+        Call this only when no view returned by ``_read_packet(view=True)``
+        is used any more (decoded rows hold copies, not views).
+        """
+        self._rbuf.exported = False
+
+    def _fill_buffer(self, num_bytes):
+        """Receive until at least num_bytes unread bytes are in the receive buffer."""
+        rbuf = self._rbuf
+        rbuf.reserve(num_bytes)
         self._sock.settimeout(self._read_timeout)
-        while True:
+        while rbuf.end - rbuf.pos < num_bytes:
             try:
-                data = self._rfile.read(num_bytes)
-                break
+                received = self._sock.recv_into(rbuf.view[rbuf.end :])
             except OSError as e:
                 if e.errno == errno.EINTR:
                     continue
@@ -800,12 +1032,13 @@ class Connection:
                 # Don't convert unknown exception to MySQLError.
                 self._force_close()
                 raise
-        if len(data) < num_bytes:
-            self._force_close()
-            raise err.OperationalError(
-                CR.CR_SERVER_LOST, "Lost connection to MySQL server during query"
-            )
-        return data
+            if not received:
+                self._force_close()
+                raise err.OperationalError(
+                    CR.CR_SERVER_LOST, "Lost connection to MySQL server during query"
+                )
+            rbuf.end += received
+            rbuf.bytes_received += received
 
     def _write_bytes(self, data):
         self._sock.settimeout(self._write_timeout)
@@ -817,9 +1050,9 @@ class Connection:
                 CR.CR_SERVER_GONE_ERROR, f"MySQL server has gone away ({e!r})"
             )
 
-    def _read_query_result(self, unbuffered=False):
+    def _read_query_result(self, unbuffered=False, binary=False):
         self._result = None
-        result = MySQLResult(self)
+        result = MySQLResult(self, binary=binary)
         if unbuffered:
             result.init_unbuffered_query()
         else:
@@ -898,7 +1131,7 @@ class Connection:
             self.write_packet(data_init)
 
             self._sock = self.ctx.wrap_socket(self._sock, server_hostname=self.host)
-            self._rfile = self._sock.makefile("rb")
+            self._rbuf = _ReceiveBuffer()
             self._secure = True
 
         data = data_init + self.user + b"\0"
@@ -1178,11 +1411,13 @@ class Connection:
 
 
 class MySQLResult:
-    def __init__(self, connection):
+    def __init__(self, connection, binary=False):
         """
         :type connection: Connection
+        :param binary: True if rows are sent in the binary protocol (COM_STMT_EXECUTE).
         """
         self.connection = connection
+        self.binary = binary
         self.affected_rows = None
         self.insert_id = None
         self.server_status = None
@@ -1292,14 +1527,17 @@ class MySQLResult:
             return
 
         # EOF
-        packet = self.connection._read_packet()
+        conn = self.connection
+        packet = conn._read_packet(view=True)
         if self._check_packet_is_eof(packet):
             self.unbuffered_active = False
             self.connection = None
             self.rows = None
+            conn._release_views()
             return
 
         row = self._read_row_from_packet(packet)
+        conn._release_views()
         self.affected_rows = 1
         self.rows = (row,)  # rows should tuple of row for MySQL-python compatibility.
         return row
@@ -1310,7 +1548,7 @@ class MySQLResult:
         # executing a query, so we just spin, and wait for an EOF packet.
         while self.unbuffered_active:
             try:
-                packet = self.connection._read_packet()
+                packet = self.connection._read_packet(view=True)
             except err.OperationalError as e:
                 if e.args[0] in (
                     ER.QUERY_TIMEOUT,
@@ -1323,40 +1561,74 @@ class MySQLResult:
 
                 raise
 
+            self.connection._release_views()
             if self._check_packet_is_eof(packet):
                 self.unbuffered_active = False
                 self.connection = None  # release reference to kill cyclic reference.
 
     def _read_rowdata_packet(self):
         """Read a rowdata packet for each data row in the result set."""
+        conn = self.connection
         rows = []
         while True:
-            packet = self.connection._read_packet()
+            packet = conn._read_packet(view=True)
             if self._check_packet_is_eof(packet):
                 self.connection = None  # release reference to kill cyclic reference.
+                conn._release_views()
                 break
             rows.append(self._read_row_from_packet(packet))
+            conn._release_views()
 
         self.affected_rows = len(rows)
         self.rows = tuple(rows)
 
     def _read_row_from_packet(self, packet):
+        if self.binary:
+            return self._read_binary_row_from_packet(packet)
+        # Walk the packet buffer (bytes or memoryview) directly, decoding
+        # length prefixes inline instead of calling
+        # packet.read_length_coded_string() for every column.
+        data = packet.get_all_data()
+        data_length = len(data)
+        pos = 0
         row = []
-        for encoding, converter in self.converters:
-            try:
-                data = packet.read_length_coded_string()
-            except IndexError:
+        for encoding, converter in self._row_decoders:
+            if pos >= data_length:
                 # No more columns in this row
                 # See https://github.com/PyMySQL/PyMySQL/pull/434
                 break
-            if data is not None:
-                if encoding is not None:
-                    data = data.decode(encoding)
-                if DEBUG:
-                    print("DEBUG: DATA = ", data)
-                if converter is not None:
-                    data = converter(data)
-            row.append(data)
+            length = data[pos]
+            if length < UNSIGNED_CHAR_COLUMN:
+                pos += 1
+            elif length == NULL_COLUMN:
+                pos += 1
+                row.append(None)
+                continue
+            else:
+                length, pos = read_length_encoded_integer_at(data, pos)
+            value = data[pos : pos + length]
+            pos += length
+            if encoding is not None:
+                value = str(value, encoding)
+            elif type(value) is not bytes:
+                value = bytes(value)
+            if converter is not None:
+                value = converter(value)
+            row.append(value)
+        return tuple(row)
+
+    def _read_binary_row_from_packet(self, packet):
+        # Binary row: 0x00 header, NULL bitmap (offset 2), then non-NULL values.
+        data = packet.get_all_data()
+        pos = 1 + (self.field_count + 9) // 8
+        row = []
+        for i, decode in enumerate(self.binary_decoders):
+            bit = i + 2
+            if data[1 + (bit >> 3)] & (1 << (bit & 7)):
+                row.append(None)
+                continue
+            value, pos = decode(data, pos)
+            row.append(value)
         return tuple(row)
 
     def _get_descriptions(self):
@@ -1397,6 +1669,19 @@ class MySQLResult:
             if DEBUG:
                 print(f"DEBUG: field={field}, converter={converter}")
             self.converters.append((encoding, converter))
+        # Precompiled per-result decoders for _read_row_from_packet.
+        # int() and float() parse the ASCII bytes without decoding to str first.
+        self._row_decoders = tuple(
+            (None, converter)
+            if encoding == "ascii" and converter in (int, float)
+            else (encoding, converter)
+            for encoding, converter in self.converters
+        )
+        if self.binary:
+            self.binary_decoders = [
+                binary_column_decoder(field, encoding, converter)
+                for field, (encoding, converter) in zip(self.fields, self.converters)
+            ]
 
         eof_packet = self.connection._read_packet()
         assert eof_packet.is_eof_packet(), "Protocol error, expecting EOF"
@@ -1414,11 +1699,33 @@ class LoadLocalFile:
             raise err.InterfaceError(0, "")
         conn: Connection = self.connection
 
+        packet_size = min(
+            conn.max_allowed_packet, 16 * 1024
+        )  # 16KB is efficient enough
+        source = conn._local_infile_sources.pop(self.filename, None)
+
+        try:
+            if source is not None:
+                self._send_source(source, packet_size)
+            elif conn._local_infile_files:
+                self._send_file(packet_size)
+            else:
+                # only registered sources are allowed: never open a path
+                # chosen by the server
+                raise err.OperationalError(
+                    ER.FILE_NOT_FOUND,
+                    f"No local infile source registered for '{self.filename}'",
+                )
+        finally:
+            if not conn._closed:
+                # send the empty packet to signify we are done sending data
+                conn.write_packet(b"")
+
+    def _send_file(self, packet_size):
+        """Send the local file, packet_size bytes per packet"""
+        conn = self.connection
         try:
             with open(self.filename, "rb") as open_file:
-                packet_size = min(
-                    conn.max_allowed_packet, 16 * 1024
-                )  # 16KB is efficient enough
                 while True:
                     chunk = open_file.read(packet_size)
                     if not chunk:
@@ -1429,7 +1736,15 @@ class LoadLocalFile:
                 ER.FILE_NOT_FOUND,
                 f"Can't find file '{self.filename}'",
             )
-        finally:
-            if not conn._closed:
-                # send the empty packet to signify we are done sending data
-                conn.write_packet(b"")
+
+    def _send_source(self, source, packet_size):
+        """Send chunks from an iterable source, regrouped into packet_size packets"""
+        conn = self.connection
+        buff = bytearray()
+        for chunk in source:
+            buff += chunk
+            while len(buff) >= packet_size:
+                conn.write_packet(bytes(buff[:packet_size]))
+                del buff[:packet_size]
+        if buff:
+            conn.write_packet(bytes(buff))
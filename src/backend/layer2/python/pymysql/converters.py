@@ -290,6 +290,9 @@ def convert_date(obj):
     if isinstance(obj, (bytes, bytearray)):
         obj = obj.decode("ascii")
     try:
+        # fast path for the YYYY-MM-DD form the server sends
+        if len(obj) == 10:
+            return datetime.date.fromisoformat(obj)
         return datetime.date(*[int(x) for x in obj.split("-", 2)])
     except ValueError:
         return obj
@@ -1,6 +1,9 @@
+import functools
 import re
 import warnings
+from array import array
 from . import err
+from .constants import FIELD_TYPE, FLAG
 
 
 #: Regular expression for :meth:`Cursor.executemany`.
@@ -529,3 +532,167 @@ class SSCursor(Cursor):
 
 class SSDictCursor(DictCursorMixin, SSCursor):
     """An unbuffered cursor, which returns results as a dictionary"""
+
+
+#: Placeholders of :class:`PreparedCursor` queries (``%s``, and ``%%`` for a literal ``%``).
+RE_PREPARED_PLACEHOLDER = re.compile(r"%([s%])")
+
+
+@functools.lru_cache(maxsize=256)
+def _to_prepared_sql(query):
+    return RE_PREPARED_PLACEHOLDER.sub(
+        lambda m: "?" if m.group(1) == "s" else "%", query
+    )
+
+
+class PreparedCursor(Cursor):
+    """
+    Cursor which executes queries with args as server-side prepared
+    statements (COM_STMT_PREPARE / COM_STMT_EXECUTE).
+
+    Queries use ``%s`` placeholders like :class:`Cursor`, but args must be
+    a tuple or list. The statement is prepared once per connection and
+    reused for the same SQL text, and rows are received in the binary
+    protocol. Queries without args are sent as text, as with :class:`Cursor`.
+    """
+
+    def execute(self, query, args=None):
+        if args is None:
+            return super().execute(query)
+        if not isinstance(args, (tuple, list)):
+            raise err.ProgrammingError("PreparedCursor only supports tuple or list args")
+
+        while self.nextset():
+            pass
+
+        conn = self._get_db()
+        stmt = conn.prepare(_to_prepared_sql(query))
+        self._clear_result()
+        conn.execute_prepared(stmt, args)
+        self._do_get_result()
+        self._executed = query
+        return self.rowcount
+
+
+#: array typecodes of :meth:`ColumnCursorMixin.fetchcolumns` columns.
+_COLUMN_TYPECODES = {
+    FIELD_TYPE.TINY: "q",
+    FIELD_TYPE.SHORT: "q",
+    FIELD_TYPE.INT24: "q",
+    FIELD_TYPE.LONG: "q",
+    FIELD_TYPE.LONGLONG: "q",
+    FIELD_TYPE.YEAR: "q",
+    FIELD_TYPE.FLOAT: "d",
+    FIELD_TYPE.DOUBLE: "d",
+}
+
+
+class ColumnCursorMixin:
+    """Adds column-wise fetch methods to a buffered cursor.
+
+    :meth:`fetchcolumns` transposes the rows into columns once and applies
+    per-column converters to whole columns with map().  :meth:`to_records`
+    builds one dict per row with dict(zip()) and then converts its values
+    column by column.
+    """
+
+    def _column_names(self):
+        names = []
+        for f in self._result.fields:
+            name = f.name
+            if name in names:
+                name = f.table_name + "." + name
+            names.append(name)
+        return names
+
+    def _fetch_remaining(self):
+        self._check_executed()
+        rows = self._rows or ()
+        if self.rownumber:
+            rows = rows[self.rownumber :]
+        self.rownumber = len(self._rows or ())
+        return rows
+
+    def _convert_columns(self, keys, columns, converters):
+        if converters:
+            for i, key in enumerate(keys):
+                converter = converters.get(key)
+                if converter is not None:
+                    columns[i] = map(converter, columns[i])
+        return columns
+
+    def fetchcolumns(self, converters=None):
+        """Fetch all remaining rows as a dict of column name to column.
+
+        :param converters: Optional dict of column name to a function
+            applied to every value of that column (including None).
+
+        Integer and float columns without NULL are returned as
+        :class:`array.array`, the others as lists.
+        """
+        rows = self._fetch_remaining()
+        if not self.description:
+            return {}
+        names = self._column_names()
+        if rows:
+            columns = list(zip(*rows))
+        else:
+            columns = [() for _ in names]
+        columns = self._convert_columns(names, columns, converters)
+
+        result = {}
+        for name, field, values in zip(names, self._result.fields, columns):
+            typecode = None
+            if not (converters and name in converters):
+                typecode = _COLUMN_TYPECODES.get(field.type_code)
+            if typecode == "q" and field.flags & FLAG.UNSIGNED:
+                typecode = "Q"
+            if typecode is not None:
+                try:
+                    result[name] = array(typecode, values)
+                    continue
+                except (TypeError, OverflowError):
+                    # NULL values or out of range
+                    pass
+            result[name] = list(values)
+        return result
+
+    def to_records(self, keys=None, converters=None):
+        """Fetch all remaining rows as a list of dicts.
+
+        :param keys: Dict keys for the columns, in column order.
+            (default: column names)
+        :param converters: Optional dict of key to a function applied to
+            every value of that column (including None).
+
+        Equivalent to ``[{k: conv(v), ...} for row in fetchall()]`` with
+        the keys written out, without the intermediate dicts of
+        :class:`DictCursor`.
+        """
+        rows = self._fetch_remaining()
+        if not self.description:
+            return []
+        if keys is None:
+            keys = self._column_names()
+        elif len(keys) != len(self.description):
+            raise err.ProgrammingError(
+                f"{len(keys)} keys given for {len(self.description)} columns"
+            )
+        if not all(isinstance(key, str) for key in keys):
+            raise err.ProgrammingError("to_records() keys must be str")
+        if not rows:
+            return []
+        records = [dict(zip(keys, row)) for row in rows]
+        for key, converter in (converters or {}).items():
+            if key in keys:
+                for record in records:
+                    record[key] = converter(record[key])
+        return records
+
+
+class ColumnCursor(ColumnCursorMixin, Cursor):
+    """A cursor which can return results column-wise"""
+
+
+class PreparedColumnCursor(ColumnCursorMixin, PreparedCursor):
+    """A :class:`PreparedCursor` which can return results column-wise"""
@@ -2,9 +2,10 @@
 # http://dev.mysql.com/doc/internals/en/client-server-protocol.html
 
 from .charset import MBLENGTH
-from .constants import FIELD_TYPE, SERVER_STATUS
+from .constants import FIELD_TYPE, FLAG, SERVER_STATUS
 from . import err
 
+import datetime
 import struct
 import sys
 
@@ -354,3 +355,235 @@ class LoadLocalPacketWrapper:
 
     def __getattr__(self, key):
         return getattr(self.packet, key)
+
+
+# Binary protocol (server-side prepared statements)
+# https://dev.mysql.com/doc/dev/mysql-server/latest/page_protocol_binary_resultset.html
+
+_INT_STRUCTS = {
+    FIELD_TYPE.TINY: ("<b", "<B"),
+    FIELD_TYPE.SHORT: ("<h", "<H"),
+    FIELD_TYPE.YEAR: ("<h", "<H"),
+    FIELD_TYPE.INT24: ("<i", "<I"),
+    FIELD_TYPE.LONG: ("<i", "<I"),
+    FIELD_TYPE.LONGLONG: ("<q", "<Q"),
+}
+
+_FLOAT_STRUCTS = {
+    FIELD_TYPE.FLOAT: "<f",
+    FIELD_TYPE.DOUBLE: "<d",
+}
+
+_DATE_TYPES = {FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE}
+_DATETIME_TYPES = {FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP}
+
+
+def read_length_encoded_integer_at(data, pos):
+    """Read a 'Length Coded Binary' number at data[pos].
+
+    Returns a ``(value, next_position)`` tuple. value is None for NULL.
+    """
+    c = data[pos]
+    if c < UNSIGNED_CHAR_COLUMN:
+        return c, pos + 1
+    if c == UNSIGNED_SHORT_COLUMN:
+        return struct.unpack_from("<H", data, pos + 1)[0], pos + 3
+    if c == UNSIGNED_INT24_COLUMN:
+        low, high = struct.unpack_from("<HB", data, pos + 1)
+        return low + (high << 16), pos + 4
+    if c == UNSIGNED_INT64_COLUMN:
+        return struct.unpack_from("<Q", data, pos + 1)[0], pos + 9
+    return None, pos + 1
+
+
+def _lenenc_bytes(b):
+    n = len(b)
+    if n < UNSIGNED_CHAR_COLUMN:
+        return bytes((n,)) + b
+    if n < 2**16:
+        return b"\xfc" + struct.pack("<H", n) + b
+    if n < 2**24:
+        return b"\xfd" + struct.pack("<I", n)[:3] + b
+    return b"\xfe" + struct.pack("<Q", n) + b
+
+
+def _make_struct_decoder(fmt):
+    s = struct.Struct(fmt)
+    unpack_from = s.unpack_from
+    size = s.size
+
+    def decode(data, pos):
+        return unpack_from(data, pos)[0], pos + size
+
+    return decode
+
+
+def _decode_binary_date(data, pos):
+    length = data[pos]
+    pos += 1
+    if length == 0:
+        return "0000-00-00", pos
+    year, month, day = struct.unpack_from("<HBB", data, pos)
+    try:
+        value = datetime.date(year, month, day)
+    except ValueError:
+        # Illegal values are returned as str, like converters.convert_date
+        value = f"{year:04d}-{month:02d}-{day:02d}"
+    return value, pos + length
+
+
+def _decode_binary_datetime(data, pos):
+    length = data[pos]
+    pos += 1
+    if length == 0:
+        return "0000-00-00 00:00:00", pos
+    year, month, day = struct.unpack_from("<HBB", data, pos)
+    hour = minute = second = microsecond = 0
+    if length >= 7:
+        hour, minute, second = struct.unpack_from("<BBB", data, pos + 4)
+    if length >= 11:
+        microsecond = struct.unpack_from("<I", data, pos + 7)[0]
+    try:
+        value = datetime.datetime(year, month, day, hour, minute, second, microsecond)
+    except ValueError:
+        value = (
+            f"{year:04d}-{month:02d}-{day:02d} {hour:02d}:{minute:02d}:{second:02d}"
+        )
+    return value, pos + length
+
+
+def _decode_binary_time(data, pos):
+    length = data[pos]
+    pos += 1
+    if length == 0:
+        return datetime.timedelta(0), pos
+    negative, days, hour, minute, second = struct.unpack_from("<BIBBB", data, pos)
+    microsecond = struct.unpack_from("<I", data, pos + 8)[0] if length >= 12 else 0
+    value = datetime.timedelta(
+        days=days,
+        hours=hour,
+        minutes=minute,
+        seconds=second,
+        microseconds=microsecond,
+    )
+    return (-value if negative else value), pos + length
+
+
+def _make_string_decoder(encoding, converter):
+    def decode(data, pos):
+        length, pos = read_length_encoded_integer_at(data, pos)
+        end = pos + length
+        value = data[pos:end]
+        if encoding is not None:
+            value = str(value, encoding)
+        elif type(value) is not bytes:
+            value = bytes(value)
+        if converter is not None:
+            value = converter(value)
+        return value, end
+
+    return decode
+
+
+def binary_column_decoder(field, encoding, converter):
+    """Return a ``decode(data, pos) -> (value, next_position)`` function
+    for a column of a binary protocol result row.
+
+    Integer, float and temporal types are decoded from their native binary
+    form.  Other types are sent as length coded strings and are decoded with
+    the same (encoding, converter) pair the text protocol uses.
+    """
+    type_code = field.type_code
+    if type_code in _INT_STRUCTS:
+        signed, unsigned = _INT_STRUCTS[type_code]
+        return _make_struct_decoder(unsigned if field.flags & FLAG.UNSIGNED else signed)
+    if type_code in _FLOAT_STRUCTS:
+        return _make_struct_decoder(_FLOAT_STRUCTS[type_code])
+    if type_code in _DATE_TYPES:
+        return _decode_binary_date
+    if type_code in _DATETIME_TYPES:
+        return _decode_binary_datetime
+    if type_code == FIELD_TYPE.TIME:
+        return _decode_binary_time
+    return _make_string_decoder(encoding, converter)
+
+
+def _encode_binary_datetime(value):
+    if value.microsecond:
+        return b"\x0b" + struct.pack(
+            "<HBBBBBI",
+            value.year,
+            value.month,
+            value.day,
+            value.hour,
+            value.minute,
+            value.second,
+            value.microsecond,
+        )
+    return b"\x07" + struct.pack(
+        "<HBBBBB",
+        value.year,
+        value.month,
+        value.day,
+        value.hour,
+        value.minute,
+        value.second,
+    )
+
+
+def _encode_binary_time(negative, days, hour, minute, second, microsecond):
+    if microsecond:
+        return b"\x0c" + struct.pack(
+            "<BIBBBI", negative, days, hour, minute, second, microsecond
+        )
+    return b"\x08" + struct.pack("<BIBBB", negative, days, hour, minute, second)
+
+
+def encode_binary_param(value, encoding):
+    """Encode a parameter of COM_STMT_EXECUTE.
+
+    Returns a ``(type_code, unsigned, data)`` tuple.  None must be handled
+    by the caller (NULL bitmap).
+    """
+    if isinstance(value, int):
+        if -(2**63) <= value < 2**63:
+            return FIELD_TYPE.LONGLONG, False, struct.pack("<q", value)
+        if 0 <= value < 2**64:
+            return FIELD_TYPE.LONGLONG, True, struct.pack("<Q", value)
+        return FIELD_TYPE.NEWDECIMAL, False, _lenenc_bytes(str(value).encode("ascii"))
+    if isinstance(value, float):
+        return FIELD_TYPE.DOUBLE, False, struct.pack("<d", value)
+    if isinstance(value, str):
+        return FIELD_TYPE.VAR_STRING, False, _lenenc_bytes(value.encode(encoding))
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return FIELD_TYPE.BLOB, False, _lenenc_bytes(bytes(value))
+    # datetime is a subclass of date
+    if isinstance(value, datetime.datetime):
+        return FIELD_TYPE.DATETIME, False, _encode_binary_datetime(value)
+    if isinstance(value, datetime.date):
+        return (
+            FIELD_TYPE.DATE,
+            False,
+            struct.pack("<BHBB", 4, value.year, value.month, value.day),
+        )
+    if isinstance(value, datetime.timedelta):
+        negative = value < datetime.timedelta(0)
+        if negative:
+            value = -value
+        seconds = value.seconds
+        data = _encode_binary_time(
+            negative,
+            value.days,
+            seconds // 3600,
+            seconds // 60 % 60,
+            seconds % 60,
+            value.microseconds,
+        )
+        return FIELD_TYPE.TIME, False, data
+    if isinstance(value, datetime.time):
+        data = _encode_binary_time(
+            False, 0, value.hour, value.minute, value.second, value.microsecond
+        )
+        return FIELD_TYPE.TIME, False, data
+    # Decimal and anything else is sent as its string representation
+    return FIELD_TYPE.VAR_STRING, False, _lenenc_bytes(str(value).encode(encoding))
@@ -6,6 +6,12 @@ document.getElementById("logoutBtn").addEventListener("click",function(){
         localStorage.removeItem("idToken");
         localStorage.removeItem("accessToken");
         localStorage.removeItem("refreshToken");
+        // 条件付きGET用に保存したレスポンス（conditional-fetch.js）も削除する
+        for (const key of Object.keys(sessionStorage)){
+            if (key.startsWith("etag:")){
+                sessionStorage.removeItem(key);
+            }
+        }
         // window.alert("ログアウトしました");
         window.location.href = "index.html";
     }
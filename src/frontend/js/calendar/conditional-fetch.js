@@ -0,0 +1,48 @@
+'use strict';
+
+// ETagを使った条件付きGET
+// 前回のレスポンス（ETagと本文）をsessionStorageに保存しておき、次回はIf-None-Matchを付けて問い合わせる
+// 予定が変わっていなければ、サーバは本文なしの304を返すので、保存しておいた本文を使う
+const STORAGE_PREFIX = "etag:";
+
+// 戻り値は { ok, status, body }（bodyはJSONをパースしたもの）
+export async function fetchWithETag(url, headers) {
+    const key = STORAGE_PREFIX + url;
+    let saved = null;
+    try {
+        saved = JSON.parse(sessionStorage.getItem(key));
+    } catch (error) {
+        saved = null;
+    }
+
+    // Accept: application/jsonの場合、大きいレスポンスは圧縮して返される
+    const requestHeaders = { "Accept": "application/json", ...headers };
+    if (saved && saved.etag) {
+        requestHeaders["If-None-Match"] = saved.etag;
+    }
+    // ブラウザのHTTPキャッシュは使わず、ETagと本文の対応はsessionStorageで管理する
+    const response = await fetch(url, {
+        method: "GET",
+        headers: requestHeaders,
+        cache: "no-store"
+    });
+
+    if (response.status === 304 && saved) {
+        return { ok: true, status: 304, body: saved.body };
+    }
+    if (!response.ok) {
+        return { ok: false, status: response.status, body: null };
+    }
+
+    const body = await response.json();
+    const etag = response.headers.get("ETag");
+    if (etag && body.status === "success") {
+        try {
+            sessionStorage.setItem(key, JSON.stringify({ etag: etag, body: body }));
+        } catch (error) {
+            // 容量を超えた場合は保存しない（次回は通常のGETになる）
+            console.log(error);
+        }
+    }
+    return { ok: true, status: response.status, body: body };
+}
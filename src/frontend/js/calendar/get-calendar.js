@@ -2,6 +2,7 @@
 'use strict';
 import { API_GATEWAY_URL } from '../config/api-gateway-config.js';
 import { escapeHtml } from './escape.js';
+import { fetchWithETag } from './conditional-fetch.js';
 
 let idToken = null;
 
@@ -67,14 +68,11 @@ async function displayCalendar(){
         return;
     }
 
+    // 前回から予定が変わっていなければ、304で本文を受け取らずに前回の結果を使う
     let response;
     try {
-        response = await fetch(`${apiGatewayBaseUrl}/get-calendar?start_date=${encodeURIComponent(start_date)}&end_date=${encodeURIComponent(end_date)}`,{
-            method: "GET",
-            headers: {
-                "Content-Type":"application/json", 
-                "Authorization": idToken
-            },
+        response = await fetchWithETag(`${apiGatewayBaseUrl}/get-calendar?start_date=${encodeURIComponent(start_date)}&end_date=${encodeURIComponent(end_date)}&format=compact`,{
+            "Authorization": idToken
         });
 
         if (!response.ok){
@@ -87,16 +85,42 @@ async function displayCalendar(){
         return;
     }
 
-    const bodyJson = await response.json();
+    const bodyJson = response.body;
     if (bodyJson.status === "success"){
         document.getElementById("nameplate").innerHTML = `<p>${escapeHtml(bodyJson.message.username)}さん、ログイン中</p>`
         // console.log(bodyJson.message.data);
-        create_rows(bodyJson.message.data);
+        create_rows(decodeCompactCalendar(bodyJson.message.data));
     } else {
         document.getElementById("section1").innerHTML = "<p>データが取得できませんでした</p>";
     }
 }
 
+// format=compactのレスポンスを、日ごとの行（date, weekday, holiday_name, events）のリストに戻す
+// 日付はstart_dateからの日数、曜日はweekday_namesの添字で表されている
+// 祝日・予定は、ある日だけが [日数, 値] で入っている（予定がない日は [null] とする）
+// missingの日（calendar_mに登録されていない日）は、行を作らない
+function decodeCompactCalendar(compact){
+    const holidays = new Map(compact.holidays);
+    const events = new Map(compact.events);
+    const missing = new Set(compact.missing ?? []);
+    const [yyyy, mm, dd] = compact.start_date ? compact.start_date.split("-").map(Number) : [];
+    const rows = [];
+    for (let offset = 0; offset < compact.days; offset++){
+        if (missing.has(offset)){
+            continue;
+        }
+        // UTCで計算し、タイムゾーン・夏時間の影響を受けないようにする
+        const day = new Date(Date.UTC(yyyy, mm - 1, dd + offset));
+        rows.push({
+            date: day.toISOString().slice(0, 10),
+            weekday: compact.weekday_names[(compact.first_weekday + offset) % 7],
+            holiday_name: holidays.get(offset) ?? null,
+            events: events.get(offset) ?? [null]
+        });
+    }
+    return rows;
+}
+
 // カレンダーの行を作成する関数
 function create_rows(data){
     const apiBaseUrl = "get-detail.html?date=";
@@ -1,6 +1,7 @@
 'use strict';
 import { API_GATEWAY_URL } from '../config/api-gateway-config.js';
 import { escapeHtml } from './escape.js';
+import { fetchWithETag } from './conditional-fetch.js';
 
 let idToken = "";
 
@@ -46,20 +47,18 @@ document.addEventListener("DOMContentLoaded", async () =>{
 
     document.getElementById("subTitle").innerHTML = `${escapeHtml(date)}の予定`;
     // 当該日の予定をAPIから取得して、テーブルで表示
+    // 前回から予定が変わっていなければ、304で本文を受け取らずに前回の結果を使う
     try {
-        const response = await fetch(apiUrl,{
-            method: "GET",
-            headers: {
-                // "Content-Type":"application/json", //GETのときにContent-Typeは不要
-                "Authorization": idToken
-            }
+        const response = await fetchWithETag(apiUrl,{
+            // "Content-Type":"application/json", //GETのときにContent-Typeは不要
+            "Authorization": idToken
         });
 
         if (!response.ok){
             throw new Error(`HTTP error: ${response.status}`);
         }
 
-        const bodyJson = await response.json();
+        const bodyJson = response.body;
         if (bodyJson.status === "success"){
             // console.log("success")
             console.log(bodyJson);
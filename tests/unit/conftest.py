@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Lambda Layerのモジュール（mypackage, pymysql）と、各Lambda関数のモジュールをimportできるようにする
+# （Layerは.envのPYTHONPATHと同じパス）
+ROOT_DIR = Path(__file__).resolve().parents[2]
+paths = [ROOT_DIR / "src/backend/layer/python", ROOT_DIR / "src/backend/layer2/python"]
+paths += sorted((ROOT_DIR / "src/backend/functions").iterdir())
+for path in map(str, paths):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+# pymysqlはLayerのものを使うため、パスを追加してからimportする
+from tests.unit.pymysql_stub import make_connection, stub_db_connection
+
+
+# モジュールのdb_connectionを、スタブの接続を返すものに置き換える
+# server: サーバの応答のバイト列（make_connectionで接続を作る）、作成済みの接続、またはNone（接続しないことを確認する）
+# 戻り値は、置き換えた接続
+@pytest.fixture
+def stub_db(monkeypatch):
+    def use(module, server):
+        conn = make_connection(server) if isinstance(server, bytes) else server
+        monkeypatch.setattr(module, "db_connection", stub_db_connection(conn))
+        return conn
+
+    return use
@@ -0,0 +1,172 @@
+import io
+import struct
+import datetime
+from contextlib import contextmanager
+
+from pymysql import connections
+from pymysql.constants import FIELD_TYPE
+from pymysql.cursors import Cursor
+
+
+# MySQLサーバの応答パケットを組み立てて、スタブのソケット経由でpymysqlに読ませるためのヘルパー
+
+UTF8MB4 = 255
+BINARY = 63
+
+
+def lenenc(b):
+    if len(b) < 251:
+        return bytes((len(b),)) + b
+    if len(b) < 2**16:
+        return b"\xfc" + struct.pack("<H", len(b)) + b
+    return b"\xfd" + struct.pack("<I", len(b))[:3] + b
+
+
+def lenenc_int(value):
+    if value < 251:
+        return bytes((value,))
+    if value < 2**16:
+        return b"\xfc" + struct.pack("<H", value)
+    if value < 2**24:
+        return b"\xfd" + struct.pack("<I", value)[:3]
+    return b"\xfe" + struct.pack("<Q", value)
+
+
+def field_packet(name, type_code, charsetnr, flags):
+    return (
+        lenenc(b"def") + lenenc(b"my_schedule_app_db") + lenenc(b"event_t") + lenenc(b"event_t")
+        + lenenc(name.encode()) + lenenc(name.encode())
+        + struct.pack("<BHIBHBxx", 0x0C, charsetnr, 255, type_code, flags, 0)
+    )
+
+
+EOF_PACKET = b"\xfe\x00\x00\x02\x00"
+
+
+def ok_packet(affected_rows = 0, insert_id = 0):
+    return b"\x00" + lenenc_int(affected_rows) + lenenc_int(insert_id) + b"\x02\x00\x00\x00"
+
+
+def error_packet(errno, message, sqlstate = b"HY000"):
+    return b"\xff" + struct.pack("<H", errno) + b"#" + sqlstate + message.encode()
+
+
+def text_row(row):
+    data = b""
+    for value in row:
+        if value is None:
+            data += b"\xfb"
+        else:
+            data += lenenc(str(value).encode())
+    return data
+
+
+def binary_row(row):
+    null_bitmap = bytearray((len(row) + 9) // 8)
+    values = b""
+    for i, value in enumerate(row):
+        if value is None:
+            null_bitmap[(i + 2) // 8] |= 1 << ((i + 2) % 8)
+        elif isinstance(value, int):
+            values += struct.pack("<I", value)
+        elif isinstance(value, datetime.date):
+            values += struct.pack("<BHBB", 4, value.year, value.month, value.day)
+        else:
+            values += lenenc(value.encode())
+    return b"\x00" + bytes(null_bitmap) + values
+
+
+def resultset(columns, rows, encode_row):
+    packets = [bytes((len(columns),))]
+    packets += [field_packet(*column) for column in columns]
+    packets.append(EOF_PACKET)
+    packets += [encode_row(row) for row in rows]
+    packets.append(EOF_PACKET)
+    return packets
+
+
+def prepare_ok(statement_id, columns, param_count):
+    packets = [b"\x00" + struct.pack("<IHHxH", statement_id, len(columns), param_count, 0)]
+    if param_count:
+        packets += [field_packet("?", FIELD_TYPE.VAR_STRING, UTF8MB4, 0)] * param_count
+        packets.append(EOF_PACKET)
+    if columns:
+        packets += [field_packet(*column) for column in columns]
+        packets.append(EOF_PACKET)
+    return packets
+
+
+def iter_wire(packets):
+    # 1コマンド分の応答を、シーケンス番号付きのバイト列として1パケットずつ返す
+    for seq, payload in enumerate(packets, start = 1):
+        yield struct.pack("<I", len(payload))[:3] + bytes((seq % 256,)) + payload
+
+
+def wire(*responses):
+    # コマンドごとの応答（パケットのリスト）を、シーケンス番号付きのバイト列にする
+    return b"".join(data for packets in responses for data in iter_wire(packets))
+
+
+class StubSocket:
+    # server_dataを、1回のrecv_intoで最大max_recvバイトずつ返す
+    def __init__(self, server_data = b"", max_recv = None):
+        self.sent = []
+        self.rfile = io.BytesIO(server_data)
+        self.max_recv = max_recv
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv_into(self, buffer):
+        size = len(buffer) if self.max_recv is None else min(len(buffer), self.max_recv)
+        return self.rfile.readinto(buffer[:size])
+
+    def sendall(self, data):
+        self.sent.append(data)
+
+    def close(self):
+        pass
+
+    def commands(self):
+        return [data[4] for data in self.sent]
+
+
+class StreamSocket(StubSocket):
+    # 応答をバイト列のイテレータから必要な分だけ取り出す（大きな結果セットを遅延生成して読ませる場合に使う）
+    def __init__(self, chunks):
+        super().__init__()
+        self.chunks = iter(chunks)
+        self.pending = b""
+
+    def recv_into(self, buffer):
+        if not self.pending:
+            self.pending = next(self.chunks, b"")
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+def make_connection(server_data, cursorclass = Cursor, max_recv = None, **options):
+    conn = connections.Connection(defer_connect = True, cursorclass = cursorclass, **options)
+    conn._sock = StubSocket(server_data, max_recv)
+    conn._rbuf = connections._ReceiveBuffer()
+    conn.server_status = 0
+    return conn
+
+
+# 各関数のdb_connectionに渡す接続情報（secret_id, region_name, rds_host, rds_database）。スタブの接続では使われない
+DB_ARGS = ("secret", "region", "host", "db")
+# 同じ接続情報を、SSMパラメータストアの設定（get_config）の形にしたもの
+DB_CONFIG = dict(zip(["secret_id", "region_name", "rds_host", "rds_database"], DB_ARGS))
+
+
+# db_connectionの代わりに、connを返すコンテキストマネージャ（connがNoneの場合は、接続しようとするとエラーにする）
+def stub_db_connection(conn):
+    @contextmanager
+    def db_connection(*args):
+        if conn is None:
+            raise AssertionError("should not connect")
+        yield conn
+
+    return db_connection
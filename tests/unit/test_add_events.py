@@ -0,0 +1,144 @@
+import json
+import datetime
+
+import pytest
+
+from pymysql.constants import COMMAND, FIELD_TYPE
+
+import add_events
+from tests.unit.pymysql_stub import BINARY, DB_ARGS, ok_packet, resultset, text_row, wire
+
+
+CALENDAR_COLUMNS = [("date", FIELD_TYPE.DATE, BINARY, 0)]
+EVENT = {"requestContext": {"authorizer": {"claims": {"sub": "user-1", "cognito:username": "user1"}}}}
+
+
+def call_add_events(events):
+    return add_events.add_events(events, "user-1", "user1", *DB_ARGS)
+
+
+def test_valid_events_are_inserted_with_one_statement(stub_db):
+    conn = stub_db(add_events, wire(
+        resultset(CALENDAR_COLUMNS, [(datetime.date(2025, 12, 28),), (datetime.date(2025, 12, 29),)], text_row),
+        [ok_packet(affected_rows = 3, insert_id = 10)],
+        [ok_packet(affected_rows = 1)],
+        [ok_packet()],
+    ))
+
+    results = call_add_events([
+        {"date": "2025-12-28", "event_name": " 会議 ", "event_detail": "第1会議室"},
+        {"date": "2025-12-32", "event_name": "不正な日付"},
+        {"date": "2025-12-29", "event_name": "買い物"},
+        "not an event",
+        {"date": "1900-01-01", "event_name": "カレンダーの範囲外"},
+        {"date": "2025-12-28", "event_name": "x" * 201},
+        {"date": "2025-12-29"},
+    ])
+
+    assert results == [
+        {"index": 0, "status": "success"},
+        {"index": 1, "status": "error", "message": "Invalid date"},
+        {"index": 2, "status": "success"},
+        {"index": 3, "status": "error", "message": "Invalid event"},
+        {"index": 4, "status": "error", "message": "Date out of range"},
+        {"index": 5, "status": "error", "message": "event_name is too long"},
+        {"index": 6, "status": "success"},
+    ]
+
+    sock = conn._sock
+    assert sock.commands() == [COMMAND.COM_QUERY] * 4
+    # 有効な3件を、1つの複数行INSERTでまとめてinsertし、更新回数を増やしてからコミットする
+    insert_sql = sock.sent[1][5:].decode()
+    assert insert_sql.count("('2025-12-") == 3
+    assert "('2025-12-28','会議','第1会議室','user-1','user1')" in insert_sql
+    assert "INSERT INTO user_revision_t" in sock.sent[2][5:].decode()
+    assert sock.sent[3][5:] == b"COMMIT"
+
+
+def test_invalid_events_only_do_not_connect(stub_db):
+    stub_db(add_events, None)
+    assert call_add_events([{"date": "x"}]) == [{"index": 0, "status": "error", "message": "Invalid date"}]
+
+
+@pytest.mark.parametrize("events, message", [
+    ([{"date": "2025-12-28"}] * (add_events.ADD_EVENTS_MAX + 1), f"Too many events (max {add_events.ADD_EVENTS_MAX})"),
+    ({"date": "2025-12-28"}, "Invalid events"),
+    ([], "No events found"),
+])
+def test_handler_rejects_invalid_request(monkeypatch, events, message):
+    monkeypatch.setattr("mypackage.api.get_config", lambda: {})
+    response = add_events.lambda_handler(dict(EVENT, body = json.dumps({"events": events})), None)
+    assert response["statusCode"] == 400
+    assert json.loads(response["body"])["message"] == message
+
+
+# ループバックの疑似MySQLサーバ（1コマンドごとにRTT分待ってから応答する）に対して、
+# add_eventと同じ1件ずつのinsert + commitと、add_eventsの一括insertのevents/secを比較する
+# （実際の1件ずつの登録では、さらに1件ごとにAPI Gateway、SSM、接続確認のオーバーヘッドがかかる）
+# LayerのパスをPYTHONPATHに設定し、python -m tests.unit.test_add_events で実行する
+if __name__ == "__main__":
+    import socket
+    import logging
+    import threading
+    import time
+
+    from pymysql import connections
+    from tests.unit.pymysql_stub import iter_wire, stub_db_connection
+
+    add_events.logger.setLevel(logging.INFO)
+    RTT = 0.0005
+    dates = [datetime.date(2025, 12, 1) + datetime.timedelta(days = i) for i in range(31)]
+    select_response = b"".join(iter_wire(resultset(CALENDAR_COLUMNS, [(d,) for d in dates], text_row)))
+    ok_response = b"".join(iter_wire([ok_packet(affected_rows = 1)]))
+
+    def recv_exactly(sock, size):
+        data = b""
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def serve(listener):
+        sock, _ = listener.accept()
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with sock:
+            while True:
+                header = recv_exactly(sock, 4)
+                if header is None:
+                    return
+                payload = recv_exactly(sock, int.from_bytes(header[:3], "little"))
+                time.sleep(RTT)
+                sock.sendall(select_response if payload[1:7] == b"SELECT" else ok_response)
+
+    def connect():
+        listener = socket.create_server(("127.0.0.1", 0))
+        server = threading.Thread(target = serve, args = (listener,), daemon = True)
+        server.start()
+        conn = connections.Connection(defer_connect = True)
+        conn._sock = socket.create_connection(listener.getsockname())
+        conn._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn._rbuf = connections._ReceiveBuffer()
+        conn.server_status = 0
+        return conn
+
+    def insert_one_by_one(conn, events):
+        for event in events:
+            with conn.cursor() as cur:
+                cur.execute(add_events.INSERT_EVENT_SQL, (event["date"], event["event_name"], event["event_detail"], "user-1", "user1"))
+            conn.commit()
+
+    def insert_batch(conn, events):
+        add_events.db_connection = stub_db_connection(conn)
+        call_add_events(events)
+
+    events = [{"date": str(dates[i % 31]), "event_name": f"予定{i}", "event_detail": "詳細" * 10} for i in range(add_events.ADD_EVENTS_MAX)]
+    for name, insert in [("single", insert_one_by_one), ("executemany", insert_batch)]:
+        conn = connect()
+        start = time.perf_counter()
+        for _ in range(10):
+            insert(conn, events)
+        seconds = time.perf_counter() - start
+        conn._sock.close()
+        print(f"{name}: {len(events) * 10 / seconds:,.0f} events/sec (RTT {RTT * 1e3:.1f} ms, {len(events)} events/request)")
@@ -0,0 +1,93 @@
+import json
+import gzip
+import zlib
+import base64
+
+import pytest
+
+from mypackage import api
+from mypackage.api import api_handler, parse_body, response_encoding
+
+
+CONFIG = {"secret_id": "secret", "region_name": "region", "rds_host": "host", "rds_database": "db"}
+CLAIMS = {"requestContext": {"authorizer": {"claims": {"sub": "user-1", "cognito:username": "user1"}}}}
+
+
+def make_event(headers):
+    return dict(CLAIMS, headers = headers, queryStringParameters = None)
+
+
+@pytest.mark.parametrize("headers, encoding", [
+    ({"Accept": "application/json", "Accept-Encoding": "gzip, deflate, br"}, "gzip"),
+    ({"accept": "application/json", "accept-encoding": "gzip;q=0, deflate"}, "deflate"),
+    ({"Accept": "application/json", "Accept-Encoding": "*"}, "gzip"),
+    ({"Accept": "application/json", "Accept-Encoding": "br"}, None),
+    ({"Accept": "application/json"}, None),
+    # API Gatewayがバイナリに戻さないリクエストは圧縮しない
+    ({"Accept": "*/*", "Accept-Encoding": "gzip"}, None),
+    (None, None),
+])
+def test_response_encoding(headers, encoding):
+    assert response_encoding(make_event(headers)) == encoding
+
+
+def test_large_response_is_compressed_and_small_one_is_not(monkeypatch):
+    monkeypatch.setattr("mypackage.api.get_config", lambda: CONFIG)
+    data = [{"date": f"2025-12-{day:02}", "weekday": "月", "holiday_name": None, "events": ["会議"]} for day in range(1, 32)]
+
+    @api_handler()
+    def handler(request):
+        return {"username": request.user_name, "data": data[:int(request.params.get("days", 31))]}
+
+    headers = {"Accept": "application/json", "Accept-Encoding": "gzip"}
+    plain = handler(make_event(None), None)
+    compressed = handler(make_event(headers), None)
+    assert "isBase64Encoded" not in plain
+    assert compressed["isBase64Encoded"] and compressed["headers"]["Content-Encoding"] == "gzip"
+    assert gzip.decompress(base64.b64decode(compressed["body"])).decode() == plain["body"]
+    assert len(base64.b64decode(compressed["body"])) < len(plain["body"].encode()) // 4
+
+    small = handler(dict(make_event(headers), queryStringParameters = {"days": "1"}), None)
+    assert len(small["body"].encode()) < api.COMPRESSION_MIN_BYTES
+    assert "Content-Encoding" not in small["headers"]
+
+    deflated = handler(make_event({"Accept": "application/json", "Accept-Encoding": "deflate"}), None)
+    assert zlib.decompress(base64.b64decode(deflated["body"])).decode() == plain["body"]
+
+
+def test_parse_body_decodes_base64_body():
+    body = json.dumps({"event_name": "会議"}, ensure_ascii = False)
+    event = {"body": base64.b64encode(body.encode()).decode(), "isBase64Encoded": True}
+    assert parse_body(event) == {"event_name": "会議"}
+    with pytest.raises(api.ApiError):
+        parse_body({"body": base64.b64encode(b"\xff\xfe").decode(), "isBase64Encoded": True})
+
+
+# 1か月・3か月・12か月分のカレンダー（平日は1日2件の予定）のレスポンスについて、
+# 本文のサイズと、JSONへの変換・圧縮・base64変換の時間を比較する
+# LayerのパスをPYTHONPATHに設定し、python -m tests.unit.test_api_compression で実行する
+if __name__ == "__main__":
+    import timeit
+    import datetime
+
+    from mypackage.api import build_response
+    from mypackage.holiday_index import WEEKDAY_NAMES
+
+    def make_calendar(days):
+        start_date = datetime.date(2025, 1, 1)
+        result = []
+        for i in range(days):
+            day = start_date + datetime.timedelta(days = i)
+            events = ["定例会議", f"打ち合わせ（案件{i % 7}）"] if day.weekday() < 5 else [None]
+            holiday_name = "海の日" if i % 30 == 0 else None
+            result.append({"date": day.strftime("%Y-%m-%d"), "weekday": WEEKDAY_NAMES[day.weekday()], "holiday_name": holiday_name, "events": events})
+        return {"username": "user1", "data": result}
+
+    for label, days in [("1 month", 31), ("3 months", 92), ("12 months", 365)]:
+        message = make_calendar(days)
+        for encoding in [None, "gzip", "deflate"]:
+            response = build_response(200, "success", message, encoding = encoding)
+            body = base64.b64decode(response["body"]) if response.get("isBase64Encoded") else response["body"].encode()
+            number = 200
+            seconds = timeit.timeit(lambda: build_response(200, "success", message, encoding = encoding), number = number)
+            print(f"{label:9} {encoding or 'identity':8}: {len(body):7} bytes, {seconds / number * 1e6:8.1f} us")
@@ -0,0 +1,175 @@
+import json
+import datetime
+
+import pytest
+
+from mypackage.calendar_cache import CacheBackend, CalendarCache, LruCacheBackend, bump_user_revision
+
+
+# user_revision_tだけを持つDBのふりをするカーソル
+class StubCursor:
+    def __init__(self):
+        self.revisions = {}
+        self.queries = 0
+
+    def execute(self, sql, args):
+        self.queries += 1
+        (user_id,) = args
+        if sql.lstrip().startswith("INSERT"):
+            self.revisions[user_id] = self.revisions.get(user_id, 0) + 1
+            self.row = None
+        else:
+            self.row = (self.revisions[user_id],) if user_id in self.revisions else None
+
+    def fetchone(self):
+        return self.row
+
+
+START = datetime.date(2025, 12, 1)
+END = datetime.date(2026, 1, 1)
+
+
+def test_lru_backend_evicts_least_recently_used():
+    backend = LruCacheBackend(max_days = 2)
+    backend.set("a", [1])
+    backend.set("b", [2])
+    assert backend.get("a") == [1]
+    backend.set("c", [3])
+    assert backend.get("b") is None
+    assert backend.get("a") == [1] and backend.get("c") == [3]
+    assert len(backend) == 2
+
+
+def test_lru_backend_is_bounded_by_days():
+    backend = LruCacheBackend(max_days = 62)
+    backend.set("nov", [None] * 30)
+    backend.set("dec", [None] * 31)
+    # 同じキーの置き換えでは、古い値の日数を数えない
+    backend.set("dec", [None] * 31)
+    assert (len(backend), backend.days) == (2, 61)
+    # 2か月分を追加すると、古いものから合計62日以内になるまで追い出す
+    backend.set("jan-feb", [None] * 59)
+    assert backend.get("nov") is None and backend.get("dec") is None
+    assert (len(backend), backend.days) == (1, 59)
+    # 1件でmax_daysを超えるものは保持せず、他も追い出さない
+    backend.set("year", [None] * 365)
+    assert backend.get("year") is None and backend.get("jan-feb") is not None
+
+
+def test_lru_backend_with_size_zero_does_not_cache():
+    backend = LruCacheBackend(max_days = 0)
+    backend.set("a", [1])
+    assert backend.get("a") is None
+
+
+# 外部のキャッシュ（Redis等）のように、値をJSONの文字列で保存するバックエンド
+class JsonCacheBackend(CacheBackend):
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        data = self.store.get(key)
+        return None if data is None else json.loads(data)
+
+    def set(self, key, value):
+        self.store[key] = json.dumps(value)
+
+
+def test_calendar_cache_with_another_backend():
+    cur = StubCursor()
+    backend = JsonCacheBackend()
+    cache = CalendarCache(backend)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return [{"date": "2025-12-01", "weekday": "月", "holiday_name": None, "events": [None]}]
+
+    first = cache.get_or_load(cur, "user-1", START, END, load)
+    assert cache.get_or_load(cur, "user-1", START, END, load) == first
+    assert len(loads) == 1 and list(backend.store) == ["calendar:user-1:2025-12-01:2026-01-01:0"]
+
+
+def test_backend_must_implement_get_and_set():
+    class GetOnlyBackend(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnlyBackend()
+
+
+def test_cache_is_invalidated_by_user_revision():
+    cur = StubCursor()
+    cache = CalendarCache(LruCacheBackend())
+    loads = []
+
+    def load():
+        loads.append(1)
+        return [{"date": "2025-12-01", "events": [len(loads)]}]
+
+    first = cache.get_or_load(cur, "user-1", START, END, load)
+    assert cache.get_or_load(cur, "user-1", START, END, load) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # 他のユーザーの更新では無効にならない
+    bump_user_revision(cur, "user-2")
+    assert cache.get_or_load(cur, "user-1", START, END, load) is first
+
+    # 予定を追加・更新・削除すると、次の取得で読み直す
+    bump_user_revision(cur, "user-1")
+    assert cache.get_or_load(cur, "user-1", START, END, load) == [{"date": "2025-12-01", "events": [2]}]
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert CalendarCache.make_key("user-1", START, END, 1) == "calendar:user-1:2025-12-01:2026-01-01:1"
+
+
+# get-calendar.jsの月移動（前月・翌月・当月に戻る）を再現したトレースを流し、
+# キャッシュあり/なしのヒット率と、1リクエストあたりの処理時間のp50/p99を表示する
+# DBの処理時間は、更新回数の取得（主キー検索）とカレンダーの取得にそれぞれ固定の遅延を入れて模擬する
+# LayerのパスをPYTHONPATHに設定し、python -m tests.unit.test_calendar_cache で実行する
+if __name__ == "__main__":
+    import random
+    import statistics
+    import time
+
+    REVISION_LATENCY = 0.0005
+    CALENDAR_LATENCY = 0.004
+
+    class LatencyCursor(StubCursor):
+        def execute(self, sql, args):
+            time.sleep(REVISION_LATENCY)
+            super().execute(sql, args)
+
+    def month_range(offset):
+        year, month = divmod(2025 * 12 + 11 + offset, 12)
+        start = datetime.date(year, month + 1, 1)
+        return start, (start + datetime.timedelta(days = 32)).replace(day = 1)
+
+    def load():
+        time.sleep(CALENDAR_LATENCY)
+        return [{"date": "2025-12-01", "weekday": "月", "holiday_name": None, "events": [None]}]
+
+    # 前月・翌月への移動と、当月に戻る操作。10%の確率で予定を追加・更新・削除する
+    rng = random.Random(0)
+    trace = []
+    offset = 0
+    for _ in range(1000):
+        offset = rng.choices([offset - 1, offset + 1, 0], weights = [45, 45, 10])[0]
+        trace.append((offset, rng.random() < 0.1))
+
+    for name, max_days in [("no cache", 0), ("lru", 8192)]:
+        cur = LatencyCursor()
+        cache = CalendarCache(LruCacheBackend(max_days))
+        latencies = []
+        for offset, write in trace:
+            start_date, end_date = month_range(offset)
+            started = time.perf_counter()
+            cache.get_or_load(cur, "user-1", start_date, end_date, load)
+            latencies.append(time.perf_counter() - started)
+            if write:
+                bump_user_revision(cur, "user-1")
+        quantiles = statistics.quantiles(latencies, n = 100)
+        print(
+            f"{name}: hit rate {cache.hits / len(trace):.1%}, "
+            f"p50 {quantiles[49] * 1e3:.2f} ms, p99 {quantiles[98] * 1e3:.2f} ms"
+        )
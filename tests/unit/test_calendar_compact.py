@@ -0,0 +1,117 @@
+import json
+import datetime
+
+import pytest
+
+import get_calendar
+from mypackage import calendar_cache
+from mypackage.calendar_cache import CalendarCache, LruCacheBackend
+from mypackage.holiday_index import invalidate_holiday_index
+from tests.unit.test_conditional_get import CONFIG, RevisionCursor, StubConnection, request
+
+
+# get-calendar.jsのdecodeCompactCalendarと同じ手順で、日ごとのリストに戻す
+def decode_compact(compact):
+    holidays = dict(compact["holidays"])
+    events = dict(compact["events"])
+    missing = set(compact["missing"])
+    rows = []
+    for offset in range(compact["days"]):
+        if offset in missing:
+            continue
+        day = datetime.date.fromisoformat(compact["start_date"]) + datetime.timedelta(days = offset)
+        rows.append({
+            "date": day.strftime("%Y-%m-%d"),
+            "weekday": compact["weekday_names"][(compact["first_weekday"] + offset) % 7],
+            "holiday_name": holidays.get(offset),
+            "events": events.get(offset, [None]),
+        })
+    return rows
+
+
+def setup_function():
+    invalidate_holiday_index()
+
+
+def test_compact_round_trips_to_days():
+    days = get_calendar.get_calendar_index(RevisionCursor(), datetime.date(2025, 10, 27), datetime.date(2026, 1, 4), "user-1")
+    compact = get_calendar.to_compact(days)
+
+    assert compact["start_date"] == "2025-10-27" and compact["days"] == len(days) == 70
+    assert compact["holidays"] == [[7, "文化の日"], [28, "休日"], [66, "元日"]]
+    assert compact["events"] == [[7, ["会議", "買い物"]], [34, ["大掃除"]]]
+    assert decode_compact(json.loads(json.dumps(compact, ensure_ascii = False))) == days
+    assert compact["missing"] == []
+    assert get_calendar.to_compact([])["days"] == 0
+
+
+def test_compact_keeps_dates_after_a_gap():
+    # calendar_mに 2025-11-04〜2025-11-06 がなく、日ごとのリストが連続していない場合
+    days = get_calendar.get_calendar_index(RevisionCursor(), datetime.date(2025, 11, 1), datetime.date(2025, 11, 10), "user-1")
+    days = [day for day in days if not "2025-11-04" <= day["date"] <= "2025-11-06"]
+    days[-1]["holiday_name"] = "休日"
+
+    compact = get_calendar.to_compact(days)
+
+    assert compact["days"] == 10 and compact["missing"] == [3, 4, 5]
+    assert compact["holidays"][-1] == [9, "休日"]
+    assert decode_compact(json.loads(json.dumps(compact, ensure_ascii = False))) == days
+
+
+def test_handler_returns_compact_format_with_its_own_etag(monkeypatch, stub_db):
+    monkeypatch.setattr("mypackage.api.get_config", lambda: CONFIG)
+    stub_db(get_calendar, StubConnection(RevisionCursor()))
+    monkeypatch.setattr(calendar_cache, "_calendar_cache", CalendarCache(LruCacheBackend()))
+    params = {"start_date": "2025-11-01", "end_date": "2025-12-01"}
+
+    days = request(get_calendar.lambda_handler, params)
+    compact = request(get_calendar.lambda_handler, dict(params, format = "compact"))
+    assert decode_compact(json.loads(compact["body"])["message"]["data"]) == json.loads(days["body"])["message"]["data"]
+    assert compact["headers"]["ETag"] != days["headers"]["ETag"]
+    assert request(get_calendar.lambda_handler, dict(params, format = "compact"), compact["headers"]["ETag"])["statusCode"] == 304
+    assert request(get_calendar.lambda_handler, dict(params, format = "compact"), days["headers"]["ETag"])["statusCode"] == 200
+
+
+@pytest.mark.parametrize("response_format", ["csv", "COMPACT"])
+def test_handler_rejects_unknown_format(monkeypatch, response_format):
+    monkeypatch.setattr("mypackage.api.get_config", lambda: {})
+    response = request(get_calendar.lambda_handler, {"start_date": "2025-11-01", "end_date": "2025-12-01", "format": response_format})
+    assert response["statusCode"] == 400
+    assert json.loads(response["body"])["message"] == "Invalid format"
+
+
+# 1か月・3か月・12か月分のカレンダー（平日は1日2件の予定）について、
+# 日ごとの形式とcompact形式の本文のサイズ（gzip圧縮後も）と、JSONへの変換・JSONからの復元の時間を比較する
+# compactの変換時間はto_compactを、復元時間はdecode_compact（get-calendar.jsと同じ手順）を含む
+# Layerと各関数のパス（conftest.pyでsys.pathに加えるもの）をPYTHONPATHに設定し、python -m tests.unit.test_calendar_compact で実行する
+if __name__ == "__main__":
+    import gzip
+    import timeit
+
+    from mypackage.holiday_index import WEEKDAY_NAMES
+
+    def make_days(count):
+        start_date = datetime.date(2025, 1, 1)
+        result = []
+        for i in range(count):
+            day = start_date + datetime.timedelta(days = i)
+            events = ["定例会議", f"打ち合わせ（案件{i % 7}）"] if day.weekday() < 5 else [None]
+            holiday_name = "海の日" if i % 30 == 0 else None
+            result.append({"date": day.strftime("%Y-%m-%d"), "weekday": WEEKDAY_NAMES[day.weekday()], "holiday_name": holiday_name, "events": events})
+        return result
+
+    number = 200
+    for label, count in [("1 month", 31), ("3 months", 92), ("12 months", 365)]:
+        days = make_days(count)
+        shapes = [
+            ("days", lambda: json.dumps(days, ensure_ascii = False), json.loads),
+            ("compact", lambda: json.dumps(get_calendar.to_compact(days), ensure_ascii = False), lambda body: decode_compact(json.loads(body))),
+        ]
+        for name, encode, decode in shapes:
+            body = encode()
+            assert decode(body) == days
+            encode_seconds = timeit.timeit(encode, number = number) / number
+            decode_seconds = timeit.timeit(lambda: decode(body), number = number) / number
+            size = len(body.encode())
+            gzip_size = len(gzip.compress(body.encode(), 6))
+            print(f"{label:9} {name:7}: {size:6} bytes ({gzip_size:5} gzip), encode {encode_seconds * 1e6:7.1f} us, decode {decode_seconds * 1e6:7.1f} us")
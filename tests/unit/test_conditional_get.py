@@ -0,0 +1,133 @@
+import json
+import datetime
+
+import pytest
+
+from pymysql.constants import FIELD_TYPE, FLAG
+
+import get_calendar
+import get_detail
+from mypackage import calendar_cache
+from mypackage.calendar_cache import CalendarCache, LruCacheBackend
+from mypackage.holiday_index import invalidate_holiday_index
+from tests.unit.pymysql_stub import BINARY, UTF8MB4, resultset, text_row, wire
+from tests.unit.test_holiday_index import StubCursor
+
+
+CONFIG = {"secret_id": "secret", "region_name": "region", "rds_host": "host", "rds_database": "db"}
+CLAIMS = {"requestContext": {"authorizer": {"claims": {"sub": "user-1", "cognito:username": "user1"}}}}
+REVISION_COLUMNS = [("revision", FIELD_TYPE.LONGLONG, BINARY, FLAG.UNSIGNED)]
+
+
+# test_holiday_indexのDBに、user_revision_tを加えたもの
+class RevisionCursor(StubCursor):
+    def __init__(self):
+        super().__init__()
+        self.revisions = {}
+
+    def execute(self, sql, args = None):
+        if "FROM user_revision_t" in sql:
+            self.queries.append(" ".join(sql.split()))
+            (user_id,) = args
+            self.rows = [(self.revisions[user_id],)] if user_id in self.revisions else []
+        else:
+            super().execute(sql, args)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+
+class StubConnection:
+    def __init__(self, cur):
+        self.cur = cur
+
+    def cursor(self):
+        return self.cur
+
+
+def setup_function():
+    invalidate_holiday_index()
+
+
+@pytest.fixture(autouse = True)
+def config(monkeypatch):
+    monkeypatch.setattr("mypackage.api.get_config", lambda: CONFIG)
+
+
+def request(handler, params, etag = None):
+    return handler(dict(CLAIMS, queryStringParameters = params, headers = {"If-None-Match": etag} if etag else None), None)
+
+
+def test_calendar_navigation_saves_bytes_with_if_none_match(monkeypatch, stub_db):
+    cur = RevisionCursor()
+    stub_db(get_calendar, StubConnection(cur))
+    monkeypatch.setattr(calendar_cache, "_calendar_cache", CalendarCache(LruCacheBackend()))
+
+    # 月の表示を行き来し、途中で予定を1件追加する（追加後は、表示中の月も取り直す）
+    months = [("2025-11-01", "2025-12-01"), ("2025-12-01", "2026-01-01")]
+    session = [0, 1, 0, 1, "write", 1, 0, 1, 0]
+    browser = {}
+    sent = full = reused = 0
+    statuses = []
+    for step in session:
+        if step == "write":
+            cur.revisions["user-1"] = cur.revisions.get("user-1", 0) + 1
+            continue
+        start_date, end_date = months[step]
+        params = {"start_date": start_date, "end_date": end_date}
+        saved = browser.get(step)
+        response = request(get_calendar.lambda_handler, params, saved and saved[0])
+        statuses.append(response["statusCode"])
+        sent += len(response["body"].encode())
+
+        if response["statusCode"] == 304:
+            assert response["body"] == "" and response["headers"]["ETag"] == saved[0]
+            body = saved[1]
+            reused += len(body.encode())
+        else:
+            body = response["body"]
+            browser[step] = (response["headers"]["ETag"], body)
+        # If-None-Matchなしで取得した場合の本文と同じ内容が使われる
+        expected = request(get_calendar.lambda_handler, params)["body"]
+        assert body == expected
+        full += len(expected.encode())
+
+    assert statuses == [200, 200, 304, 304, 200, 200, 304, 304]
+    # 304の分だけ、本文を転送せずに済んでいる（この操作では半分）
+    assert full - sent == reused
+    assert reused * 2 >= full
+
+
+def test_not_modified_skips_event_query(monkeypatch, stub_db):
+    cur = RevisionCursor()
+    stub_db(get_calendar, StubConnection(cur))
+    monkeypatch.setattr(calendar_cache, "_calendar_cache", CalendarCache(LruCacheBackend(max_days = 0)))
+    params = {"start_date": "2025-11-01", "end_date": "2025-12-01"}
+
+    etag = request(get_calendar.lambda_handler, params)["headers"]["ETag"]
+    assert etag.startswith('W/"')
+    cur.queries.clear()
+    assert request(get_calendar.lambda_handler, params, f'"other", {etag}')["statusCode"] == 304
+    assert not any("event_t" in query for query in cur.queries)
+
+    # 他の期間のETagとは一致しない
+    other = request(get_calendar.lambda_handler, {"start_date": "2025-12-01", "end_date": "2026-01-01"}, etag)
+    assert other["statusCode"] == 200 and other["headers"]["ETag"] != etag
+
+
+def test_get_detail_answers_304_with_revision_query_only(stub_db):
+    rows = [(3, datetime.date(2025, 12, 28), "会議", "第1会議室")]
+    columns = [
+        ("event_id", FIELD_TYPE.LONG, BINARY, FLAG.UNSIGNED),
+        ("date", FIELD_TYPE.DATE, BINARY, 0),
+        ("event_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+        ("event_detail", FIELD_TYPE.BLOB, UTF8MB4, 0),
+    ]
+    stub_db(get_detail, wire(resultset(REVISION_COLUMNS, [(7,)], text_row), resultset(columns, rows, text_row)))
+    first = request(get_detail.lambda_handler, {"date": "2025-12-28"})
+    assert json.loads(first["body"])["message"]["data"][0]["event_name"] == "会議"
+
+    conn = stub_db(get_detail, wire(resultset(REVISION_COLUMNS, [(7,)], text_row)))
+    second = request(get_detail.lambda_handler, {"date": "2025-12-28"}, first["headers"]["ETag"])
+    assert second["statusCode"] == 304 and second["body"] == ""
+    assert len(conn._sock.sent) == 1
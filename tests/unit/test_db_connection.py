@@ -0,0 +1,144 @@
+import struct
+
+import pytest
+
+from pymysql import err
+from pymysql.constants import COMMAND
+
+from mypackage import db
+from mypackage.db import ConnectionManager
+from tests.unit.pymysql_stub import error_packet, make_connection, wire
+
+
+# サーバのステータスが0（autocommitがオフ）のOKパケット
+OK = [b"\x00\x00\x00" + struct.pack("<HH", 0, 0)]
+# autocommitがオンのOKパケット（ok_packetと同じ）
+OK_AUTOCOMMIT = [b"\x00\x00\x00" + struct.pack("<HH", 2, 0)]
+
+
+# retry_on_access_denied(func)で、取得したシークレットをfuncに渡すだけのスタブ
+class StubSecretProvider:
+    def __init__(self):
+        self.calls = 0
+
+    def retry_on_access_denied(self, func):
+        self.calls += 1
+        return func({"username": "user", "password": f"password-{self.calls}"})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"now": 1000.0}
+    monkeypatch.setattr(db.time, "monotonic", lambda: now["now"])
+    return now
+
+
+# pymysql.connectが、server_datasの応答を順に返すスタブの接続を作るようにする
+@pytest.fixture
+def connections(monkeypatch):
+    def use(*server_datas):
+        conns = [make_connection(server_data) for server_data in server_datas]
+        pending = iter(conns)
+        monkeypatch.setattr(db.pymysql, "connect", lambda **kwargs: next(pending))
+        return conns
+
+    return use
+
+
+def make_manager():
+    return ConnectionManager("host", "db", StubSecretProvider(), prepared_statements = False)
+
+
+def queries(conn):
+    return [data[5:].decode() for data in conn.sent]
+
+
+def test_connection_is_reused_without_ping_within_idle_window(clock, connections):
+    [conn] = connections(wire(OK, OK))
+    sock = conn._sock
+    manager = make_manager()
+
+    with manager.connection() as first:
+        pass
+    clock["now"] += db.IDLE_CHECK_SECONDS - 1
+    with manager.connection() as second:
+        pass
+
+    assert first is second is conn
+    assert manager.secret_provider.calls == 1
+    # 利用後のROLLBACKだけで、pingは送らない
+    assert queries(sock) == ["ROLLBACK", "ROLLBACK"]
+
+
+def test_idle_connection_is_pinged_before_use(clock, connections):
+    [conn] = connections(wire(OK, OK, OK))
+    sock = conn._sock
+    manager = make_manager()
+
+    with manager.connection():
+        pass
+    clock["now"] += db.IDLE_CHECK_SECONDS
+    with manager.connection() as second:
+        pass
+
+    assert second is conn
+    assert manager.secret_provider.calls == 1
+    assert sock.commands() == [COMMAND.COM_QUERY, COMMAND.COM_PING, COMMAND.COM_QUERY]
+
+
+def test_failed_ping_reconnects_through_secret_provider(clock, connections):
+    first, second = connections(wire(OK, [error_packet(1053, "Server shutdown in progress")]), wire(OK))
+    first_sock = first._sock
+
+    # pingの中の再接続も失敗する（パスワードのローテーション後など）
+    def connect():
+        raise err.OperationalError(1045, "Access denied")
+
+    first.connect = connect
+    manager = make_manager()
+
+    with manager.connection():
+        pass
+    clock["now"] += db.IDLE_CHECK_SECONDS
+    with manager.connection() as conn:
+        pass
+
+    assert conn is second
+    assert manager.secret_provider.calls == 2
+    # 古い接続はCOM_QUITを送って閉じる
+    assert first_sock.commands() == [COMMAND.COM_QUERY, COMMAND.COM_PING, COMMAND.COM_QUIT]
+    assert not first.open
+
+
+def test_rollback_after_success_and_after_error(connections):
+    # 2回目のROLLBACKでautocommitがオンと返るため、オフに戻す
+    [conn] = connections(wire(OK, OK_AUTOCOMMIT, OK))
+    sock = conn._sock
+    manager = make_manager()
+
+    with manager.connection():
+        pass
+    with pytest.raises(RuntimeError):
+        with manager.connection():
+            raise RuntimeError("handler failed")
+
+    assert queries(sock) == ["ROLLBACK", "ROLLBACK", "SET AUTOCOMMIT = 0"]
+    assert manager._conn is conn
+
+
+def test_failed_rollback_drops_connection_and_next_call_reconnects(connections):
+    first, second = connections(wire([error_packet(2013, "Lost connection")]), wire(OK))
+    first_sock = first._sock
+    manager = make_manager()
+
+    with manager.connection():
+        pass
+
+    assert manager._conn is None and not first.open
+    assert first_sock.commands() == [COMMAND.COM_QUERY, COMMAND.COM_QUIT]
+
+    with manager.connection() as conn:
+        pass
+
+    assert conn is second
+    assert manager.secret_provider.calls == 2
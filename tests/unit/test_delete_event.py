@@ -0,0 +1,80 @@
+import json
+import datetime
+
+import pytest
+
+import delete_event
+from tests.unit.pymysql_stub import DB_ARGS, ok_packet, wire
+
+
+EVENT = {"requestContext": {"authorizer": {"claims": {"sub": "user-1", "cognito:username": "user1"}}}}
+
+
+# seeded件の予定があるテーブルに対して、DELETE ... LIMIT、更新回数の更新（削除した場合のみ）、COMMITを繰り返した場合のサーバの応答
+def chunked_delete_responses(seeded, chunk_size):
+    responses = []
+    while True:
+        count = min(seeded, chunk_size)
+        seeded -= count
+        responses.append([ok_packet(affected_rows = count)])
+        if count:
+            responses.append([ok_packet(affected_rows = 1)])
+        responses.append([ok_packet()])
+        if count < chunk_size:
+            return responses
+
+
+def call_delete(start_date = None, end_date = None, event_name = None):
+    return delete_event.delete_events_by_filter("user-1", start_date, end_date, event_name, *DB_ARGS)
+
+
+def test_make_like_pattern():
+    assert delete_event.make_like_pattern("100%_達成\\") == "%100\\%\\_達成\\\\%"
+
+
+def test_bulk_delete_of_100k_events_commits_each_chunk(stub_db):
+    seeded = 100000
+    conn = stub_db(delete_event, wire(*chunked_delete_responses(seeded, delete_event.DELETE_CHUNK_SIZE)))
+
+    result = call_delete(datetime.date(2000, 1, 1), datetime.date(2099, 12, 31), "会議")
+
+    assert result["deleted"] == seeded
+    assert result["completed"]
+    chunks = result["chunks"]
+    assert len(chunks) == seeded // delete_event.DELETE_CHUNK_SIZE + 1
+    assert max(chunk["deleted"] for chunk in chunks) == delete_event.DELETE_CHUNK_SIZE
+    # ロックはチャンクごとのCOMMITで解放される（DELETEの開始からCOMMITの完了まで）
+    lock_seconds = [chunk["seconds"] for chunk in chunks]
+    assert max(lock_seconds) < 0.1
+
+    queries = [data[5:].decode() for data in conn._sock.sent]
+    assert queries[0] == (
+        "DELETE FROM event_t WHERE `user_id` = 'user-1' AND `date` >= '2000-01-01' AND `date` <= '2099-12-31' "
+        "AND `event_name` LIKE '%会議%' ORDER BY `date`, `event_name` LIMIT 1000"
+    )
+    # 1トランザクションで削除するのは1チャンクだけ
+    full_chunk = queries[:3]
+    assert "INSERT INTO user_revision_t" in full_chunk[1] and full_chunk[2] == "COMMIT"
+    assert queries == full_chunk * (len(chunks) - 1) + [queries[0], "COMMIT"]
+
+
+def test_bulk_delete_stops_at_time_limit(monkeypatch, stub_db):
+    monkeypatch.setattr(delete_event, "DELETE_TIME_LIMIT_SECONDS", 0)
+    stub_db(delete_event, wire(*chunked_delete_responses(5000, delete_event.DELETE_CHUNK_SIZE)))
+
+    result = call_delete(event_name = "会議")
+    assert result["deleted"] == delete_event.DELETE_CHUNK_SIZE
+    assert not result["completed"]
+
+
+@pytest.mark.parametrize("body, message", [
+    ({}, "No event_ids"),
+    ({"event_name": ""}, "No event_ids"),
+    ({"start_date": "2025-12-31", "end_date": "2025-12-01"}, "Invalid date range"),
+    ({"start_date": "2025/12/01"}, "Invalid start_date"),
+])
+def test_handler_rejects_invalid_filter(monkeypatch, body, message):
+    monkeypatch.setattr("mypackage.api.get_config", lambda: {})
+    response = delete_event.lambda_handler(dict(EVENT, body = json.dumps(body)), None)
+    assert response["statusCode"] == 400
+    assert json.loads(response["body"])["message"] == message
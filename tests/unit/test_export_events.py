@@ -0,0 +1,295 @@
+import csv
+import io
+import json
+import datetime
+import itertools
+import tracemalloc
+
+import pytest
+
+from pymysql.constants import COMMAND, FIELD_TYPE, FLAG
+
+import export_events
+from tests.unit.pymysql_stub import (
+    BINARY, DB_CONFIG, EOF_PACKET, UTF8MB4, StreamSocket, field_packet, iter_wire, make_connection, text_row,
+)
+
+
+COLUMNS = [
+    ("event_id", FIELD_TYPE.LONG, BINARY, FLAG.UNSIGNED),
+    ("date", FIELD_TYPE.DATE, BINARY, 0),
+    ("event_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ("event_detail", FIELD_TYPE.BLOB, UTF8MB4, 0),
+]
+ROWS = [
+    (1, "2025-12-28", "会議", "第1会議室, \"A\""),
+    (2, "2025-12-28", "買い物", None),
+]
+
+
+# アップロードされたパートの大きさを記録するスタブ（keep_bodyがTrueの場合のみデータも保持する）
+class StubS3:
+    def __init__(self, keep_body = False):
+        self.keep_body = keep_body
+        self.calls = []
+        self.sizes = []
+        self.body = b""
+        self.bodies = set()
+
+    def _receive(self, body):
+        # パートのBodyはファイルのように読む（バッファのオブジェクトも記録する）
+        self.bodies.add(id(body))
+        data = body.read() if hasattr(body, "read") else body
+        self.sizes.append(len(data))
+        if self.keep_body:
+            self.body += data
+
+    def put_object(self, Bucket, Key, Body, ContentType):
+        self.calls.append("put_object")
+        self._receive(Body)
+
+    def create_multipart_upload(self, Bucket, Key, ContentType):
+        self.calls.append("create_multipart_upload")
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.calls.append("upload_part")
+        self._receive(Body)
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.calls.append("complete_multipart_upload")
+        assert [part["PartNumber"] for part in MultipartUpload["Parts"]] == list(range(1, len(self.sizes) + 1))
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append("abort_multipart_upload")
+
+
+# 結果セットの行を、読み込まれる直前に1行ずつ生成する接続
+def make_streaming_connection(rows):
+    packets = itertools.chain(
+        [bytes((len(COLUMNS),))],
+        [field_packet(*column) for column in COLUMNS],
+        [EOF_PACKET],
+        map(text_row, rows),
+        [EOF_PACKET],
+    )
+    conn = make_connection(b"")
+    conn._sock = StreamSocket(iter_wire(packets))
+    return conn
+
+
+def seeded_rows(num_rows):
+    start = datetime.date(2000, 1, 1)
+    for i in range(num_rows):
+        yield (i + 1, start + datetime.timedelta(days = i // 5), f"予定{i}", "詳細" * (i % 20) or None)
+
+
+def run_export(monkeypatch, rows, export_format, s3 = None):
+    s3 = s3 or StubS3(keep_body = True)
+    monkeypatch.setattr(export_events, "s3", s3)
+    conn = make_streaming_connection(rows)
+    result = export_events.export_events(conn, "user-1", export_format, "bucket", "key")
+    assert conn._sock.commands() == [COMMAND.COM_QUERY]
+    return result, s3
+
+
+def test_export_ndjson(monkeypatch):
+    result, s3 = run_export(monkeypatch, ROWS, "ndjson")
+    assert result == {"rows": 2, "bytes": len(s3.body)}
+    assert s3.calls == ["put_object"]
+    assert [json.loads(line) for line in s3.body.decode().splitlines()] == [
+        {"event_id": 1, "date": "2025-12-28", "event_name": "会議", "event_detail": "第1会議室, \"A\""},
+        {"event_id": 2, "date": "2025-12-28", "event_name": "買い物", "event_detail": None},
+    ]
+
+
+def test_export_csv(monkeypatch):
+    result, s3 = run_export(monkeypatch, ROWS, "csv")
+    assert result["rows"] == 2
+    assert list(csv.reader(io.StringIO(s3.body.decode()))) == [
+        export_events.EXPORT_COLUMNS,
+        ["1", "2025-12-28", "会議", "第1会議室, \"A\""],
+        ["2", "2025-12-28", "買い物", ""],
+    ]
+
+
+def test_export_without_rows(monkeypatch):
+    result, s3 = run_export(monkeypatch, [], "ndjson")
+    assert result == {"rows": 0, "bytes": 0}
+    assert s3.calls == ["put_object"]
+
+
+def test_large_export_uses_multipart_upload(monkeypatch):
+    monkeypatch.setattr(export_events, "EXPORT_PART_SIZE", 4096)
+    result, s3 = run_export(monkeypatch, seeded_rows(2000), "csv")
+
+    assert result["rows"] == 2000
+    assert s3.calls[0] == "create_multipart_upload" and s3.calls[-1] == "complete_multipart_upload"
+    # 最後以外のパートはパートの大きさ以上になる
+    assert all(size >= 4096 for size in s3.sizes[:-1])
+    assert len(list(csv.reader(io.StringIO(s3.body.decode())))) == 2001
+
+
+def test_upload_holds_one_part_at_a_time(monkeypatch):
+    # iter_chunksが作ったチャンクの数を数え、アップロード時点で未アップロードのチャンクが1つだけであることを確認する
+    produced = []
+    iter_chunks = export_events.iter_chunks
+
+    def counting_chunks(lines, chunk_size):
+        for chunk in iter_chunks(lines, chunk_size):
+            produced.append(chunk[1])
+            yield chunk
+
+    class CountingS3(StubS3):
+        def __init__(self):
+            super().__init__()
+            self.held = []
+
+        def _receive(self, body):
+            self.held.append(len(produced) - len(self.sizes))
+            super()._receive(body)
+
+    monkeypatch.setattr(export_events, "EXPORT_PART_SIZE", 4096)
+    monkeypatch.setattr(export_events, "iter_chunks", counting_chunks)
+    result, s3 = run_export(monkeypatch, seeded_rows(2000), "ndjson", CountingS3())
+
+    assert len(s3.sizes) > 2
+    assert set(s3.held) == {1}
+    # パートのバッファは1つを使いまわす
+    assert len(s3.bodies) == 1
+    assert produced == s3.sizes and result["bytes"] == sum(s3.sizes)
+
+
+def test_failed_upload_is_aborted(monkeypatch):
+    class FailingS3(StubS3):
+        def upload_part(self, **kwargs):
+            if len(self.sizes) == 2:
+                raise RuntimeError("upload failed")
+            return super().upload_part(**kwargs)
+
+    monkeypatch.setattr(export_events, "EXPORT_PART_SIZE", 4096)
+    with pytest.raises(RuntimeError):
+        run_export(monkeypatch, seeded_rows(2000), "ndjson", FailingS3())
+    assert export_events.s3.calls[-1] == "abort_multipart_upload"
+
+
+# エクスポート中のメモリ使用量のピーク（tracemallocで計測）を返す
+def measure_export(monkeypatch, num_rows):
+    s3 = StubS3()
+    monkeypatch.setattr(export_events, "s3", s3)
+    conn = make_streaming_connection(seeded_rows(num_rows))
+
+    tracemalloc.start()
+    try:
+        result = export_events.export_events(conn, "user-1", "ndjson", "bucket", "key")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert result["rows"] == num_rows
+    assert result["bytes"] == sum(s3.sizes)
+    return peak
+
+
+def test_export_keeps_memory_bounded(monkeypatch):
+    monkeypatch.setattr(export_events, "EXPORT_PART_SIZE", 64 * 1024)
+    # 初回のimport等の影響を除くため、少ない行数で1回実行しておく
+    measure_export(monkeypatch, 1000)
+
+    small_peak = measure_export(monkeypatch, 5000)
+    large_peak = measure_export(monkeypatch, 20000)
+    # 行数を4倍にしても、ピークはほぼ変わらないこと
+    assert large_peak < small_peak * 1.25
+    # 出力全体（2万行で約3MB）よりも十分小さいこと
+    assert large_peak < 1024 * 1024
+
+
+CLAIMS = {"requestContext": {"authorizer": {"claims": {"sub": "user-1", "cognito:username": "user1"}}}}
+CONFIG = dict(DB_CONFIG, export_bucket = "bucket")
+JOB_ID = "20251228120000-" + "0" * 32 + ".csv"
+
+
+class StubLambda:
+    def __init__(self):
+        self.invocations = []
+
+    def invoke(self, FunctionName, InvocationType, Payload):
+        self.invocations.append((InvocationType, json.loads(Payload)))
+
+
+# エクスポートの状態の確認に使う一覧取得と署名付きURLのスタブ
+class StatusS3(StubS3):
+    def __init__(self, keys):
+        super().__init__()
+        self.keys = keys
+
+    def list_objects_v2(self, Bucket, Prefix, MaxKeys):
+        return {"Contents": [{"Key": key, "Size": 10} for key in self.keys if key.startswith(Prefix)]}
+
+    def generate_presigned_url(self, method, Params, ExpiresIn):
+        return f"https://example.com/{Params['Key']}"
+
+
+def call_handler(monkeypatch, params):
+    monkeypatch.setattr("mypackage.api.get_config", lambda: CONFIG)
+    response = export_events.lambda_handler({**CLAIMS, "queryStringParameters": params}, None)
+    return response["statusCode"], json.loads(response["body"])["message"]
+
+
+def test_handler_starts_export_asynchronously(monkeypatch):
+    client = StubLambda()
+    monkeypatch.setattr(export_events, "lambda_client", client)
+
+    status, message = call_handler(monkeypatch, {"format": "csv"})
+
+    assert status == 202
+    job_id = message["data"]["job_id"]
+    assert export_events.EXPORT_JOB_ID_PATTERN.fullmatch(job_id) and job_id.endswith(".csv")
+    assert client.invocations == [("Event", {"user_id": "user-1", "format": "csv", "job_id": job_id})]
+
+
+@pytest.mark.parametrize("keys, status_code, status", [
+    ([], 202, "running"),
+    ([f"exports/user-1/{JOB_ID}"], 200, "completed"),
+    ([f"exports/user-1/{JOB_ID}.error"], 200, "failed"),
+    # 他のユーザーの出力ファイルは見えない
+    ([f"exports/user-2/{JOB_ID}"], 202, "running"),
+])
+def test_handler_returns_export_status(monkeypatch, keys, status_code, status):
+    monkeypatch.setattr(export_events, "s3", StatusS3(keys))
+
+    code, message = call_handler(monkeypatch, {"job_id": JOB_ID})
+
+    assert code == status_code and message["data"]["status"] == status
+    if status == "completed":
+        assert message["data"]["url"] == f"https://example.com/exports/user-1/{JOB_ID}"
+
+
+@pytest.mark.parametrize("params, error", [
+    ({"job_id": "../user-2/" + JOB_ID}, "Invalid job_id"),
+    ({"format": "xml"}, "Invalid format"),
+])
+def test_handler_rejects_invalid_params(monkeypatch, params, error):
+    assert call_handler(monkeypatch, params) == (400, error)
+
+
+def test_worker_exports_or_records_failure(monkeypatch, stub_db):
+    monkeypatch.setattr(export_events, "get_config", lambda: CONFIG)
+    event = {"user_id": "user-1", "format": "csv", "job_id": JOB_ID}
+
+    s3 = StubS3(keep_body = True)
+    monkeypatch.setattr(export_events, "s3", s3)
+    stub_db(export_events, make_streaming_connection(ROWS))
+    assert export_events.worker_handler(event, None) == {"status": "completed", "rows": 2, "bytes": len(s3.body)}
+
+    class RecordingS3(StubS3):
+        def put_object(self, Bucket, Key, Body, ContentType):
+            self.key = Key
+            super().put_object(Bucket, Key, Body, ContentType)
+
+    s3 = RecordingS3()
+    monkeypatch.setattr(export_events, "s3", s3)
+    stub_db(export_events, make_connection(b""))
+    assert export_events.worker_handler(event, None) == {"status": "failed"}
+    assert s3.key == f"exports/user-1/{JOB_ID}.error"
@@ -0,0 +1,48 @@
+import datetime
+
+from pymysql.constants import FIELD_TYPE
+
+import get_calendar
+from mypackage.db import column_cursor
+from tests.unit.pymysql_stub import UTF8MB4, make_connection, resultset, text_row, wire
+
+
+# get_calendar_sqlのSELECTの列（DATE_FORMAT、曜日、祝日名、予定名のJSON配列）
+SQL_COLUMNS = [
+    ("date", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ("weekday", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ("holiday_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ("events", FIELD_TYPE.BLOB, UTF8MB4, 0),
+]
+
+
+def test_sql_mode_parses_aggregated_events():
+    # MySQLがCONCAT('[', GROUP_CONCAT(JSON_QUOTE(...) SEPARATOR ','), ']')で返す文字列
+    # 区切り文字（,）や引用符、角括弧を含む予定名も、JSON_QUOTEでエスケープされている
+    rows = [
+        ("2025-11-02", "日", None, None),
+        ("2025-11-03", "月", "文化の日", '["a,b","会議","x\\"y]"]'),
+        ("2025-11-04", "火", None, '["買い物"]'),
+    ]
+    conn = make_connection(wire(resultset(SQL_COLUMNS, rows, text_row)))
+
+    with column_cursor(conn) as cur:
+        result = get_calendar.get_calendar_sql(cur, datetime.date(2025, 11, 2), datetime.date(2025, 11, 4), "user-1")
+
+    assert result == [
+        {"date": "2025-11-02", "weekday": "日", "holiday_name": None, "events": [None]},
+        {"date": "2025-11-03", "weekday": "月", "holiday_name": "文化の日", "events": ["a,b", "会議", 'x"y]']},
+        {"date": "2025-11-04", "weekday": "火", "holiday_name": None, "events": ["買い物"]},
+    ]
+    [query] = [" ".join(data[5:].decode().split()) for data in conn._sock.sent]
+    assert "DATE_FORMAT(t1.`date`, '%Y-%m-%d')" in query
+    assert "GROUP_CONCAT(JSON_QUOTE(t2.`event_name`) ORDER BY t2.`event_name` SEPARATOR ',')" in query
+    assert "ON t1.`date` = t2.`date` and t2.`user_id` = 'user-1'" in query
+    assert "where t1.`date` between '2025-11-02' and '2025-11-04'" in query
+    assert query.endswith("GROUP BY t1.`date`, t1.`weekday`, t3.`holiday_name` ORDER BY t1.`date`")
+
+
+def test_parse_events():
+    assert get_calendar.parse_events(None) == [None]
+    assert get_calendar.parse_events("") == [None]
+    assert get_calendar.parse_events('["会議","a,b"]') == ["会議", "a,b"]
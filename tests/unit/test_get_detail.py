@@ -0,0 +1,81 @@
+import json
+import datetime
+
+import pytest
+
+from pymysql.constants import FIELD_TYPE, FLAG
+
+import get_detail
+from mypackage.api import ApiError
+from tests.unit.pymysql_stub import BINARY, DB_ARGS, DB_CONFIG, UTF8MB4, resultset, text_row, wire
+
+
+EVENT = {"requestContext": {"authorizer": {"claims": {"sub": "user-1", "cognito:username": "user1"}}}}
+COLUMNS = [
+    ("event_id", FIELD_TYPE.LONG, BINARY, FLAG.UNSIGNED),
+    ("date", FIELD_TYPE.DATE, BINARY, 0),
+    ("event_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ("event_detail", FIELD_TYPE.BLOB, UTF8MB4, 0),
+]
+ROWS = [
+    (3, datetime.date(2025, 12, 28), "会議", "第1会議室"),
+    (5, datetime.date(2025, 12, 28), "買い物", None),
+    (4, datetime.date(2025, 12, 31), "大掃除", ""),
+]
+
+
+def call_get_details(dates):
+    return get_detail.get_details(dates, "user-1", *DB_ARGS)
+
+
+def test_date_range_is_fetched_with_one_query_and_grouped_by_date(stub_db):
+    conn = stub_db(get_detail, wire(resultset(COLUMNS, ROWS, text_row)))
+    dates = get_detail.parse_dates({"start_date": "2025-12-28", "end_date": "2026-01-01"})
+
+    result = call_get_details(dates)
+
+    assert result == {
+        "2025-12-28": [
+            {"event_id": 3, "date": "2025-12-28", "event_name": "会議", "event_detail": "第1会議室"},
+            {"event_id": 5, "date": "2025-12-28", "event_name": "買い物", "event_detail": None},
+        ],
+        "2025-12-29": [],
+        "2025-12-30": [],
+        "2025-12-31": [{"event_id": 4, "date": "2025-12-31", "event_name": "大掃除", "event_detail": ""}],
+        "2026-01-01": [],
+    }
+    assert list(result) == [str(d) for d in dates]
+    [query] = [data[5:].decode() for data in conn._sock.sent]
+    assert "WHERE `user_id` = 'user-1' AND `date` BETWEEN '2025-12-28' AND '2026-01-01'" in query
+
+
+def test_list_of_dates_uses_in(stub_db):
+    conn = stub_db(get_detail, wire(resultset(COLUMNS, [ROWS[2]], text_row)))
+    dates = get_detail.parse_dates({"dates": "2025-12-31, 2025-12-01,2025-12-31"})
+
+    assert call_get_details(dates) == {"2025-12-01": [], "2025-12-31": [{"event_id": 4, "date": "2025-12-31", "event_name": "大掃除", "event_detail": ""}]}
+    [query] = [data[5:].decode() for data in conn._sock.sent]
+    # プレースホルダの数は4つの段階に揃える（最後の日付で埋める）
+    assert "AND `date` IN ('2025-12-01','2025-12-31','2025-12-31','2025-12-31')" in query
+
+
+@pytest.mark.parametrize("params, message", [
+    ({}, "No date found"),
+    ({"start_date": "2025-12-28"}, "No date found"),
+    ({"start_date": "2025-12-28", "end_date": "2025-12-27"}, "Invalid date range"),
+    ({"start_date": "2025-12-01", "end_date": "2026-01-01"}, "Too many dates (max 31)"),
+    ({"dates": "2025-12-01,2025-12-1x"}, "Invalid dates"),
+])
+def test_parse_dates_rejects_invalid_params(params, message):
+    with pytest.raises(ApiError) as e:
+        get_detail.parse_dates(params)
+    assert e.value.message == message
+
+
+@pytest.mark.parametrize("value", ["2025-12-32", "2025/12/28", "x"])
+def test_handler_rejects_invalid_date_without_connecting(monkeypatch, stub_db, value):
+    monkeypatch.setattr("mypackage.api.get_config", lambda: DB_CONFIG)
+    stub_db(get_detail, None)
+    response = get_detail.lambda_handler({**EVENT, "queryStringParameters": {"date": value}}, None)
+    assert response["statusCode"] == 400
+    assert json.loads(response["body"])["message"] == "Invalid date"
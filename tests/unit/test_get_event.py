@@ -0,0 +1,77 @@
+import json
+import datetime
+
+import pytest
+
+from pymysql.constants import FIELD_TYPE, FLAG
+
+import get_event
+from mypackage.api import ApiError
+from mypackage.db import in_list
+from tests.unit.pymysql_stub import BINARY, DB_ARGS, DB_CONFIG, UTF8MB4, resultset, text_row, wire
+
+
+EVENT = {"requestContext": {"authorizer": {"claims": {"sub": "user-1", "cognito:username": "user1"}}}}
+COLUMNS = [
+    ("event_id", FIELD_TYPE.LONG, BINARY, FLAG.UNSIGNED),
+    ("date", FIELD_TYPE.DATE, BINARY, 0),
+    ("event_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ("event_detail", FIELD_TYPE.BLOB, UTF8MB4, 0),
+]
+
+
+def test_get_events_keyed_by_id_with_missing_ids(stub_db):
+    rows = [
+        (12, datetime.date(2025, 12, 29), "買い物", None),
+        (10, datetime.date(2025, 12, 28), "会議", "第1会議室"),
+    ]
+    conn = stub_db(get_event, wire(resultset(COLUMNS, rows, text_row)))
+    result = get_event.get_events([10, 11, 12], "user-1", *DB_ARGS)
+
+    assert result == {
+        "events": {
+            "10": {"event_id": 10, "date": "2025-12-28", "event_name": "会議", "event_detail": "第1会議室"},
+            "12": {"event_id": 12, "date": "2025-12-29", "event_name": "買い物", "event_detail": None},
+        },
+        "missing": [11],
+    }
+    assert list(result["events"]) == ["10", "12"]
+    [query] = [data[5:].decode() for data in conn._sock.sent]
+    assert "WHERE `event_id` IN (10,11,12,12) and `user_id` = 'user-1'" in query
+
+
+def test_in_list_uses_fixed_sizes():
+    # 1〜100件のevent_idsで、プリペアドステートメントになるSQLは5通りだけ
+    sizes = set()
+    for count in range(1, get_event.GET_EVENT_MAX_IDS + 1):
+        placeholders, args = in_list(range(1, count + 1), get_event.GET_EVENT_MAX_IDS)
+        assert placeholders.count("%s") == len(args)
+        assert set(args) == set(range(1, count + 1))
+        sizes.add(len(args))
+    assert sizes == {1, 4, 16, 64, 100}
+    assert in_list([], 100) == ("NULL", [])
+
+
+def test_parse_event_ids():
+    assert get_event.parse_event_ids("3, 1,3,2") == [3, 1, 2]
+    with pytest.raises(ApiError, match = "Invalid event_ids"):
+        get_event.parse_event_ids("1,x")
+    with pytest.raises(ApiError, match = "Invalid event_ids"):
+        get_event.parse_event_ids("1,,2")
+    # 全角・その他のUnicodeの数字と0は認めない
+    for value in ["1,２", "1,²", "١", "0", "1,012"]:
+        with pytest.raises(ApiError, match = "Invalid event_ids"):
+            get_event.parse_event_ids(value)
+    # 重複を除いた後の件数で、上限を確認する
+    assert len(get_event.parse_event_ids(",".join(map(str, list(range(1, 101)) * 2)))) == 100
+    with pytest.raises(ApiError, match = r"Too many event_ids \(max 100\)"):
+        get_event.parse_event_ids(",".join(map(str, range(1, 102))))
+
+
+@pytest.mark.parametrize("value", ["x", "0", "007", "²", "١", "-1"])
+def test_handler_rejects_invalid_event_id_without_connecting(monkeypatch, stub_db, value):
+    monkeypatch.setattr("mypackage.api.get_config", lambda: DB_CONFIG)
+    stub_db(get_event, None)
+    response = get_event.lambda_handler({**EVENT, "queryStringParameters": {"event_id": value}}, None)
+    assert response["statusCode"] == 400
+    assert json.loads(response["body"])["message"] == "Invalid event_id"
@@ -0,0 +1,193 @@
+import datetime
+
+import get_calendar
+from init_db import InitDbBatch
+from mypackage import holiday_index
+from mypackage.holiday_index import HolidayIndex, get_holiday_index, invalidate_holiday_index
+
+
+FIRST_DATE = datetime.date(2025, 1, 1)
+LAST_DATE = datetime.date(2026, 12, 31)
+HOLIDAYS = [
+    (datetime.date(2025, 1, 1), "元日"),
+    (datetime.date(2025, 11, 3), "文化の日"),
+    (datetime.date(2025, 11, 24), "休日"),
+    (datetime.date(2026, 1, 1), "元日"),
+]
+EVENTS = [
+    (datetime.date(2025, 11, 3), "買い物"),
+    (datetime.date(2025, 11, 3), "会議"),
+    (datetime.date(2025, 11, 30), "大掃除"),
+]
+
+
+# calendar_m（init_dbのgenerate_dateinfoで作成）、holiday_m、event_tを持つDBのふりをするカーソル
+class StubCursor:
+    def __init__(self, imported_at = datetime.datetime(2025, 1, 1)):
+        batch = InitDbBatch("", "", "", "", FIRST_DATE, LAST_DATE, "", "")
+        calendar_m = batch.generate_dateinfo(FIRST_DATE, LAST_DATE)
+        self.calendar_m = {datetime.date.fromisoformat(day): weekday for day, weekday in calendar_m}
+        self.imported_at = imported_at
+        self.queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def execute(self, sql, args = None):
+        self.queries.append(" ".join(sql.split()))
+        holidays = dict(HOLIDAYS)
+        if sql == holiday_index.VERSION_SQL:
+            self.rows = [(self.imported_at, len(HOLIDAYS), min(self.calendar_m), max(self.calendar_m), len(self.calendar_m))]
+        elif sql == holiday_index.RANGES_SQL:
+            # 連続した日付の範囲
+            self.rows = []
+            for day in sorted(self.calendar_m):
+                if self.rows and self.rows[-1][1] + datetime.timedelta(days = 1) == day:
+                    self.rows[-1] = (self.rows[-1][0], day)
+                else:
+                    self.rows.append((day, day))
+        elif "FROM holiday_m" in sql:
+            self.rows = list(HOLIDAYS)
+        elif "FROM calendar_m" in sql:
+            # get_calendar_pythonのJOIN（予定がない日はNone）
+            user_id, start_date, end_date = args
+            self.rows = []
+            for day, weekday in sorted(self.calendar_m.items()):
+                if start_date <= day <= end_date:
+                    names = sorted(name for event_date, name in EVENTS if event_date == day) or [None]
+                    self.rows += [(day, weekday, holidays.get(day), name) for name in names]
+        else:
+            user_id, start_date, end_date = args
+            self.rows = sorted(event for event in EVENTS if start_date <= event[0] <= end_date)
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        return tuple(self.rows)
+
+
+def setup_function():
+    invalidate_holiday_index()
+
+
+def test_days_match_init_db_calendar_and_holidays():
+    cur = StubCursor()
+    index = get_holiday_index(cur)
+
+    days = list(index.days(datetime.date(2024, 12, 30), LAST_DATE + datetime.timedelta(days = 5)))
+    # calendar_mにない日付は含めない
+    assert days[0][0] == FIRST_DATE and days[-1][0] == LAST_DATE
+    assert {day: weekday for day, weekday, _ in days} == cur.calendar_m
+    assert [(day, name) for day, _, name in days if name] == HOLIDAYS
+    assert index.holiday_name(datetime.date(2025, 11, 24)) == "休日"
+    assert index.holiday_name(datetime.date(2025, 11, 25)) is None
+
+
+def test_empty_calendar_has_no_days():
+    index = HolidayIndex([], [])
+    assert list(index.days(FIRST_DATE, LAST_DATE)) == []
+
+
+def test_index_is_reloaded_only_when_version_changes(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(holiday_index.time, "monotonic", lambda: now[0])
+    cur = StubCursor()
+
+    first = get_holiday_index(cur)
+    assert len(cur.queries) == 3
+
+    # TTL内はDBに問い合わせない
+    assert get_holiday_index(cur) is first
+    assert len(cur.queries) == 3
+
+    # TTL切れでも、バージョンが同じなら読み直さない
+    now[0] += holiday_index.HOLIDAY_INDEX_TTL_SECONDS
+    assert get_holiday_index(cur) is first
+    assert len(cur.queries) == 4
+
+    # 祝日情報CSVが取り込まれると読み直す
+    now[0] += holiday_index.HOLIDAY_INDEX_TTL_SECONDS
+    cur.imported_at = datetime.datetime(2025, 12, 1)
+    second = get_holiday_index(cur)
+    assert second is not first
+    assert len(cur.queries) == 7
+
+    # calendar_mの途中の日付が削除された場合も読み直す
+    now[0] += holiday_index.HOLIDAY_INDEX_TTL_SECONDS
+    del cur.calendar_m[datetime.date(2025, 6, 1)]
+    assert get_holiday_index(cur) is not second
+
+
+def test_days_skip_gaps_in_calendar():
+    cur = StubCursor()
+    # calendar_mの途中が欠けている（予定・祝日のある日を含む）
+    gap = [datetime.date(2025, 11, 2) + datetime.timedelta(days = i) for i in range(3)] + [datetime.date(2025, 11, 30)]
+    for day in gap:
+        del cur.calendar_m[day]
+    index = get_holiday_index(cur)
+    assert index.ranges == [(FIRST_DATE, datetime.date(2025, 11, 1)), (datetime.date(2025, 11, 5), datetime.date(2025, 11, 29)), (datetime.date(2025, 12, 1), LAST_DATE)]
+
+    start_date, end_date = datetime.date(2025, 10, 27), datetime.date(2025, 12, 7)
+    days = [day for day, _, _ in index.days(start_date, end_date)]
+    assert days == [day for day in sorted(cur.calendar_m) if start_date <= day <= end_date]
+    assert not set(gap) & set(days)
+    # 欠けた日付の中だけを指定した場合は空になる
+    assert list(index.days(datetime.date(2025, 11, 2), datetime.date(2025, 11, 4))) == []
+
+    # 欠けた日付の予定（11/3）も、JOINと同じく含めない
+    assert get_calendar.get_calendar_index(cur, start_date, end_date, "user-1") == get_calendar.get_calendar_python(cur, start_date, end_date, "user-1")
+
+
+def test_index_mode_matches_join_mode():
+    start_date, end_date = datetime.date(2025, 10, 27), datetime.date(2025, 12, 7)
+    expected = get_calendar.get_calendar_python(StubCursor(), start_date, end_date, "user-1")
+
+    cur = StubCursor()
+    assert get_calendar.get_calendar_index(cur, start_date, end_date, "user-1") == expected
+    # calendar_m・holiday_mとのJOINは行わない
+    assert not any("calendar_m" in query and "event_t" in query for query in cur.queries)
+
+
+# 1か月分のカレンダー（1日3件の予定）を、JOINしたクエリの結果から作る場合と、
+# 祝日インデックス + event_tだけのクエリの結果から作る場合のクライアント側の処理時間を比較する
+# （サーバ側のJOINのコストは含まない。実測にはMySQLへの接続が必要）
+# LayerのパスをPYTHONPATHに設定し、python -m tests.unit.test_holiday_index で実行する
+if __name__ == "__main__":
+    import timeit
+
+    from pymysql.constants import FIELD_TYPE
+    from tests.unit.pymysql_stub import BINARY, UTF8MB4, make_connection, resultset, text_row, wire
+
+    start_date, end_date = datetime.date(2025, 11, 1), datetime.date(2025, 12, 1)
+    cur = StubCursor()
+    join_rows = [(str(day), weekday, holiday, f"予定{i}") for day, weekday in sorted(cur.calendar_m.items()) if start_date <= day <= end_date for holiday in [dict(HOLIDAYS).get(day)] for i in range(3)]
+    event_rows = [(day, name) for day, _, _, name in join_rows]
+    join_data = wire(resultset([
+        ("date", FIELD_TYPE.DATE, BINARY, 0),
+        ("weekday", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+        ("holiday_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+        ("event_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ], join_rows, text_row))
+    event_data = wire(resultset([
+        ("date", FIELD_TYPE.DATE, BINARY, 0),
+        ("event_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ], event_rows, text_row))
+    get_holiday_index(cur)
+
+    def with_join():
+        with make_connection(join_data).cursor() as cur:
+            return get_calendar.get_calendar_python(cur, start_date, end_date, "user-1")
+
+    def with_index():
+        with make_connection(event_data).cursor() as cur:
+            return get_calendar.get_calendar_index(cur, start_date, end_date, "user-1")
+
+    assert with_join() == with_index()
+    number = 2000
+    for name, func in [("join", with_join), ("index", with_index)]:
+        seconds = timeit.timeit(func, number = number)
+        print(f"{name}: {seconds / number * 1e6:.1f} us/request ({len(join_rows)} rows)")
@@ -0,0 +1,155 @@
+from datetime import date, timedelta
+
+import pytest
+
+from pymysql.constants import FIELD_TYPE
+
+import init_db
+from init_db import InitDbBatch
+from tests.unit.pymysql_stub import BINARY, make_connection, ok_packet, resultset, text_row, wire
+
+
+COUNT_COLUMNS = [("count", FIELD_TYPE.LONGLONG, BINARY, 0)]
+# マイグレーションのcheckの結果（0件なら未適用、1件なら適用済み）
+NOT_APPLIED = resultset(COUNT_COLUMNS, [], text_row)
+APPLIED = resultset(COUNT_COLUMNS, [(1,)], text_row)
+OK = [ok_packet()]
+
+# 定義順とversionの順が異なるマイグレーション
+MIGRATIONS = [
+    {"version": 3, "description": "three", "check": "SELECT 3", "statements": ["CREATE TABLE t3 (id INT)"]},
+    {"version": 1, "description": "one", "check": "SELECT 1", "statements": ["CREATE TABLE t1 (id INT)"]},
+    {"version": 2, "description": "two", "check": "SELECT 2", "statements": ["CREATE TABLE t2 (id INT)", "DROP TABLE t0"]},
+]
+
+
+def make_batch(server_data, **options):
+    batch = InitDbBatch("", "", "", "", None, None, "", "", **options)
+    batch.conn = make_connection(server_data)
+    # close()の後も送信内容を確認できるように、ソケットを残しておく
+    batch.sock = batch.conn._sock
+    return batch
+
+
+def queries(batch):
+    return [" ".join(data[5:].decode().split()) for data in batch.sock.sent]
+
+
+# get_schema_versionの応答（schema_versionテーブルがなければ1問、あれば2問）
+def schema_version_responses(version):
+    if version is None:
+        return [resultset(COUNT_COLUMNS, [(0,)], text_row)]
+    return [resultset(COUNT_COLUMNS, [(1,)], text_row), resultset(COUNT_COLUMNS, [(version,)], text_row)]
+
+
+@pytest.fixture(autouse = True)
+def migrations(monkeypatch):
+    monkeypatch.setattr(init_db, "MIGRATIONS", MIGRATIONS)
+
+
+def test_pending_migrations_run_in_version_order_and_are_recorded():
+    # バージョン1は適用済み。バージョン3は、DDLは適用済み（checkが1件）だが未記録
+    batch = make_batch(wire(
+        *schema_version_responses(1),
+        OK,
+        NOT_APPLIED, OK, OK, OK, OK,
+        APPLIED, OK, OK,
+    ))
+
+    assert batch.migrate() == [2, 3]
+
+    assert queries(batch)[2:] == [
+        queries(batch)[2],
+        "SELECT 2",
+        "CREATE TABLE t2 (id INT)",
+        "DROP TABLE t0",
+        "INSERT INTO `schema_version` (`version`, `description`) VALUES (2, 'two')",
+        "COMMIT",
+        "SELECT 3",
+        "INSERT INTO `schema_version` (`version`, `description`) VALUES (3, 'three')",
+        "COMMIT",
+    ]
+    assert queries(batch)[2].startswith("CREATE TABLE IF NOT EXISTS `schema_version`")
+
+
+def test_up_to_date_schema_runs_nothing():
+    batch = make_batch(wire(*schema_version_responses(3)))
+
+    assert batch.migrate() == []
+    assert len(queries(batch)) == 2
+
+
+def test_dry_run_issues_no_ddl(monkeypatch):
+    batch = make_batch(wire(
+        *schema_version_responses(None),
+        NOT_APPLIED, APPLIED, NOT_APPLIED,
+        # close()のCOM_QUIT
+        OK,
+    ), dry_run = True)
+    monkeypatch.setattr(batch, "connect_db", lambda: None)
+
+    result = batch.run()
+
+    assert result["status"] == "success"
+    assert result["pending_migrations"] == [1, 2, 3]
+    # checkのSELECTだけで、CREATE・INSERT・COMMITは送らない
+    assert queries(batch)[1:-1] == ["SELECT 1", "SELECT 2", "SELECT 3"]
+    assert all(query.startswith("SELECT") for query in queries(batch)[:-1])
+
+
+# 年をまたぎ、うるう日を含む期間
+START_DATE = date(2023, 12, 30)
+END_DATE = date(2024, 3, 1)
+DAYS = (END_DATE - START_DATE).days + 1
+
+
+def dateinfo_responses(inserted):
+    # CREATE TABLE, truncate, wk_calendarへのinsert, calendar_mのupdate, calendar_mへのinsert
+    return wire(OK, OK, [ok_packet(affected_rows = inserted)], OK, [ok_packet(affected_rows = inserted)])
+
+
+def test_insert_dateinfo_with_executemany():
+    batch = make_batch(dateinfo_responses(DAYS))
+
+    batch.insert_dateinfo(START_DATE, END_DATE)
+
+    create, truncate, insert, update, insert_calendar = queries(batch)
+    assert truncate == "truncate table wk_calendar"
+    # executemanyは1つの複数行INSERTにまとめられる
+    assert insert.startswith("insert into wk_calendar (`date`, `weekday`) values ('2023-12-30', '土'),('2023-12-31', '日'),('2024-01-01', '月'),")
+    assert insert.count("),(") + 1 == DAYS == 63
+    assert "('2024-02-28', '水'),('2024-02-29', '木'),('2024-03-01', '金')" in insert
+    assert insert.endswith("('2024-03-01', '金')")
+    assert update.startswith("update calendar_m") and insert_calendar.startswith("insert into calendar_m")
+
+
+def test_insert_dateinfo_with_recursive_cte():
+    batch = make_batch(dateinfo_responses(DAYS), dateinfo_mode = "cte")
+
+    batch.insert_dateinfo(START_DATE, END_DATE)
+
+    insert = queries(batch)[2]
+    # 再帰の深さは期間の日数（63日）
+    assert insert.startswith("INSERT /*+ SET_VAR(cte_max_recursion_depth = 63) */ INTO wk_calendar")
+    assert "SELECT CAST('2023-12-30' AS DATE)" in insert
+    assert "WHERE `date` < '2024-03-01'" in insert
+    assert "ELT(WEEKDAY(`date`) + 1, '月', '火', '水', '木', '金', '土', '日')" in insert
+
+
+def test_generate_dateinfo_matches_cte_weekdays():
+    # WEEKDAY()と同じく月曜=0として、ELTで引いた曜日名と一致する
+    rows = list(make_batch(b"").generate_dateinfo(START_DATE, END_DATE))
+    assert len(rows) == DAYS
+    for i, (day, weekday) in enumerate(rows):
+        expected = START_DATE + timedelta(days = i)
+        assert day == expected.isoformat()
+        assert weekday == init_db.WEEKDAY_NAMES[expected.weekday()]
+
+
+def test_insert_dateinfo_with_empty_range_inserts_nothing():
+    batch = make_batch(wire(OK, OK, OK, OK))
+
+    batch.insert_dateinfo(END_DATE, START_DATE)
+
+    assert not any("wk_calendar (`date`" in query for query in queries(batch))
+    assert len(queries(batch)) == 4
@@ -0,0 +1,165 @@
+import io
+import csv
+import tracemalloc
+from datetime import date, timedelta
+
+import pytest
+import pymysql
+
+from init_db import InitDbBatch, HOLIDAY_IMPORT_BATCH_SIZE, HOLIDAY_NAME_MAX_LENGTH, LOAD_DATA_FILENAME
+from tests.unit.pymysql_stub import error_packet, make_connection, ok_packet, wire
+from tests.unit.test_pymysql_local_infile import load_local_response
+
+
+# executemanyに渡された行数とバッチの最大件数だけを記録するスタブ
+class StubCursor:
+    def __init__(self):
+        self.rows = 0
+        self.max_batch = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def executemany(self, sql, args):
+        args = list(args)
+        self.rows += len(args)
+        self.max_batch = max(self.max_batch, len(args))
+        return len(args)
+
+
+class StubConnection:
+    def __init__(self):
+        self.cur = StubCursor()
+
+    def cursor(self):
+        return self.cur
+
+
+def make_batch(conn = None, holiday_import_mode = "executemany"):
+    batch = InitDbBatch(
+        host = "", user = "", password = "", database = "",
+        start_date = None, end_date = None, bucket_name = "", object_key = "",
+        holiday_import_mode = holiday_import_mode,
+    )
+    batch.conn = conn
+    return batch
+
+
+def make_csv(num_rows):
+    lines = ['"holiday_date","holiday_name"']
+    start = date(1900, 1, 1)
+    for i in range(num_rows):
+        lines.append(f'"{start + timedelta(days=i)}","テスト祝日{i % 100}"')
+    return ("\r\n".join(lines) + "\r\n").encode("utf-8")
+
+
+def test_iter_csv_lines_splits_multibyte_across_chunks():
+    data = make_csv(50)
+    batch = make_batch()
+    # マルチバイト文字がチャンクの境界で分割されるよう、小さなチャンクで読む
+    lines = list(batch.iter_csv_lines(io.BytesIO(data), chunk_size = 7))
+    assert "".join(lines) == data.decode("utf-8")
+    assert len(lines) == 51
+
+
+# 取込中のメモリ使用量のピーク（tracemallocで計測）と、投入された行数を返す
+def measure_streaming_insert(num_rows):
+    body = io.BytesIO(make_csv(num_rows))
+    conn = StubConnection()
+    batch = make_batch(conn)
+
+    tracemalloc.start()
+    try:
+        count = batch.insert_holiday_data(batch.iter_csv_lines(body))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert count == num_rows
+    assert conn.cur.rows == num_rows
+    assert conn.cur.max_batch == HOLIDAY_IMPORT_BATCH_SIZE
+    return peak
+
+
+def test_streaming_insert_keeps_memory_bounded():
+    # 初回のimport等の影響を除くため、少ない行数で1回実行しておく
+    measure_streaming_insert(HOLIDAY_IMPORT_BATCH_SIZE)
+
+    small_peak = measure_streaming_insert(10000)
+    large_peak = measure_streaming_insert(40000)
+    # 行数を4倍にしても、ピークはほぼ変わらないこと
+    assert large_peak < small_peak * 1.25
+    # 全行をパースして保持した場合（数MB）よりも十分小さいこと
+    assert large_peak < 2 * 1024 * 1024
+
+
+def validate(text):
+    return list(make_batch().validate_holiday_rows(csv.reader(io.StringIO(text))))
+
+
+@pytest.mark.parametrize("line, message", [
+    ('"2025-02-30","祝日"', "3行目: 日付が不正です"),
+    ('"2025/01/01","元日"', "3行目: 日付が不正です"),
+    ('"2025-01-01","' + "あ" * (HOLIDAY_NAME_MAX_LENGTH + 1) + '"', "3行目: 祝日名が不正です"),
+    ('"2025-01-01"," "', "3行目: 祝日名が不正です"),
+    ('"2025-01-01"', "3行目: 列が不足しています"),
+])
+def test_validate_holiday_rows_rejects_invalid_row(line, message):
+    with pytest.raises(ValueError, match = message):
+        validate(f'"holiday_date","holiday_name"\n"2024-12-31","大晦日"\n{line}\n')
+
+
+def test_validate_holiday_rows_keeps_duplicates_in_csv_order():
+    # 重複はここでは落とさず、update_holiday_mでCSVで先に出現したもの（idが小さいもの）を採用する
+    rows = validate('"holiday_date","holiday_name"\n"2025-01-01","元日"\n\n"2025-01-01","' + "あ" * HOLIDAY_NAME_MAX_LENGTH + '"\n')
+    assert rows == [(date(2025, 1, 1), "元日"), (date(2025, 1, 1), "あ" * HOLIDAY_NAME_MAX_LENGTH)]
+
+
+# 送ったSQL（シーケンス番号が0のパケット）の先頭部分
+def import_queries(conn):
+    return [" ".join(data[5:].decode().split())[:50] for data in conn._sock.sent if data[3] == 0]
+
+
+def test_load_data_sends_validated_rows():
+    csv_data = '"holiday_date","holiday_name"\r\n"2025-01-01","元日"\r\n"2025-01-13","成人の日"\r\n'.encode()
+    conn = make_connection(wire([ok_packet()], [ok_packet()]) + load_local_response(LOAD_DATA_FILENAME.encode(), 2), local_infile = "sources")
+
+    make_batch(conn, "load_data").import_holiday_data(io.BytesIO(csv_data))
+
+    assert import_queries(conn)[2].startswith("LOAD DATA LOCAL INFILE 'holiday-data.tsv'")
+    assert conn._sock.sent[-2][4:] == "2025-01-01\t元日\n2025-01-13\t成人の日\n".encode()
+
+
+@pytest.mark.parametrize("errno", [1148, 3948])
+def test_load_data_falls_back_to_insert_when_local_infile_is_disabled(errno):
+    # LOCAL INFILEが無効な場合、サーバはファイルを要求せずにエラーを返す
+    conn = make_connection(wire(
+        [ok_packet()], [ok_packet()],
+        [error_packet(errno, "The used command is not allowed with this MySQL version", b"42000")],
+        [ok_packet(affected_rows = 50)],
+    ), local_infile = "sources")
+
+    count = make_batch(conn, "load_data").import_holiday_data(io.BytesIO(make_csv(50)))
+
+    assert count == 50
+    queries = import_queries(conn)
+    assert queries[2].startswith("LOAD DATA LOCAL INFILE")
+    assert queries[3].startswith("INSERT INTO `wk_holiday_calendar`")
+    assert len(queries) == 4
+    # 使われなかったデータの登録は解除する
+    assert conn._local_infile_sources == {}
+
+
+def test_load_data_does_not_fall_back_on_other_errors():
+    conn = make_connection(wire(
+        [ok_packet()], [ok_packet()],
+        [error_packet(1146, "Table 'wk_holiday_calendar' doesn't exist", b"42S02")],
+    ), local_infile = "sources")
+
+    with pytest.raises(pymysql.err.ProgrammingError) as exc_info:
+        make_batch(conn, "load_data").import_holiday_data(io.BytesIO(make_csv(50)))
+    assert exc_info.value.args[0] == 1146
+    assert len(import_queries(conn)) == 3
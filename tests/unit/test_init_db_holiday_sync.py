@@ -0,0 +1,103 @@
+import io
+import hashlib
+
+from pymysql.constants import FIELD_TYPE
+
+from init_db import InitDbBatch
+from tests.unit.pymysql_stub import BINARY, UTF8MB4, make_connection, ok_packet, resultset, text_row, wire
+
+
+# 祝日Mに「元日」「成人の日」「建国記念日」があり、CSVでは
+# 成人の日を削除、建国記念日を「建国記念の日」に変更、天皇誕生日を追加した場合
+CSV_DATA = "\r\n".join([
+    '"holiday_date","holiday_name"',
+    '"2025-01-01","元日"',
+    '"2025-02-11","建国記念の日"',
+    '"2025-02-23","天皇誕生日"',
+    # 同じ日付の2件目は、update_holiday_mで捨てられる
+    '"2025-02-23","重複"',
+    "",
+]).encode("utf-8")
+SHA256 = hashlib.sha256(CSV_DATA).hexdigest()
+
+IMPORT_INFO_COLUMNS = [
+    ("etag", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ("sha256", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ("row_count", FIELD_TYPE.LONG, BINARY, 0),
+]
+OK = [ok_packet()]
+
+
+def import_info(etag, sha256, row_count = 4):
+    return resultset(IMPORT_INFO_COLUMNS, [(etag, sha256, row_count)], text_row)
+
+
+# import_holiday_data（executemany）の応答: CREATE TABLE, truncate, INSERT
+IMPORT_RESPONSES = [OK, OK, [ok_packet(affected_rows = 4)]]
+
+
+def make_batch(server_data, etag):
+    batch = InitDbBatch("", "", "", "", None, None, "", "", holiday_import_mode = "executemany")
+    batch.conn = make_connection(server_data)
+    batch.body = io.BytesIO(CSV_DATA)
+    batch.open_holiday_csv = lambda bucket_name, object_key: {"ETag": etag, "Body": batch.body}
+    return batch
+
+
+def queries(batch):
+    return [" ".join(data[5:].decode().split()) for data in batch.conn._sock.sent]
+
+
+def test_same_etag_skips_without_reading_csv():
+    batch = make_batch(wire(import_info("v1", SHA256)), "v1")
+
+    result = batch.sync_holiday_data("bucket", "holiday.csv")
+
+    assert result["skipped"] and result["rows"] == 4
+    assert len(queries(batch)) == 1
+    assert batch.body.closed
+
+
+def test_changed_etag_with_same_content_reimports_but_keeps_holiday_m():
+    batch = make_batch(wire(import_info("v1", SHA256), *IMPORT_RESPONSES, OK), "v2")
+
+    result = batch.sync_holiday_data("bucket", "holiday.csv")
+
+    assert result["skipped"] and result["rows"] == 4
+    sent = queries(batch)
+    assert sent[3].startswith("INSERT INTO `wk_holiday_calendar` (`date`, `holiday_name`) VALUES ('2025-01-01', '元日'),")
+    # holiday_mには触れずに、新しいETagを記録する
+    assert not any("holiday_m" in query or "tmp_holiday" in query for query in sent)
+    assert sent[-1].startswith("INSERT INTO `holiday_import_t`")
+    assert f"""VALUES ('holiday.csv', 'v2', '{SHA256}', 4)""" in sent[-1]
+
+
+def test_changed_content_applies_insert_update_delete():
+    batch = make_batch(wire(
+        import_info("v1", "0" * 64),
+        *IMPORT_RESPONSES,
+        # DROP, CREATE, INSERT IGNORE（重複を除いて3件）
+        OK, OK, [ok_packet(affected_rows = 3)],
+        # 成人の日を削除、建国記念日を更新、天皇誕生日を追加
+        [ok_packet(affected_rows = 1)], [ok_packet(affected_rows = 1)], [ok_packet(affected_rows = 1)],
+        OK,
+        OK,
+    ), "v2")
+
+    result = batch.sync_holiday_data("bucket", "holiday.csv")
+
+    assert not result["skipped"]
+    assert (result["rows"], result["inserted"], result["updated"], result["deleted"]) == (4, 1, 1, 1)
+    assert queries(batch)[3].endswith("('2025-02-11', '建国記念の日'),('2025-02-23', '天皇誕生日'),('2025-02-23', '重複')")
+    assert queries(batch)[4:12] == [
+        "DROP TEMPORARY TABLE IF EXISTS tmp_holiday",
+        "CREATE TEMPORARY TABLE tmp_holiday ( `date` DATE NOT NULL, `name` VARCHAR(50) NOT NULL, PRIMARY KEY (`date`) )",
+        # 同じ日付は、CSVで先に出現したもの（idが小さいもの）を残す
+        "INSERT IGNORE INTO tmp_holiday (`date`,`name`) SELECT `date`, holiday_name FROM wk_holiday_calendar ORDER BY `id`",
+        "DELETE t1 FROM holiday_m t1 LEFT JOIN tmp_holiday t2 ON t1.`date` = t2.`date` WHERE t2.`date` IS NULL",
+        "UPDATE holiday_m t1 JOIN tmp_holiday t2 ON t1.`date` = t2.`date` SET t1.holiday_name = t2.`name` WHERE t1.holiday_name <> t2.`name`",
+        "INSERT INTO holiday_m (`date`,`holiday_name`) SELECT t2.`date`, t2.`name` FROM tmp_holiday t2 LEFT JOIN holiday_m t1 ON t1.`date` = t2.`date` WHERE t1.`date` IS NULL",
+        "DROP TEMPORARY TABLE IF EXISTS tmp_holiday",
+        queries(batch)[11],
+    ]
+    assert f"""VALUES ('holiday.csv', 'v2', '{SHA256}', 4)""" in queries(batch)[11]
@@ -13,3 +13,18 @@ def test_sqs_queue_created():
 #     template.has_resource_properties("AWS::SQS::Queue", {
 #         "VisibilityTimeout": 300
 #     })
+
+
+def find_function(template, handler):
+    [function] = template.find_resources("AWS::Lambda::Function", {"Properties": {"Handler": handler}}).values()
+    return function["Properties"]
+
+
+# エクスポートを開始する関数は、Lambda APIを呼び出すためVPCの外に置き、DBに接続するworkerはVPC内に置く
+def test_export_starter_runs_outside_vpc():
+    app = core.App()
+    stack = MyScheduleAppCdkStack(app, "my-schedule-app-cdk")
+    template = assertions.Template.from_stack(stack)
+
+    assert "VpcConfig" not in find_function(template, "export_events.lambda_handler")
+    assert "VpcConfig" in find_function(template, "export_events.worker_handler")
@@ -0,0 +1,117 @@
+import datetime
+from array import array
+
+import pytest
+
+from pymysql import err
+from pymysql.constants import FIELD_TYPE, FLAG
+from pymysql.cursors import ColumnCursor, DictCursor
+
+from tests.unit.pymysql_stub import BINARY, UTF8MB4, make_connection, resultset, text_row, wire
+
+
+# get_detailのクエリの結果列
+COLUMNS = [
+    ("event_id", FIELD_TYPE.LONG, BINARY, FLAG.UNSIGNED),
+    ("date", FIELD_TYPE.DATE, BINARY, 0),
+    ("event_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ("event_detail", FIELD_TYPE.BLOB, UTF8MB4, 0),
+]
+ROWS = [
+    (1, datetime.date(2025, 12, 28), "会議", "第1会議室"),
+    (2, datetime.date(2025, 12, 28), "買い物", None),
+    (3, datetime.date(2025, 12, 29), "大掃除", ""),
+]
+KEYS = ["event_id", "date", "event_name", "event_detail"]
+
+
+def execute(columns = COLUMNS, rows = ROWS, cursorclass = ColumnCursor):
+    conn = make_connection(wire(resultset(columns, rows, text_row)), cursorclass)
+    cur = conn.cursor()
+    cur.execute("SELECT `event_id`,`date`,`event_name`,`event_detail` FROM event_t")
+    return cur
+
+
+def test_fetchcolumns():
+    columns = execute().fetchcolumns()
+    assert columns == {
+        "event_id": array("Q", [1, 2, 3]),
+        "date": [datetime.date(2025, 12, 28), datetime.date(2025, 12, 28), datetime.date(2025, 12, 29)],
+        "event_name": ["会議", "買い物", "大掃除"],
+        "event_detail": ["第1会議室", None, ""],
+    }
+
+
+def test_fetchcolumns_with_null_integer_and_converters():
+    columns = [("id", FIELD_TYPE.LONG, BINARY, 0), ("score", FIELD_TYPE.LONG, BINARY, 0)]
+    cur = execute(columns, [(1, 10), (2, None)])
+    result = cur.fetchcolumns(converters = {"id": str})
+    # NULLを含む整数列と、変換した列はリストになる
+    assert result == {"id": ["1", "2"], "score": [10, None]}
+
+
+def test_to_records_matches_dict_cursor():
+    expected = execute(cursorclass = DictCursor).fetchall()
+    assert execute().to_records() == expected
+
+
+def test_to_records_with_keys_and_converters():
+    cur = execute()
+    assert cur.fetchone() == ROWS[0]
+    # fetchone済みの行は含めない
+    records = cur.to_records(["id", "day", "name", "detail"], converters = {"day": lambda d: d.strftime("%Y-%m-%d")})
+    assert records == [
+        {"id": 2, "day": "2025-12-28", "name": "買い物", "detail": None},
+        {"id": 3, "day": "2025-12-29", "name": "大掃除", "detail": ""},
+    ]
+    assert cur.to_records() == []
+
+
+def test_to_records_checks_number_of_keys():
+    with pytest.raises(err.ProgrammingError):
+        execute().to_records(["event_id"])
+
+
+def test_to_records_keys_are_used_as_is():
+    # キーはそのままdictのキーになる（コードとして解釈されない）
+    keys = ["a'}", "__import__('os')", "name", "detail"]
+    assert execute().to_records(keys, converters = {"__import__('os')": str})[0] == {"a'}": 1, "__import__('os')": "2025-12-28", "name": "会議", "detail": "第1会議室"}
+    with pytest.raises(err.ProgrammingError):
+        execute().to_records([1, 2, 3, 4])
+
+
+def test_empty_result():
+    cur = execute(rows = [])
+    assert cur.to_records(KEYS) == []
+    assert cur.fetchcolumns()["event_id"] == array("Q")
+
+
+# DictCursor + 内包表記と、ColumnCursor.to_records で、get_detailと同じ形のレスポンス用データを作る時間を比較する
+# LayerのパスをPYTHONPATHに設定し、python -m tests.unit.test_pymysql_column_cursor で実行する
+if __name__ == "__main__":
+    import time
+
+    def format_date(value):
+        return value.strftime("%Y-%m-%d")
+
+    def dict_cursor(cur):
+        return [{"event_id": r["event_id"], "date": format_date(r["date"]), "event_name": r["event_name"], "event_detail": r["event_detail"]} for r in cur.fetchall()]
+
+    def column_cursor(cur):
+        return cur.to_records(KEYS, converters = {"date": format_date})
+
+    for count in [10000, 100000, 1000000]:
+        rows = [(i, datetime.date(2025, 12, 1) + datetime.timedelta(days = i % 31), f"予定{i}", "詳細") for i in range(count)]
+        data = wire(resultset(COLUMNS, rows, text_row))
+        results = []
+        for name, cursorclass, reshape in [("DictCursor", DictCursor, dict_cursor), ("ColumnCursor", ColumnCursor, column_cursor)]:
+            conn = make_connection(data, cursorclass)
+            cur = conn.cursor()
+            start = time.perf_counter()
+            cur.execute("SELECT")
+            fetched = time.perf_counter()
+            results.append(reshape(cur))
+            end = time.perf_counter()
+            print(f"{count:>8} rows {name:<12}: query+fetch {(fetched - start) * 1e3:7.1f} ms, reshape {(end - fetched) * 1e3:7.1f} ms")
+        assert results[0] == results[1]
+        del results, data
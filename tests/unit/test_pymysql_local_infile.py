@@ -0,0 +1,56 @@
+import struct
+
+import pytest
+
+from pymysql import err
+
+from tests.unit.pymysql_stub import make_connection, ok_packet, wire
+
+
+# LOAD DATA LOCAL INFILEの応答
+# サーバがファイル名を要求し（0xfb）、クライアントがデータと空パケットを送った後に、OKを返す
+# OKのシーケンス番号は、クライアントが送ったパケットの数（client_packets）だけ進む
+def load_local_response(filename, client_packets):
+    ok = ok_packet()
+    return wire([b"\xfb" + filename]) + struct.pack("<I", len(ok))[:3] + bytes((2 + client_packets,)) + ok
+
+
+# COM_QUERYの後にクライアントが送ったパケットの中身（シーケンス番号を除く）
+def sent_data(conn):
+    return [data[4:] for data in conn._sock.sent[1:]]
+
+
+def test_registered_source_is_sent_instead_of_a_file():
+    conn = make_connection(load_local_response(b"data.tsv", 2), local_infile = "sources")
+    conn.set_local_infile_source("data.tsv", [b"2025-01-01\t", "元日\n".encode()])
+
+    with conn.cursor() as cur:
+        cur.execute("LOAD DATA LOCAL INFILE 'data.tsv' INTO TABLE t")
+
+    assert sent_data(conn) == ["2025-01-01\t元日\n".encode(), b""]
+    # 登録したデータは1回だけ使われる
+    assert conn._local_infile_sources == {}
+
+
+def test_unregistered_file_is_not_opened_for_sources_only_connection(tmp_path):
+    path = tmp_path / "secret.txt"
+    path.write_bytes(b"secret")
+    conn = make_connection(load_local_response(str(path).encode(), 1), local_infile = "sources")
+
+    with conn.cursor() as cur:
+        with pytest.raises(err.OperationalError, match = "No local infile source registered"):
+            cur.execute("LOAD DATA LOCAL INFILE 'data.tsv' INTO TABLE t")
+
+    # ファイルは読まずに、空パケットだけを送る
+    assert sent_data(conn) == [b""]
+
+
+def test_unregistered_file_is_sent_when_local_files_are_allowed(tmp_path):
+    path = tmp_path / "data.tsv"
+    path.write_bytes(b"2025-01-01\tholiday\n")
+    conn = make_connection(load_local_response(str(path).encode(), 2), local_infile = True)
+
+    with conn.cursor() as cur:
+        cur.execute(f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE t")
+
+    assert sent_data(conn) == [b"2025-01-01\tholiday\n", b""]
@@ -0,0 +1,156 @@
+import struct
+import datetime
+
+from pymysql import connections
+from pymysql.constants import FIELD_TYPE
+
+from tests.unit.pymysql_stub import BINARY, UTF8MB4, make_connection, resultset, text_row, wire
+
+
+COLUMNS = [
+    ("date", FIELD_TYPE.DATE, BINARY, 0),
+    ("event_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+]
+ROWS = [(datetime.date(2025, 12, 1) + datetime.timedelta(days = i), f"予定{i}" * (i % 7)) for i in range(200)]
+
+
+def query(conn):
+    conn.query("SELECT `date`, `event_name` FROM event_t")
+    return conn._result.rows
+
+
+def test_rows_split_across_small_receives():
+    # 1回のrecvで7バイトずつしか届かず、受信バッファもパケットより小さい場合
+    conn = make_connection(wire(resultset(COLUMNS, ROWS, text_row)), max_recv = 7)
+    conn._rbuf = connections._ReceiveBuffer(16)
+    assert query(conn) == tuple(ROWS)
+
+
+def test_row_packets_are_not_copied():
+    conn = make_connection(wire(resultset(COLUMNS, ROWS, text_row)))
+    rows = query(conn)
+    assert rows == tuple(ROWS)
+
+    rbuf = conn._rbuf
+    row_bytes = sum(len(text_row(row)) for row in ROWS)
+    assert rbuf.bytes_received == len(wire(resultset(COLUMNS, ROWS, text_row)))
+    # コピーされるのは列定義などの行以外のパケットだけ
+    assert rbuf.bytes_copied < rbuf.bytes_received - row_bytes
+
+
+def test_views_stay_valid_after_buffer_refill():
+    payloads = [bytes([i]) * 10 for i in range(1, 6)]
+    conn = make_connection(wire(payloads), max_recv = 3)
+    conn._rbuf = connections._ReceiveBuffer(16)
+    conn._next_seq_id = 1
+
+    packets = [conn._read_packet(view = True) for _ in payloads]
+    assert [bytes(packet.get_all_data()) for packet in packets] == payloads
+
+
+def test_buffer_is_reused_after_rows_are_decoded():
+    # 受信バッファより大きな結果セットを、少しずつ受信しながら2回読む
+    conn = make_connection(wire(resultset(COLUMNS, ROWS, text_row), resultset(COLUMNS, ROWS, text_row)), max_recv = 100)
+    conn._rbuf = connections._ReceiveBuffer(256)
+    buffer = conn._rbuf.buffer
+
+    assert query(conn) == tuple(ROWS)
+    assert query(conn) == tuple(ROWS)
+
+    # 行をデコードした後はビューを使わないため、新しいバッファを割り当てずに先頭に詰めて使いまわす
+    assert conn._rbuf.buffer is buffer
+    assert not conn._rbuf.exported
+
+
+def test_multi_fragment_packet(monkeypatch):
+    # 最大パケット長ちょうどの断片は、続きの断片と連結して1パケットにする
+    monkeypatch.setattr(connections, "MAX_PACKET_LEN", 8)
+    payload = bytes(range(20))
+    fragments = [payload[:8], payload[8:16], payload[16:]]
+    conn = make_connection(wire(fragments))
+    conn._next_seq_id = 1
+
+    packet = conn._read_packet(view = True)
+    assert packet.get_all_data() == payload
+    assert conn._next_seq_id == 4
+
+
+# ループバックの疑似MySQLサーバから大きな結果セットを受信し、パケット/秒と、クライアント内でコピーしたバイト数を表示する
+# 比較用に、変更前の実装（makefile + bytearray + bytes()）も計測する
+# LayerのパスをPYTHONPATHに設定し、python -m tests.unit.test_pymysql_packet_reader で実行する
+if __name__ == "__main__":
+    import socket
+    import threading
+    import time
+
+    class LegacyConnection(connections.Connection):
+        bytes_copied = 0
+
+        # 変更前の _read_packet / _read_bytes（コピーしたバイト数の集計を追加）
+        def _read_packet(self, packet_type = connections.MysqlPacket, view = False):
+            buff = bytearray()
+            while True:
+                packet_header = self._rfile.read(4)
+                btrl, btrh, packet_number = struct.unpack("<HBB", packet_header)
+                bytes_to_read = btrl + (btrh << 16)
+                if packet_number != self._next_seq_id:
+                    raise connections.err.InternalError("Packet sequence number wrong")
+                self._next_seq_id = (self._next_seq_id + 1) % 256
+                recv_data = self._rfile.read(bytes_to_read)
+                buff += recv_data
+                # BufferedReader.read()、bytearrayへの追加、bytes()で3回コピーする
+                self.bytes_copied += 4 + 3 * bytes_to_read
+                if bytes_to_read < connections.MAX_PACKET_LEN:
+                    break
+            packet = packet_type(bytes(buff), self.encoding)
+            if packet.is_error_packet():
+                packet.raise_for_error()
+            return packet
+
+    def serve(listener, response, queries):
+        sock, _ = listener.accept()
+        with sock:
+            for _ in range(queries):
+                header = sock.recv(4)
+                length = int.from_bytes(header[:3], "little")
+                while length:
+                    length -= len(sock.recv(length))
+                sock.sendall(response)
+
+    rows = [("2025-12-28", "日", None, i, f"予定{i}" * 4) for i in range(200000)]
+    columns = [
+        ("date", FIELD_TYPE.DATE, BINARY, 0),
+        ("weekday", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+        ("holiday_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+        ("event_id", FIELD_TYPE.LONG, BINARY, 0),
+        ("event_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ]
+    packets = resultset(columns, rows, text_row)
+    response = wire(packets)
+    queries = 3
+
+    for name, connection_class in [("legacy", LegacyConnection), ("recv_into", connections.Connection)]:
+        listener = socket.create_server(("127.0.0.1", 0))
+        server = threading.Thread(target = serve, args = (listener, response, queries))
+        server.start()
+
+        conn = connection_class(defer_connect = True)
+        conn._sock = socket.create_connection(listener.getsockname())
+        conn._rfile = conn._sock.makefile("rb")
+        conn._rbuf = connections._ReceiveBuffer()
+        conn.server_status = 0
+
+        start = time.perf_counter()
+        for _ in range(queries):
+            conn.query("SELECT")
+        seconds = time.perf_counter() - start
+        copied = conn.bytes_copied if connection_class is LegacyConnection else conn._rbuf.bytes_copied
+
+        server.join()
+        conn._sock.close()
+        listener.close()
+        print(
+            f"{name}: {len(packets) * queries / seconds:,.0f} packets/sec, "
+            f"{len(response) * queries / seconds / 1e6:.1f} MB/s, "
+            f"copied {copied / queries / 1e6:.1f} MB/query (received {len(response) / 1e6:.1f} MB/query)"
+        )
@@ -0,0 +1,124 @@
+import struct
+import datetime
+
+import pytest
+
+from pymysql import connections
+from pymysql.constants import COMMAND, FIELD_TYPE, FLAG
+from pymysql.cursors import PreparedCursor
+
+from tests.unit.pymysql_stub import (
+    BINARY, UTF8MB4, binary_row, lenenc, make_connection, prepare_ok, resultset, text_row, wire,
+)
+
+
+# get_detailのクエリの結果列（event_id, date, event_name, event_detail）
+DETAIL_COLUMNS = [
+    ("event_id", FIELD_TYPE.LONG, BINARY, FLAG.UNSIGNED),
+    ("date", FIELD_TYPE.DATE, BINARY, 0),
+    ("event_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ("event_detail", FIELD_TYPE.BLOB, UTF8MB4, 0),
+]
+DETAIL_ROWS = [
+    (1, datetime.date(2025, 12, 28), "会議", "第1会議室"),
+    (2, datetime.date(2025, 12, 28), "買い物", None),
+]
+
+
+def test_prepared_cursor_executes_with_binary_protocol():
+    server_data = wire(
+        prepare_ok(7, DETAIL_COLUMNS, 2),
+        resultset(DETAIL_COLUMNS, DETAIL_ROWS, binary_row),
+        resultset(DETAIL_COLUMNS, DETAIL_ROWS[:1], binary_row),
+    )
+    conn = make_connection(server_data, PreparedCursor)
+    sql = "SELECT `event_id`,`date`,`event_name`,`event_detail` FROM event_t WHERE `date`= %s and `user_id` = %s"
+
+    with conn.cursor() as cur:
+        cur.execute(sql, (datetime.date(2025, 12, 28), "user-1"))
+        assert cur.fetchall() == tuple(DETAIL_ROWS)
+        # 同じSQLは再度prepareせず、キャッシュしたステートメントで実行する
+        cur.execute(sql, (datetime.date(2025, 12, 28), "user-1"))
+        assert cur.fetchall() == tuple(DETAIL_ROWS[:1])
+
+    sock = conn._sock
+    assert sock.commands() == [COMMAND.COM_STMT_PREPARE, COMMAND.COM_STMT_EXECUTE, COMMAND.COM_STMT_EXECUTE]
+    assert sock.sent[0][5:] == sql.replace("%s", "?").encode()
+
+    # COM_STMT_EXECUTE: stmt_id, flags, iteration_count, NULL bitmap, new_params_bound_flag, types, values
+    execute = sock.sent[1][5:]
+    assert execute[:9] == struct.pack("<IBI", 7, 0, 1)
+    assert execute[9:12] == b"\x00\x01" + bytes((FIELD_TYPE.DATE,))
+    assert execute[12:15] == bytes((0, FIELD_TYPE.VAR_STRING, 0))
+    assert execute[15:] == struct.pack("<BHBB", 4, 2025, 12, 28) + lenenc(b"user-1")
+
+
+def test_binary_and_text_protocol_return_same_rows():
+    text_conn = make_connection(wire(resultset(DETAIL_COLUMNS, DETAIL_ROWS, text_row)))
+    with text_conn.cursor() as cur:
+        cur.execute("SELECT 1")
+        text_rows = cur.fetchall()
+
+    binary_conn = make_connection(wire(prepare_ok(1, DETAIL_COLUMNS, 0), resultset(DETAIL_COLUMNS, DETAIL_ROWS, binary_row)))
+    stmt = binary_conn.prepare("SELECT 1")
+    binary_conn.execute_prepared(stmt)
+    assert binary_conn._result.rows == text_rows == tuple(DETAIL_ROWS)
+
+
+def test_prepared_sql_placeholders_and_nulls():
+    conn = make_connection(wire(prepare_ok(3, [], 2), [b"\x00\x01\x00\x02\x00\x00\x00"]), PreparedCursor)
+    with conn.cursor() as cur:
+        assert cur.execute("UPDATE event_t SET `event_detail` = %s WHERE `event_name` LIKE '%%会議' and `event_id` = %s", (None, 10)) == 1
+
+    sent = conn._sock.sent
+    assert sent[0][5:].decode() == "UPDATE event_t SET `event_detail` = ? WHERE `event_name` LIKE '%会議' and `event_id` = ?"
+    # 1番目のパラメータはNULLビットマップで送る
+    assert sent[1][5 + 9:] == b"\x01\x01" + bytes((FIELD_TYPE.NULL, 0, FIELD_TYPE.LONGLONG, 0)) + struct.pack("<q", 10)
+
+
+def test_prepared_statement_cache_is_bounded():
+    conn = make_connection(wire(prepare_ok(1, [], 0), prepare_ok(2, [], 0)))
+    conn.max_prepared_statements = 1
+    conn.prepare("SELECT 1")
+    conn.prepare("SELECT 2")
+
+    # 古いステートメントはCOM_STMT_CLOSEで解放する
+    assert conn._sock.commands() == [COMMAND.COM_STMT_PREPARE, COMMAND.COM_STMT_PREPARE, COMMAND.COM_STMT_CLOSE]
+    assert conn._sock.sent[-1][5:] == struct.pack("<I", 1)
+    assert list(conn._prepared_statements) == [b"SELECT 2"]
+
+
+def test_execute_prepared_checks_param_count():
+    conn = make_connection(wire(prepare_ok(1, [], 1)))
+    stmt = conn.prepare("SELECT ?")
+    with pytest.raises(connections.err.ProgrammingError):
+        conn.execute_prepared(stmt, ())
+
+
+# 同じ結果セットを、テキストプロトコル/バイナリプロトコルで受け取る場合のクライアント側の処理時間を比較する
+# （サーバ側の構文解析コストは含まない。実測にはMySQLへの接続が必要）
+# LayerのパスをPYTHONPATHに設定し、python -m tests.unit.test_pymysql_prepared で実行する
+if __name__ == "__main__":
+    import timeit
+
+    calendar_columns = [
+        ("date", FIELD_TYPE.DATE, BINARY, 0),
+        ("weekday", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+        ("holiday_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+        ("event_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ]
+    calendar_rows = [(datetime.date(2025, 12, 1) + datetime.timedelta(days = i // 3), "月", None, f"予定{i}") for i in range(93)]
+    detail_rows = [(i, datetime.date(2025, 12, 28), f"予定{i}", "詳細" * 20) for i in range(20)]
+
+    for name, columns, rows in [("get_calendar", calendar_columns, calendar_rows), ("get_detail", DETAIL_COLUMNS, detail_rows)]:
+        for protocol, encode_row in [("text", text_row), ("binary", binary_row)]:
+            data = wire(resultset(columns, rows, encode_row))
+
+            def read():
+                conn = make_connection(data)
+                conn._next_seq_id = 1
+                conn._read_query_result(binary = encode_row is binary_row)
+
+            number = 2000
+            seconds = timeit.timeit(read, number = number)
+            print(f"{name} {protocol}: {seconds / number * 1e6:.1f} us/query ({len(rows)} rows)")
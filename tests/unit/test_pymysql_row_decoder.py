@@ -0,0 +1,106 @@
+import datetime
+from decimal import Decimal
+
+from pymysql.constants import FIELD_TYPE
+from pymysql.protocol import MysqlPacket
+
+from tests.unit.pymysql_stub import BINARY, UTF8MB4, make_connection, resultset, text_row, wire
+
+
+COLUMNS = [
+    ("event_id", FIELD_TYPE.LONG, BINARY, 0),
+    ("date", FIELD_TYPE.DATE, BINARY, 0),
+    ("event_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ("event_detail", FIELD_TYPE.BLOB, UTF8MB4, 0),
+    ("amount", FIELD_TYPE.NEWDECIMAL, BINARY, 0),
+    ("raw", FIELD_TYPE.BLOB, BINARY, 0),
+]
+
+
+# 列定義だけを読み込んだ結果（行はテストで直接デコードする）
+def make_result(columns = COLUMNS):
+    conn = make_connection(wire(resultset(columns, [], text_row)))
+    conn._next_seq_id = 1
+    conn._read_query_result()
+    return conn._result
+
+
+def decode(result, payload):
+    return result._read_row_from_packet(MysqlPacket(payload, "utf8"))
+
+
+def test_decodes_text_row_columns():
+    result = make_result()
+    long_detail = "詳細" * 200
+    payload = text_row([12, "2025-12-28", "会議", long_detail, "1.50", None])
+
+    assert len(long_detail.encode()) > 250  # 長さが3バイトの長さ符号化（0xfc）になる
+    assert decode(result, payload) == (12, datetime.date(2025, 12, 28), "会議", long_detail, Decimal("1.50"), None)
+
+
+def test_binary_charset_blob_is_returned_as_bytes():
+    result = make_result()
+    payload = text_row([1, "2025-12-28", "", None, None, "abc"])
+    assert decode(result, payload) == (1, datetime.date(2025, 12, 28), "", None, None, b"abc")
+
+
+def test_memoryview_packet_gives_same_row():
+    result = make_result()
+    payload = text_row([3, "2026-01-01", "元日", "初詣", "0", "xyz"])
+    assert decode(result, memoryview(payload)) == decode(result, payload)
+    assert type(decode(result, memoryview(payload))[5]) is bytes
+
+
+def test_short_row_stops_at_end_of_packet():
+    # 列数より値が少ない行（https://github.com/PyMySQL/PyMySQL/pull/434）
+    result = make_result()
+    assert decode(result, text_row([5, "2025-12-28"])) == (5, datetime.date(2025, 12, 28))
+
+
+# 10万行分の合成行パケットをデコードし、処理時間とtracemallocで計測したメモリ割り当てを表示する
+# 比較用に、変更前の read_length_coded_string() を列ごとに呼ぶ実装も計測する
+# LayerのパスをPYTHONPATHに設定し、python -m tests.unit.test_pymysql_row_decoder で実行する
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+
+    def read_row_legacy(result, packet):
+        row = []
+        for encoding, converter in result.converters:
+            try:
+                data = packet.read_length_coded_string()
+            except IndexError:
+                break
+            if data is not None:
+                if encoding is not None:
+                    data = data.decode(encoding)
+                if converter is not None:
+                    data = converter(data)
+            row.append(data)
+        return tuple(row)
+
+    columns = [
+        ("date", FIELD_TYPE.DATE, BINARY, 0),
+        ("weekday", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+        ("holiday_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+        ("event_id", FIELD_TYPE.LONG, BINARY, 0),
+        ("event_name", FIELD_TYPE.VAR_STRING, UTF8MB4, 0),
+    ]
+    result = make_result(columns)
+    payloads = [text_row(["2025-12-28", "日", None, i, f"予定{i}"]) for i in range(100000)]
+
+    for name, read_row in [("legacy", read_row_legacy), ("fast", type(result)._read_row_from_packet)]:
+        # 処理時間はtracemallocを止めた状態で計測する
+        packets = [MysqlPacket(payload, "utf8") for payload in payloads]
+        start = time.perf_counter()
+        rows = [read_row(result, packet) for packet in packets]
+        seconds = time.perf_counter() - start
+        del rows
+
+        packets = [MysqlPacket(payload, "utf8") for payload in payloads]
+        tracemalloc.start()
+        rows = [read_row(result, packet) for packet in packets]
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name}: {seconds * 1e3:.1f} ms, {seconds / len(rows) * 1e9:.0f} ns/row, retained {current / len(rows):.0f} B/row, peak {peak / 1e6:.1f} MB")
+        del rows
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from pymysql import err
+
+from mypackage import secret_utils
+from mypackage.secret_utils import SecretProvider
+
+
+# get_secret_valueの呼び出し回数を数えるスタブ（呼び出すたびにパスワードが変わる）
+class StubSecretsManagerClient:
+    def __init__(self):
+        self.calls = 0
+
+    def get_secret_value(self, SecretId):
+        assert SecretId == "my-secret"
+        self.calls += 1
+        return {"SecretString": json.dumps({"username": "user", "password": f"password-{self.calls}"})}
+
+
+@pytest.fixture
+def stub_secrets(monkeypatch):
+    client = StubSecretsManagerClient()
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(secret_utils.time, "monotonic", lambda: clock["now"])
+    provider = SecretProvider("my-secret", "ap-northeast-1")
+    provider._client = client
+    return provider, client, clock
+
+
+def test_secret_is_cached_within_ttl(stub_secrets):
+    provider, client, clock = stub_secrets
+    for _ in range(10):
+        assert provider.get_secret()["password"] == "password-1"
+        clock["now"] += 1
+    assert client.calls == 1
+
+    # TTL経過後は再取得する
+    clock["now"] += secret_utils.SECRET_TTL_SECONDS
+    assert provider.get_secret()["password"] == "password-2"
+    assert client.calls == 2
+
+
+def test_access_denied_refreshes_secret_and_retries_once(stub_secrets):
+    provider, client, _ = stub_secrets
+    provider.get_secret()
+    passwords = []
+
+    # ローテーション前のパスワードでは接続できない
+    def connect(secret):
+        passwords.append(secret["password"])
+        if secret["password"] == "password-1":
+            raise err.OperationalError(1045, "Access denied for user 'user'")
+        return "connection"
+
+    assert provider.retry_on_access_denied(connect) == "connection"
+    assert passwords == ["password-1", "password-2"]
+    assert client.calls == 2
+
+
+def test_access_denied_after_refresh_is_raised(stub_secrets):
+    provider, client, _ = stub_secrets
+    passwords = []
+
+    def connect(secret):
+        passwords.append(secret["password"])
+        raise err.OperationalError(1045, "Access denied for user 'user'")
+
+    with pytest.raises(err.OperationalError):
+        provider.retry_on_access_denied(connect)
+    # 再取得と再実行は1回だけ
+    assert passwords == ["password-1", "password-2"]
+    assert client.calls == 2
+
+
+@pytest.mark.parametrize("error", [err.OperationalError(2003, "Can't connect to MySQL server"), RuntimeError("boom")])
+def test_other_errors_do_not_refresh_secret(stub_secrets, error):
+    provider, client, _ = stub_secrets
+    calls = []
+
+    def connect(secret):
+        calls.append(secret["password"])
+        raise error
+
+    with pytest.raises(type(error)):
+        provider.retry_on_access_denied(connect)
+    assert calls == ["password-1"]
+    assert client.calls == 1
@@ -0,0 +1,103 @@
+import pytest
+
+from mypackage import ssm_utils
+
+
+PARAMETERS = {
+    "/my_schedule_app/secret_id": "my-secret",
+    "/my_schedule_app/region_name": "ap-northeast-1",
+    "/my_schedule_app/rds_host": "db.example.com",
+    "/my_schedule_app/rds_database": "my_schedule_app_db",
+    "/my_schedule_app/data_bucket": "my-data-bucket",
+}
+
+
+# get_parameters_by_pathのページングを模したスタブ
+class StubPaginator:
+    def __init__(self, client):
+        self.client = client
+
+    def paginate(self, Path, Recursive, WithDecryption):
+        self.client.calls += 1
+        if self.client.error:
+            raise self.client.error
+        items = [{"Name": k, "Value": v} for k, v in PARAMETERS.items() if k.startswith(Path + "/")]
+        # 2ページに分けて返す
+        yield {"Parameters": items[:2]}
+        yield {"Parameters": items[2:]}
+
+
+class StubSsmClient:
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+
+    def get_paginator(self, name):
+        assert name == "get_parameters_by_path"
+        return StubPaginator(self)
+
+
+@pytest.fixture
+def stub_ssm(monkeypatch):
+    client = StubSsmClient()
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(ssm_utils, "ssm", client)
+    monkeypatch.setattr(ssm_utils.time, "monotonic", lambda: clock["now"])
+    ssm_utils.invalidate_config()
+    yield client, clock
+    ssm_utils.invalidate_config()
+
+
+def test_get_config_returns_all_parameters(stub_ssm):
+    config = ssm_utils.get_config()
+    assert config == {
+        "secret_id": "my-secret",
+        "region_name": "ap-northeast-1",
+        "rds_host": "db.example.com",
+        "rds_database": "my_schedule_app_db",
+        "data_bucket": "my-data-bucket",
+    }
+
+
+def test_warm_invocations_reuse_cache(stub_ssm):
+    client, clock = stub_ssm
+    # warm起動を模して、TTL内に複数回呼び出す
+    for _ in range(10):
+        ssm_utils.get_config()
+        clock["now"] += 1
+    assert client.calls == 1
+
+    # TTL経過後は再取得する
+    clock["now"] += ssm_utils.CONFIG_TTL_SECONDS
+    ssm_utils.get_config()
+    assert client.calls == 2
+
+
+def test_invalidate_config_forces_refetch(stub_ssm):
+    client, _ = stub_ssm
+    ssm_utils.get_config()
+    ssm_utils.invalidate_config()
+    ssm_utils.get_config()
+    assert client.calls == 2
+
+
+def test_stale_values_returned_on_fetch_error(stub_ssm):
+    client, clock = stub_ssm
+    config = ssm_utils.get_config()
+
+    clock["now"] += ssm_utils.CONFIG_TTL_SECONDS
+    client.error = RuntimeError("ssm unavailable")
+    assert ssm_utils.get_config() == config
+    assert client.calls == 2
+
+    # 復旧後は新しい値で更新される
+    client.error = None
+    ssm_utils.get_config()
+    assert client.calls == 3
+
+
+def test_fetch_error_without_cache_raises(stub_ssm):
+    client, _ = stub_ssm
+    client.error = RuntimeError("ssm unavailable")
+    with pytest.raises(RuntimeError):
+        ssm_utils.get_config()
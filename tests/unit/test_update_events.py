@@ -0,0 +1,100 @@
+import datetime
+
+import pytest
+
+from pymysql.constants import FIELD_TYPE, FLAG
+
+import update_events
+from mypackage.api import ApiError
+from tests.unit.pymysql_stub import BINARY, DB_ARGS, ok_packet, resultset, text_row, wire
+
+
+ID_COLUMNS = [("event_id", FIELD_TYPE.LONG, BINARY, FLAG.UNSIGNED)]
+DATE_COLUMNS = [("date", FIELD_TYPE.DATE, BINARY, 0)]
+EDITS = [
+    {"event_id": 11, "date": "2025-12-29"},
+    {"event_id": 12, "date": "2025-12-30", "event_name": " 大掃除 "},
+    {"event_id": "13", "event_detail": ""},
+]
+
+
+def call_update_events(items):
+    return update_events.update_events(items, "user-1", "user1", *DB_ARGS)
+
+
+def queries(conn):
+    return [data[5:].decode() for data in conn._sock.sent]
+
+
+def test_edits_are_applied_with_one_update_statement(stub_db):
+    conn = stub_db(update_events, wire(
+        resultset(ID_COLUMNS, [(11,), (12,), (13,)], text_row),
+        resultset(DATE_COLUMNS, [(datetime.date(2025, 12, 29),), (datetime.date(2025, 12, 30),)], text_row),
+        [ok_packet(affected_rows = 3)],
+        [ok_packet(affected_rows = 1)],
+        [ok_packet()],
+    ))
+
+    applied, results = call_update_events(EDITS)
+
+    assert applied
+    assert results == [{"index": i, "status": "success"} for i in range(3)]
+    select_ids, select_dates, update, bump_revision, commit = queries(conn)
+    assert select_ids.endswith("WHERE `user_id` = 'user-1' AND `event_id` IN (11,12,13,13) FOR UPDATE")
+    assert update == (
+        "UPDATE event_t SET "
+        "`date` = CASE `event_id` WHEN 11 THEN '2025-12-29' WHEN 12 THEN '2025-12-30' ELSE `date` END, "
+        "`event_name` = CASE `event_id` WHEN 12 THEN '大掃除' ELSE `event_name` END, "
+        "`event_detail` = CASE `event_id` WHEN 13 THEN '' ELSE `event_detail` END, "
+        "`user_name` = 'user1' "
+        "WHERE `user_id` = 'user-1' AND `event_id` IN (11,12,13)"
+    )
+    assert "INSERT INTO user_revision_t" in bump_revision
+    assert commit == "COMMIT"
+
+
+def test_missing_event_rolls_back_whole_batch(stub_db):
+    # event_id 12 は他のユーザーの予定（または削除済み）
+    conn = stub_db(update_events, wire(
+        resultset(ID_COLUMNS, [(11,), (13,)], text_row),
+        resultset(DATE_COLUMNS, [(datetime.date(2025, 12, 29),)], text_row),
+        [ok_packet()],
+    ))
+
+    applied, results = call_update_events(EDITS)
+
+    assert not applied
+    assert [result["status"] for result in results] == ["skipped", "error", "skipped"]
+    assert results[1]["message"] == "Not found"
+    assert queries(conn)[-1] == "ROLLBACK"
+    assert not any(query.startswith("UPDATE") for query in queries(conn))
+
+
+def test_invalid_edits_do_not_connect(stub_db):
+    stub_db(update_events, None)
+    applied, results = call_update_events([
+        {"event_id": 11, "date": "2025/12/29"},
+        {"event_id": 11, "event_name": "重複"},
+        {"event_id": 12},
+        {"event_id": 13, "event_name": "会議"},
+    ])
+
+    assert not applied
+    assert [(result["status"], result.get("message")) for result in results] == [
+        ("error", "Invalid date"),
+        ("skipped", "Not applied due to other errors"),
+        ("error", "Nothing to update"),
+        ("skipped", "Not applied due to other errors"),
+    ]
+
+
+@pytest.mark.parametrize("event_id", ["12", " 12", 12])
+def test_parse_update_accepts_ascii_event_id(event_id):
+    assert update_events.parse_update({"event_id": event_id, "event_name": "会議"}) == (12, {"event_name": "会議"})
+
+
+# 全角・その他のUnicodeの数字（int()で変換できても、isdigit()では通ってしまう）、0、負の数、真偽値は認めない
+@pytest.mark.parametrize("event_id", ["１２", "²", "١٢", "0", "012", "-1", 0, -1, True, None, 1.5])
+def test_parse_update_rejects_invalid_event_id(event_id):
+    with pytest.raises(ApiError, match = "Invalid event_id"):
+        update_events.parse_update({"event_id": event_id, "event_name": "会議"})